@@ -0,0 +1,70 @@
+"""
+Latency of Tanimoto top-k screening in the drug fingerprint index against
+the full drug set, on synthetic fingerprints with the bit density of
+typical drug-like molecules, plus RDKit fingerprinting throughput.
+
+Usage:
+    python -m benchmarks.bench_fingerprint_search --drugs 15000 100000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.fingerprint_index import FingerprintIndex
+
+SMILES = [
+    "CC(=O)OC1=CC=CC=C1C(=O)O",
+    "CC(C)CC1=CC=C(C=C1)C(C)C(=O)O",
+    "CN1C=NC2=C1C(=O)N(C(=O)N2C)C",
+    "CC(=O)NC1=CC=C(O)C=C1",
+    "CCCCC1=NC(Cl)=C(CO)N1CC1=CC=C(C=C1)C1=CC=CC=C1C1=NNN=N1",
+]
+
+
+def synthetic_fingerprints(n, n_bits, bits_set=50, seed=0):
+    rng = np.random.default_rng(seed)
+    bits = np.zeros((n, n_bits), dtype=np.uint8)
+    rows = np.repeat(np.arange(n), bits_set)
+    bits[rows, rng.integers(n_bits, size=n * bits_set)] = 1
+    return np.packbits(bits, axis=1).view(np.uint64)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--drugs", type=int, nargs="+", default=[15_000, 100_000])
+    parser.add_argument("--n-bits", type=int, default=2048)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--queries", type=int, default=100)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    index = FingerprintIndex(n_bits=args.n_bits)
+    start = time.perf_counter()
+    repeats = 200
+    index.add([str(i) for i in range(repeats * len(SMILES))], SMILES * repeats)
+    fingerprint_rate = len(index) / (time.perf_counter() - start)
+
+    results = []
+    for n in args.drugs:
+        index = FingerprintIndex(n_bits=args.n_bits)
+        fingerprints = synthetic_fingerprints(n, args.n_bits)
+        index.add_fingerprints([str(i) for i in range(n)], fingerprints)
+        start = time.perf_counter()
+        for q in range(args.queries):
+            index.search_fingerprint(fingerprints[q], args.k)
+        latency = (time.perf_counter() - start) / args.queries
+        results.append({
+            "drugs": n,
+            "latency_ms": round(latency * 1000, 3),
+            "index_mb": round(index.fingerprints.nbytes / 2**20, 2),
+        })
+
+    if args.json:
+        print(json.dumps({"fingerprints_per_second": round(fingerprint_rate), "results": results}, indent=2))
+    else:
+        print(f"RDKit fingerprinting: {fingerprint_rate:.0f} molecules/s")
+        print(f"{'drugs':>8} {'latency ms':>11} {'index MB':>9}")
+        for r in results:
+            print(f"{r['drugs']:>8} {r['latency_ms']:>11} {r['index_mb']:>9}")
@@ -0,0 +1,71 @@
+"""
+Throughput of local GPT-2 generation on CPU as a function of batch size.
+
+Usage:
+    python -m benchmarks.bench_gpt2_generation --batch-sizes 1 2 4 8 16
+"""
+import argparse
+import json
+import time
+
+import torch
+
+from src.gpt2_model import GPT2Generator
+
+PROMPTS = [
+    "Angiotensin II receptor blockers lower blood pressure by",
+    "The main molecular targets of beta blockers are",
+    "Hypertension is associated with an increased risk of",
+    "Calcium channel blockers act on",
+    "Drug repurposing uses knowledge graphs to",
+    "ACE inhibitors such as lisinopril work by",
+    "Diuretics reduce blood volume by",
+    "A drug-target interaction is",
+]
+
+
+def run(generator, batch_size, num_prompts, max_new_tokens):
+    prompts = [PROMPTS[i % len(PROMPTS)] for i in range(num_prompts)]
+    start = time.perf_counter()
+    for i in range(0, num_prompts, batch_size):
+        generator.generate_batch(prompts[i:i + batch_size], max_new_tokens)
+    elapsed = time.perf_counter() - start
+    tokens = num_prompts * max_new_tokens
+    return {
+        "batch_size": batch_size,
+        "prompts": num_prompts,
+        "new_tokens": tokens,
+        "seconds": round(elapsed, 3),
+        "tokens_per_sec": round(tokens / elapsed, 1),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="gpt2")
+    parser.add_argument("--batch-sizes", type=int, nargs="+", default=[1, 2, 4, 8, 16])
+    parser.add_argument("--num-prompts", type=int, default=32)
+    parser.add_argument("--max-new-tokens", type=int, default=32)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    # min_new_tokens keeps every sequence at the same length, so that token
+    # counts are exact and runs are comparable
+    generator = GPT2Generator(
+        args.model,
+        num_threads=args.threads,
+        generation_params={"min_new_tokens": args.max_new_tokens},
+    )
+    generator.generate_batch(PROMPTS[:1], 4)  # warm-up
+
+    results = [
+        run(generator, b, args.num_prompts, args.max_new_tokens) for b in args.batch_sizes
+    ]
+    if args.json:
+        print(json.dumps({"threads": torch.get_num_threads(), "results": results}, indent=2))
+    else:
+        print(f"threads={torch.get_num_threads()}")
+        print(f"{'batch':>6} {'seconds':>9} {'tokens/s':>10}")
+        for r in results:
+            print(f"{r['batch_size']:>6} {r['seconds']:>9} {r['tokens_per_sec']:>10}")
@@ -0,0 +1,47 @@
+"""
+Accuracy, latency and size of the CPU inference variants of GPT-2
+(fp32 eager, dynamic int8, TorchScript, ONNX Runtime).
+
+Usage:
+    python -m benchmarks.bench_gpt2_optimization --threads 4
+"""
+import argparse
+import json
+import resource
+
+from transformers import AutoTokenizer, GPT2LMHeadModel
+
+from src.gpt2_optimization import VARIANTS, benchmark_variants
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--model", default="gpt2")
+    parser.add_argument("--variants", nargs="+", default=list(VARIANTS), choices=VARIANTS)
+    parser.add_argument("--threads", type=int, default=None)
+    parser.add_argument("--max-new-tokens", type=int, default=20)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    tokenizer = AutoTokenizer.from_pretrained(args.model)
+    tokenizer.padding_side = "left"
+    tokenizer.pad_token = tokenizer.eos_token
+    model = GPT2LMHeadModel.from_pretrained(args.model)
+
+    results = benchmark_variants(
+        model,
+        tokenizer,
+        variants=args.variants,
+        num_threads=args.threads,
+        max_new_tokens=args.max_new_tokens,
+        repeats=args.repeats,
+    )
+    peak_rss_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+    if args.json:
+        print(json.dumps({"peak_rss_mb": round(peak_rss_mb, 1), "results": results}, indent=2))
+    else:
+        print(f"{'variant':<12} {'agreement':>9} {'latency ms':>11} {'size MB':>8}")
+        for r in results:
+            print(f"{r['variant']:<12} {r['agreement']:>9} {r['latency_ms']:>11} {r['size_mb']:>8}")
+        print(f"peak RSS of the benchmark process: {peak_rss_mb:.0f} MB")
@@ -0,0 +1,85 @@
+"""
+Random-walk throughput (walks/s) of the node2vec engine, unbiased and
+biased, serial and across processes; skip-gram training throughput; and
+recall@k of held-out `targets` edges, on a synthetic drug-target graph
+whose drugs hit targets of one of several communities (plus noise), so
+that target links are predictable from graph structure.
+
+Usage:
+    python -m benchmarks.bench_graph_embedding --drugs 15000 --targets 5000
+"""
+import argparse
+import json
+import time
+
+import networkx as nx
+import numpy as np
+
+from src.graph_embedding import Node2Vec, WalkGraph, random_walks, recall_at_k, split_links
+
+
+def synthetic_graph(drugs, targets, communities=50, degree=4, noise=0.1, seed=0):
+    rng = np.random.default_rng(seed)
+    graph = nx.DiGraph()
+    community = np.arange(targets) % communities
+    for t in range(targets):
+        graph.add_node(f"T{t}", type="target")
+    for d in range(drugs):
+        graph.add_node(f"D{d}", type="drug")
+        pool = np.flatnonzero(community == d % communities)
+        for t in rng.choice(pool, min(degree, len(pool)), replace=False):
+            if rng.random() < noise:
+                t = rng.integers(targets)
+            graph.add_edge(f"D{d}", f"T{t}", relationship="targets")
+    return graph
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--drugs", type=int, default=15_000)
+    parser.add_argument("--targets", type=int, default=5_000)
+    parser.add_argument("--num-walks", type=int, default=10)
+    parser.add_argument("--walk-length", type=int, default=40)
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--dimensions", type=int, default=64)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    graph = synthetic_graph(args.drugs, args.targets)
+    held_out = split_links(graph)
+    walk_graph = WalkGraph.from_graph(graph, exclude=held_out)
+
+    walks = []
+    for p, q in [(1.0, 1.0), (4.0, 0.5)]:
+        for workers in args.workers:
+            start = time.perf_counter()
+            count = len(random_walks(walk_graph, args.num_walks, args.walk_length, p, q, workers=workers))
+            seconds = time.perf_counter() - start
+            walks.append({"p": p, "q": q, "workers": workers, "walks": count, "walks_per_second": round(count / seconds)})
+
+    model = Node2Vec(dimensions=args.dimensions, num_walks=args.num_walks, walk_length=args.walk_length)
+    model.fit(walk_graph)
+    pairs = model.timings["walks"] * sum(2 * (args.walk_length - o) for o in range(1, model.window + 1))
+    evaluation = recall_at_k(model, walk_graph, held_out, args.k)
+    results = {
+        "nodes": len(walk_graph),
+        "edges": int(walk_graph.indptr[-1] // 2),
+        "walks": walks,
+        "train_seconds": round(model.timings["train_seconds"], 2),
+        "pairs_per_second": round(pairs / model.timings["train_seconds"]),
+        "recall_at_k": round(evaluation["recall"], 4),
+        "random_recall_at_k": round(args.k / args.targets, 4),
+        "held_out_links": evaluation["links"],
+        "k": args.k,
+    }
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        print(f"graph: {results['nodes']} nodes, {results['edges']} edges")
+        print(f"{'p':>4} {'q':>4} {'workers':>8} {'walks/s':>10}")
+        for w in walks:
+            print(f"{w['p']:>4} {w['q']:>4} {w['workers']:>8} {w['walks_per_second']:>10}")
+        print(f"skip-gram: {results['pairs_per_second']} pairs/s ({results['train_seconds']} s)")
+        print(f"recall@{args.k}: {results['recall_at_k']} (random: {results['random_recall_at_k']}, {results['held_out_links']} links)")
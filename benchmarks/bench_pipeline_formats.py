@@ -0,0 +1,82 @@
+"""
+End-to-end stage times of the data pipeline with CSV against Parquet
+intermediate files, on a synthetic HTN dataset: cleaning (raw CSV to
+processed file), preprocessing (processed to preprocessed file) and a
+downstream load of two columns of the preprocessed file.
+
+Usage:
+    python -m benchmarks.bench_pipeline_formats --rows 1000000 --chunksize 200000
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from src.data_ingestion import clean_file, load_data
+from src.data_preprocessing import preprocess_file
+
+
+def synthetic_raw(path, rows, seed=0):
+    rng = np.random.default_rng(seed)
+    df = pd.DataFrame({
+        "Patient ID": np.arange(rows),
+        "Age": rng.integers(20, 90, size=rows).astype(float),
+        "Blood Pressure": rng.normal(130, 15, size=rows),
+        "Cholesterol": rng.normal(200, 30, size=rows),
+        "Gender": rng.choice(["F", "M"], size=rows),
+        "Notes": rng.choice(["stable", "follow-up", "referred", "on medication"], size=rows),
+    })
+    df.loc[rng.random(rows) < 0.01, "Age"] = np.nan
+    df.to_csv(path, index=False)
+
+
+def timed(func, *args, **kwargs):
+    start = time.perf_counter()
+    # The pipeline functions print progress messages
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = func(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+def run(directory, raw, fmt, chunksize):
+    processed = os.path.join(directory, f"processed.{fmt}")
+    preprocessed = os.path.join(directory, f"preprocessed.{fmt}")
+    _, clean_seconds = timed(clean_file, raw, processed, chunksize)
+    _, preprocess_seconds = timed(preprocess_file, processed, preprocessed, chunksize)
+    _, load_seconds = timed(load_data, preprocessed, columns=["age", "blood_pressure"])
+    return {
+        "format": fmt,
+        "clean_seconds": round(clean_seconds, 3),
+        "preprocess_seconds": round(preprocess_seconds, 3),
+        "projected_load_seconds": round(load_seconds, 3),
+        "processed_mb": round(os.path.getsize(processed) / 2**20, 2),
+        "preprocessed_mb": round(os.path.getsize(preprocessed) / 2**20, 2),
+    }
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=500_000)
+    parser.add_argument("--chunksize", type=int, default=None)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        raw = os.path.join(directory, "raw.csv")
+        synthetic_raw(raw, args.rows)
+        results = [run(directory, raw, fmt, args.chunksize) for fmt in ["csv", "parquet"]]
+
+    if args.json:
+        print(json.dumps({"rows": args.rows, "chunksize": args.chunksize, "results": results}, indent=2))
+    else:
+        print(f"rows={args.rows} chunksize={args.chunksize}")
+        columns = list(results[0])
+        print(" ".join(f"{c:>22}" for c in columns))
+        for r in results:
+            print(" ".join(f"{r[c]:>22}" for c in columns))
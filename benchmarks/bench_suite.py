@@ -0,0 +1,261 @@
+"""
+End-to-end benchmark suite on synthetic data: timings, throughput and peak
+Python memory of the build, query and API hot paths at several scales.
+
+Stages per scale (number of drugs):
+    generate      write a seeded DrugBank-like XML file
+    parse         parse_drugbank (XML -> NetworkX graph)
+    fingerprints  FingerprintIndex.from_graph
+    overlap       DrugOverlap.from_graph + similar_drugs
+    load          nx_to_neo4j into an in-memory graph database
+    api           /drugs, /targets and /relationships handlers (in-memory backend)
+    cypher        CypherPrompt.generate_query with a stub chat model
+
+Peak memory is traced with tracemalloc, which slows the stages down; use
+--no-memory for timings only. Stages whose dependencies are not installed
+are reported as skipped, stages that raise as errors. Runs
+are written as JSON (--output) and can be compared with an earlier run
+(--compare); stages slower by more than --tolerance are flagged.
+
+Usage:
+    python -m benchmarks.bench_suite --scales 1000 5000 --output run.json
+    python -m benchmarks.bench_suite --compare run.json
+"""
+import argparse
+import importlib
+import itertools
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from benchmarks.synthetic import InMemoryGraph, StubChat, drugbank_xml
+
+SCHEMA_VERSION = 1
+
+CYPHER_SCHEMA = {
+    "drug": {"represented_as": "node", "properties": {"id": "str", "label": "str", "drug_type": "str"}},
+    "target": {"represented_as": "node", "properties": {"id": "str", "label": "str"}},
+    "enzyme": {"represented_as": "node", "properties": {"id": "str", "label": "str"}},
+    "pathway": {"represented_as": "node", "properties": {"id": "str", "label": "str"}},
+    "targets": {"represented_as": "edge", "source": "drug", "target": "target", "label_as_edge": "targets"},
+    "participates in": {"represented_as": "edge", "source": "drug", "target": "pathway", "label_as_edge": "participates_in"},
+}
+
+CYPHER_RESPONSES = [
+    "Drug, Target",
+    "Targets",
+    "Drug.label, Target.label",
+    "MATCH (d:drug)-[:targets]->(t:target) RETURN d.label, t.label",
+]
+
+
+def measure(stage, scale, function, modules=(), memory=True):
+    """
+    Run `function` (returning the number of items it processed) and
+    record its time, throughput and peak traced memory. `modules` are
+    imported first, outside the measurement; the stage is skipped if one
+    cannot be imported. An exception in the stage is recorded as
+    status "error", so the run continues with the next stage.
+    """
+    result = {"stage": stage, "scale": scale}
+    try:
+        for module in modules:
+            importlib.import_module(module)
+    except ImportError as e:
+        result.update(status="skipped", reason=str(e))
+        return result
+    if memory:
+        tracemalloc.start()
+    start = time.perf_counter()
+    try:
+        items = function()
+    except Exception as e:
+        logging.getLogger(__name__).exception(f"Stage {stage} failed at scale {scale}")
+        result.update(status="error", reason=f"{type(e).__name__}: {e}")
+        return result
+    finally:
+        seconds = time.perf_counter() - start
+        peak = tracemalloc.get_traced_memory()[1] if memory else None
+        if memory:
+            tracemalloc.stop()
+    result.update(
+        status="ok",
+        seconds=round(seconds, 4),
+        items=items,
+        items_per_second=round(items / seconds, 1) if seconds > 0 else None,
+        peak_mb=round(peak / 2**20, 2) if peak is not None else None,
+    )
+    return result
+
+
+def run_scale(drugs, workdir, requests, cypher_queries, seed, memory):
+    state = {}
+    xml_file = os.path.join(workdir, f"drugbank_{drugs}.xml")
+
+    def generate():
+        state["xml"] = drugbank_xml(xml_file, drugs=drugs, seed=seed)
+        return drugs
+
+    def parse():
+        from scripts.build_graph import parse_drugbank
+
+        state["graph"] = parse_drugbank(xml_file)
+        return state["graph"].number_of_nodes() + state["graph"].number_of_edges()
+
+    def fingerprints():
+        from src.fingerprint_index import FingerprintIndex
+
+        return len(FingerprintIndex.from_graph(state["graph"]))
+
+    def overlap():
+        from src.target_overlap import DrugOverlap
+
+        overlap = DrugOverlap.from_graph(state["graph"])
+        overlap.similar_drugs(k=20)
+        return len(overlap.drugs)
+
+    def load():
+        from scripts.build_graph import nx_to_neo4j
+
+        state["db"] = InMemoryGraph()
+        nx_to_neo4j(state["graph"], state["db"])
+        return state["graph"].number_of_edges()
+
+    def api():
+        from fastapi.testclient import TestClient
+
+        from src.api import endpoints
+        from src.api.graph_backend import InMemoryBackend
+
+        endpoints.set_graph_backend(InMemoryBackend.from_graph(state["graph"]))
+        client = TestClient(endpoints.app)
+        drug_ids = [f"DB{d:05d}" for d in range(0, drugs, max(1, drugs // requests))]
+        target_ids = [t for t, data in state["graph"].nodes(data=True) if data.get("type") == "target"]
+        paths = itertools.cycle(
+            itertools.chain.from_iterable(
+                (f"/drugs/{d}", f"/targets/{t}", f"/relationships/{d}")
+                for d, t in zip(drug_ids, itertools.cycle(target_ids))
+            )
+        )
+        for path in itertools.islice(paths, requests):
+            response = client.get(path)
+            if response.status_code != 200:
+                raise RuntimeError(f"{path}: HTTP {response.status_code}")
+        return requests
+
+    def cypher():
+        from model.cypher_prompt import CypherPrompt
+
+        responses = itertools.cycle(CYPHER_RESPONSES)
+        prompt = CypherPrompt(
+            schema_config_or_info_dict=CYPHER_SCHEMA,
+            chat_factory=lambda: StubChat([next(responses)]),
+        )
+        for i in range(cypher_queries):
+            prompt.generate_query(f"Which targets does drug DB{i:05d} act on?")
+        return cypher_queries
+
+    # (name, function, modules it imports, state it needs from an earlier stage)
+    stages = [
+        ("generate", generate, [], None),
+        ("parse", parse, ["scripts.build_graph"], "xml"),
+        ("fingerprints", fingerprints, ["src.fingerprint_index"], "graph"),
+        ("overlap", overlap, ["src.target_overlap"], "graph"),
+        ("load", load, ["py2neo", "scripts.build_graph"], "graph"),
+        ("api", api, ["fastapi.testclient", "src.api.endpoints"], "graph"),
+        ("cypher", cypher, ["model.cypher_prompt"], None),
+    ]
+    producers = {"xml": "generate", "graph": "parse"}
+    results = []
+    for name, function, modules, needs in stages:
+        if needs is not None and needs not in state:
+            reason = f"needs the {producers[needs]} stage"
+            results.append({"stage": name, "scale": drugs, "status": "skipped", "reason": reason})
+            continue
+        results.append(measure(name, drugs, function, modules, memory))
+    if os.path.exists(xml_file):
+        os.remove(xml_file)
+    return results
+
+
+def environment():
+    try:
+        commit = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        "python": sys.version.split()[0],
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "commit": commit,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+    }
+
+
+def compare(current, baseline, tolerance):
+    """Per stage and scale: seconds now vs. in `baseline`, flagging regressions."""
+    before = {(r["stage"], r["scale"]): r for r in baseline["results"] if r.get("status") == "ok"}
+    rows = []
+    for r in current["results"]:
+        old = before.get((r["stage"], r["scale"]))
+        if r.get("status") != "ok" or old is None or not old["seconds"]:
+            continue
+        ratio = r["seconds"] / old["seconds"]
+        rows.append({
+            "stage": r["stage"],
+            "scale": r["scale"],
+            "baseline_seconds": old["seconds"],
+            "seconds": r["seconds"],
+            "ratio": round(ratio, 3),
+            "regression": ratio > 1 + tolerance,
+        })
+    return rows
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scales", type=int, nargs="+", default=[1000, 5000], help="numbers of drugs")
+    parser.add_argument("--requests", type=int, default=300, help="API requests per scale")
+    parser.add_argument("--cypher-queries", type=int, default=200)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-memory", action="store_true", help="do not trace memory (faster, no peak_mb)")
+    parser.add_argument("--output", help="write the run as JSON to this file")
+    parser.add_argument("--compare", help="JSON file of an earlier run to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="slowdown flagged as a regression")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+    # The pipeline logs per drug and per request
+    logging.disable(logging.INFO)
+
+    run = {"schema_version": SCHEMA_VERSION, "environment": environment(), "results": []}
+    with tempfile.TemporaryDirectory(prefix="bench-suite-") as workdir:
+        for drugs in args.scales:
+            run["results"] += run_scale(drugs, workdir, args.requests, args.cypher_queries, args.seed, not args.no_memory)
+    if args.compare:
+        with open(args.compare) as f:
+            run["comparison"] = compare(run, json.load(f), args.tolerance)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(run, f, indent=2)
+
+    if args.json:
+        print(json.dumps(run, indent=2))
+    else:
+        print(f"{'stage':<13} {'scale':>7} {'seconds':>9} {'items/s':>11} {'peak MB':>8}")
+        for r in run["results"]:
+            if r["status"] != "ok":
+                print(f"{r['stage']:<13} {r['scale']:>7}  {r['status']}: {r['reason']}")
+                continue
+            peak = r["peak_mb"] if r["peak_mb"] is not None else "-"
+            print(f"{r['stage']:<13} {r['scale']:>7} {r['seconds']:>9} {r['items_per_second']:>11} {peak:>8}")
+        for c in run.get("comparison", []):
+            flag = "  REGRESSION" if c["regression"] else ""
+            print(f"{c['stage']:<13} {c['scale']:>7} {c['baseline_seconds']:>9} -> {c['seconds']} (x{c['ratio']}){flag}")
@@ -0,0 +1,67 @@
+"""
+Time of all-pairs target-overlap scoring (top-k similar drugs per drug) and
+per-target candidate ranking, on synthetic drug-target graphs with
+DrugBank-like degree skew: a few promiscuous targets are hit by hundreds
+of drugs, most by a handful.
+
+Usage:
+    python -m benchmarks.bench_target_overlap --drugs 15000 50000
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.target_overlap import DrugOverlap
+
+
+def synthetic_edges(drugs, targets, mean_degree=3.0, seed=0):
+    rng = np.random.default_rng(seed)
+    degree = 1 + rng.poisson(mean_degree - 1, size=drugs)
+    popularity = 1.0 / np.arange(1, targets + 1) ** 0.9
+    popularity /= popularity.sum()
+    drug_ids = np.repeat(np.arange(drugs), degree)
+    target_ids = rng.choice(targets, size=len(drug_ids), p=popularity)
+    return list(zip(drug_ids.astype(str), target_ids.astype(str)))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--drugs", type=int, nargs="+", default=[15_000, 50_000])
+    parser.add_argument("--targets", type=int, default=5_000)
+    parser.add_argument("--k", type=int, default=20)
+    parser.add_argument("--block-size", type=int, default=4096)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    results = []
+    for n in args.drugs:
+        edges = synthetic_edges(n, args.targets)
+        start = time.perf_counter()
+        overlap = DrugOverlap.from_edges(edges, drug_key=None)
+        build = time.perf_counter() - start
+
+        start = time.perf_counter()
+        similar = overlap.similar_drugs(k=args.k, block_size=args.block_size)
+        pairs = time.perf_counter() - start
+
+        start = time.perf_counter()
+        candidates = overlap.feature_candidates(similar, k=args.k)
+        ranking = time.perf_counter() - start
+        results.append({
+            "drugs": n,
+            "edges": len(edges),
+            "build_s": round(build, 3),
+            "similar_drugs_s": round(pairs, 3),
+            "candidates_s": round(ranking, 3),
+            "pairs": len(similar),
+            "candidates": len(candidates),
+        })
+
+    if args.json:
+        print(json.dumps({"results": results}, indent=2))
+    else:
+        print(f"{'drugs':>8} {'edges':>8} {'build s':>8} {'pairs s':>8} {'cands s':>8}")
+        for r in results:
+            print(f"{r['drugs']:>8} {r['edges']:>8} {r['build_s']:>8} {r['similar_drugs_s']:>8} {r['candidates_s']:>8}")
@@ -0,0 +1,72 @@
+"""
+Rows per second of the spaCy text cleaning in scripts/preprocess.py: the
+per-row `clean_text` path against bulk `clean_texts` (nlp.pipe with unused
+components disabled) at several batch sizes and process counts. Requires
+the en_core_web_sm model.
+
+Usage:
+    python -m benchmarks.bench_text_cleaning --rows 5000 --n-process 1 4
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from scripts.preprocess import clean_text, clean_texts
+
+WORDS = (
+    "the drug inhibits binding of receptor protein kinase in patients with "
+    "chronic disease and reduced expression was observed after treatment "
+    "targets were identified by screening compounds against enzymes cells"
+).split()
+
+
+def synthetic_abstracts(rows, words_per_row=150, seed=0):
+    rng = np.random.default_rng(seed)
+    texts = []
+    for _ in range(rows):
+        words = rng.choice(WORDS, size=words_per_row)
+        sentences = [" ".join(words[i : i + 15]).capitalize() + "." for i in range(0, len(words), 15)]
+        texts.append(" ".join(sentences))
+    return texts
+
+
+def timed(func, texts):
+    start = time.perf_counter()
+    cleaned = func(texts)
+    return cleaned, time.perf_counter() - start
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=2000)
+    parser.add_argument("--batch-size", type=int, nargs="+", default=[100, 1000])
+    parser.add_argument("--n-process", type=int, nargs="+", default=[1, 2])
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    texts = synthetic_abstracts(args.rows)
+    reference, seconds = timed(lambda t: [clean_text(x) for x in t], texts)
+    results = [{"mode": "per-row", "rows_per_second": round(args.rows / seconds, 1),
+                "speedup": 1.0, "identical": True}]
+
+    for n_process in args.n_process:
+        for batch_size in args.batch_size:
+            cleaned, bulk_seconds = timed(
+                lambda t: list(clean_texts(t, batch_size=batch_size, n_process=n_process)), texts
+            )
+            results.append({
+                "mode": f"pipe batch={batch_size} n_process={n_process}",
+                "rows_per_second": round(args.rows / bulk_seconds, 1),
+                "speedup": round(seconds / bulk_seconds, 2),
+                "identical": cleaned == reference,
+            })
+
+    if args.json:
+        print(json.dumps({"rows": args.rows, "results": results}, indent=2))
+    else:
+        print(f"rows={args.rows}")
+        print(f"{'mode':<32} {'rows/s':>10} {'speedup':>8} {'identical':>10}")
+        for r in results:
+            print(f"{r['mode']:<32} {r['rows_per_second']:>10} {r['speedup']:>8} {str(r['identical']):>10}")
@@ -0,0 +1,70 @@
+"""
+Recall and latency of the local vector store's IVF index against brute
+force search, on synthetic clustered embeddings.
+
+Usage:
+    python -m benchmarks.bench_vector_index --rows 100000 --dim 384
+"""
+import argparse
+import json
+import time
+
+import numpy as np
+
+from src.local_vectorstore_agent import VectorDatabaseAgentLocal
+
+
+def synthetic_embeddings(rows, dim, clusters, seed=0):
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(clusters, dim)).astype(np.float32)
+    labels = rng.integers(clusters, size=rows)
+    vectors = centers[labels] + 0.3 * rng.normal(size=(rows, dim)).astype(np.float32)
+    queries = centers[rng.integers(clusters, size=200)] + 0.3 * rng.normal(size=(200, dim))
+    return vectors, queries.astype(np.float32)
+
+
+def timed_search(store, queries, k):
+    start = time.perf_counter()
+    hits = [[row for row, _ in store.search_vector(q, k)] for q in queries]
+    return hits, (time.perf_counter() - start) / len(queries)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__)
+    parser.add_argument("--rows", type=int, default=100_000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--clusters", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--nlist", type=int, default=None)
+    parser.add_argument("--nprobe", type=int, nargs="+", default=[1, 4, 8, 16, 32])
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    vectors, queries = synthetic_embeddings(args.rows, args.dim, args.clusters)
+    store = VectorDatabaseAgentLocal(connection_args={"autosave": False})
+    store.add_vectors(vectors, [""] * len(vectors))
+
+    exact, exact_latency = timed_search(store, queries, args.k)
+    results = [{"index": "exact", "recall": 1.0, "latency_ms": round(exact_latency * 1000, 3)}]
+
+    start = time.perf_counter()
+    store.build_index(nlist=args.nlist)
+    build_seconds = time.perf_counter() - start
+    for nprobe in args.nprobe:
+        store.nprobe = nprobe
+        approx, latency = timed_search(store, queries, args.k)
+        recall = np.mean([len(set(e) & set(a)) / args.k for e, a in zip(exact, approx)])
+        results.append({
+            "index": f"ivf nprobe={nprobe}",
+            "recall": round(float(recall), 4),
+            "latency_ms": round(latency * 1000, 3),
+        })
+
+    if args.json:
+        print(json.dumps({"rows": args.rows, "dim": args.dim, "build_seconds": build_seconds,
+                          "results": results}, indent=2))
+    else:
+        print(f"rows={args.rows} dim={args.dim} ivf build: {build_seconds:.1f}s")
+        print(f"{'index':<18} {'recall@' + str(args.k):>10} {'latency ms':>11}")
+        for r in results:
+            print(f"{r['index']:<18} {r['recall']:>10} {r['latency_ms']:>11}")
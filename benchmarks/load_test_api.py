@@ -0,0 +1,190 @@
+"""
+HTTP load test of the drug-target API: a configurable mix of /drugs,
+/targets and /relationships requests from concurrent clients, reporting
+throughput, latency percentiles and error rates per endpoint.
+
+By default the API is started with uvicorn in a subprocess, against the
+in-memory graph backend filled from a synthetic DrugBank file
+(GRAPH_BACKEND=memory), so no database is needed. Use --url to load an
+already running server instead; request ids come from the synthetic
+dataset, so that server should serve the same one (--drugs, --seed).
+
+Clients run closed-loop: each of the --concurrency clients sends its next
+request as soon as the previous one completes. A fraction of requests
+(--missing) ask for unknown ids; their 404s are expected and not counted
+as errors.
+
+Usage:
+    python -m benchmarks.load_test_api --drugs 5000 --concurrency 1 8 32
+    python -m benchmarks.load_test_api --mix drugs=1 --requests 5000 --json
+"""
+import argparse
+import asyncio
+import json
+import os
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+import numpy as np
+
+from benchmarks.synthetic import drugbank_xml
+
+DEFAULT_MIX = "drugs=0.4,targets=0.3,relationships=0.3"
+
+
+def parse_mix(text):
+    """'drugs=0.4,targets=0.3,...' -> {endpoint: probability}."""
+    weights = {}
+    for part in text.split(","):
+        name, _, weight = part.partition("=")
+        if name not in ("drugs", "targets", "relationships"):
+            raise ValueError("Invalid endpoint. Choose from 'drugs', 'targets' or 'relationships'.")
+        weights[name] = float(weight or 1)
+    total = sum(weights.values())
+    return {name: weight / total for name, weight in weights.items()}
+
+
+def request_plan(n, mix, drugs, targets, missing=0.0, seed=0):
+    """Seeded list of (endpoint, path, expected status) tuples."""
+    rng = np.random.default_rng(seed)
+    names = list(mix)
+    kinds = rng.choice(len(names), size=n, p=[mix[name] for name in names])
+    unknown = rng.random(n) < missing
+    plan = []
+    for kind, miss in zip(kinds, unknown):
+        name = names[kind]
+        ids = targets if name == "targets" else drugs
+        node_id = "UNKNOWN" if miss else ids[rng.integers(len(ids))]
+        path = f"/{name}/{node_id}"
+        plan.append((name, path, 404 if miss else 200))
+    return plan
+
+
+async def run_load(base_url, plan, concurrency, timeout=30.0):
+    """Send `plan` with `concurrency` closed-loop clients; returns per-request records."""
+    records = []
+    queue = iter(plan)
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, timeout=timeout, limits=limits) as client:
+
+        async def worker():
+            for name, path, expected in queue:
+                start = time.perf_counter()
+                try:
+                    status = (await client.get(path)).status_code
+                except httpx.HTTPError:
+                    status = None
+                records.append((name, time.perf_counter() - start, status, expected))
+
+        start = time.perf_counter()
+        await asyncio.gather(*(worker() for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+    return records, elapsed
+
+
+def summarize(records, elapsed):
+    def stats(rows):
+        latencies = np.array([latency for _, latency, _, _ in rows]) * 1000
+        errors = sum(1 for _, _, status, expected in rows if status != expected)
+        return {
+            "requests": len(rows),
+            "rps": round(len(rows) / elapsed, 1),
+            "p50_ms": round(float(np.percentile(latencies, 50)), 2),
+            "p95_ms": round(float(np.percentile(latencies, 95)), 2),
+            "p99_ms": round(float(np.percentile(latencies, 99)), 2),
+            "max_ms": round(float(latencies.max()), 2),
+            "errors": errors,
+            "error_rate": round(errors / len(rows), 4),
+        }
+
+    summary = stats(records)
+    summary["seconds"] = round(elapsed, 3)
+    summary["endpoints"] = {
+        name: stats([r for r in records if r[0] == name])
+        for name in sorted({r[0] for r in records})
+    }
+    return summary
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def start_server(xml_file, workers=1):
+    """Start the API with uvicorn on the in-memory backend; returns (process, url)."""
+    port = free_port()
+    env = dict(os.environ, GRAPH_BACKEND="memory", GRAPH_BACKEND_XML=xml_file)
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "src.api.endpoints:app", "--port", str(port),
+         "--workers", str(workers), "--log-level", "warning", "--no-access-log"],
+        env=env,
+        stdout=subprocess.DEVNULL,
+        stderr=subprocess.DEVNULL,
+    )
+    url = f"http://127.0.0.1:{port}"
+    deadline = time.time() + 60
+    while time.time() < deadline:
+        if process.poll() is not None:
+            raise RuntimeError("The API server exited during startup")
+        try:
+            httpx.get(f"{url}/openapi.json", timeout=1.0)
+            return process, url
+        except httpx.HTTPError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError("The API server did not start within 60 s")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", help="load an already running server instead of starting one")
+    parser.add_argument("--drugs", type=int, default=5000, help="size of the synthetic dataset")
+    parser.add_argument("--server-workers", type=int, default=1, help="uvicorn worker processes")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 8, 32])
+    parser.add_argument("--requests", type=int, default=2000, help="requests per concurrency level")
+    parser.add_argument("--warmup", type=int, default=100)
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="relative request weights per endpoint")
+    parser.add_argument("--missing", type=float, default=0.05, help="fraction of requests for unknown ids")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args()
+
+    mix = parse_mix(args.mix)
+    drug_ids = [f"DB{d:05d}" for d in range(args.drugs)]
+    process = None
+    with tempfile.TemporaryDirectory(prefix="load-test-") as workdir:
+        xml_file = os.path.join(workdir, "drugbank.xml")
+        dataset = drugbank_xml(xml_file, drugs=args.drugs, seed=args.seed)
+        target_ids = dataset["target_ids"]
+        url = args.url
+        if url is None:
+            process, url = start_server(xml_file, args.server_workers)
+        try:
+            # Also loads the in-memory graph on the first request
+            asyncio.run(run_load(url, request_plan(args.warmup, mix, drug_ids[:1], target_ids[:1]), 1))
+            results = []
+            for concurrency in args.concurrency:
+                plan = request_plan(args.requests, mix, drug_ids, target_ids, args.missing, args.seed + concurrency)
+                records, elapsed = asyncio.run(run_load(url, plan, concurrency))
+                results.append(dict(concurrency=concurrency, **summarize(records, elapsed)))
+        finally:
+            if process is not None:
+                process.terminate()
+                process.wait()
+
+    report = {"url": args.url or "in-memory backend", "drugs": args.drugs, "mix": mix, "results": results}
+    if args.json:
+        print(json.dumps(report, indent=2))
+    else:
+        print(f"{'clients':>7} {'endpoint':<14} {'rps':>8} {'p50 ms':>7} {'p95 ms':>7} {'p99 ms':>7} {'errors':>7}")
+        for r in results:
+            rows = [("all", r)] + list(r["endpoints"].items())
+            for name, s in rows:
+                print(f"{r['concurrency']:>7} {name:<14} {s['rps']:>8} {s['p50_ms']:>7} {s['p95_ms']:>7} "
+                      f"{s['p99_ms']:>7} {s['error_rate']:>7.2%}")
@@ -0,0 +1,171 @@
+"""
+Synthetic inputs for the benchmarks: a seeded DrugBank-like XML generator,
+an in-memory stand-in for the py2neo graph database and a stub chat model.
+"""
+import itertools
+import time
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+# Any concatenation of these is a valid SMILES
+SMILES_PARTS = ["C", "CC", "O", "N", "C(=O)", "C(C)", "c1ccccc1", "C(=O)O"]
+
+
+def drugbank_xml(path, drugs=1000, targets=None, enzymes=None, pathways=None,
+                 targets_per_drug=3, interactions_per_drug=5, seed=0):
+    """
+    Write a DrugBank-like XML file readable by `parse_drugbank`. Target
+    popularity is skewed (a few targets are hit by many drugs), like in
+    DrugBank. Defaults scale the vocabularies with the number of drugs.
+
+    Returns:
+        Dictionary with the numbers of drugs, targets, enzymes, pathways,
+        relationships, the file size in bytes and the ids of the targets
+        hit by at least one drug ("target_ids").
+    """
+    rng = np.random.default_rng(seed)
+    targets = targets or max(1, drugs // 3)
+    enzymes = enzymes or max(1, drugs // 30)
+    pathways = pathways or max(1, drugs // 20)
+    popularity = 1.0 / np.arange(1, targets + 1) ** 0.9
+    popularity /= popularity.sum()
+
+    relationships = 0
+    used_targets = set()
+    with open(path, "w", encoding="utf-8") as f:
+        f.write('<?xml version="1.0" encoding="UTF-8"?>\n<drugbank>\n')
+        for d in range(drugs):
+            drug_type = "biotech" if rng.random() < 0.15 else "small molecule"
+            smiles = "".join(rng.choice(SMILES_PARTS, size=rng.integers(2, 12)))
+            parts = [
+                f'<drug type="{drug_type}">',
+                f"<drugbank-id>DB{d:05d}</drugbank-id>",
+                f"<name>{escape(f'Drug {d}')}</name>",
+                "<calculated-properties><property><kind>SMILES</kind>"
+                f"<value>{escape(smiles)}</value></property></calculated-properties>",
+                "<targets>",
+            ]
+            hit = np.unique(rng.choice(targets, size=1 + rng.poisson(targets_per_drug - 1), p=popularity))
+            parts += [f"<target><id>BE{t:07d}</id><name>Target {t}</name></target>" for t in hit]
+            used_targets.update(hit.tolist())
+            parts.append("</targets><enzymes>")
+            metabolized = np.unique(rng.integers(enzymes, size=rng.poisson(1)))
+            parts += [f"<enzyme><id>BE9{e:06d}</id><name>Enzyme {e}</name></enzyme>" for e in metabolized]
+            parts.append("</enzymes><pathways>")
+            involved = np.unique(rng.integers(pathways, size=rng.poisson(0.5)))
+            parts += [f"<pathway><smpdb-id>SMP{p:07d}</smpdb-id><name>Pathway {p}</name></pathway>" for p in involved]
+            parts.append("</pathways><drug-interactions>")
+            partners = np.setdiff1d(np.unique(rng.integers(drugs, size=rng.poisson(interactions_per_drug))), [d])
+            parts += [
+                f"<drug-interaction><drugbank-id>DB{i:05d}</drugbank-id><name>Drug {i}</name></drug-interaction>"
+                for i in partners
+            ]
+            parts.append("</drug-interactions></drug>\n")
+            relationships += len(hit) + len(metabolized) + len(involved) + len(partners)
+            f.write("".join(parts))
+        f.write("</drugbank>\n")
+        size = f.tell()
+    return {
+        "drugs": drugs,
+        "targets": targets,
+        "enzymes": enzymes,
+        "pathways": pathways,
+        "relationships": relationships,
+        "bytes": size,
+        "target_ids": [f"BE{t:07d}" for t in sorted(used_targets)],
+    }
+
+
+class NodeMatch:
+    def __init__(self, nodes):
+        self._nodes = nodes
+
+    def first(self):
+        return self._nodes[0] if self._nodes else None
+
+    def all(self):
+        return list(self._nodes)
+
+    def __iter__(self):
+        return iter(self._nodes)
+
+
+class NodeIndex:
+    def __init__(self):
+        self.by_id = {}
+
+    def match(self, *labels, **properties):
+        """Nodes with all `labels` and `properties`; lookups by id are O(1)."""
+        if "id" in properties:
+            candidates = self.by_id.get(properties["id"], [])
+        else:
+            candidates = list(itertools.chain.from_iterable(self.by_id.values()))
+        found = [
+            node for node in candidates
+            if all(node.has_label(label) for label in labels)
+            and all(node.get(key) == value for key, value in properties.items())
+        ]
+        return NodeMatch(found)
+
+
+class InMemoryGraph:
+    """
+    Stand-in for `py2neo.Graph` with the calls the project makes (`merge`,
+    `nodes.match`, `match`, `run`), backed by dictionaries, so graph loading
+    and the API handlers can be timed without a database server. Cypher
+    sent to `run` is recorded, not executed.
+    """
+
+    def __init__(self):
+        self.nodes = NodeIndex()
+        self.relationships = {}
+        self._outgoing = {}
+        self.queries = []
+
+    def merge(self, subgraph, primary_label=None, primary_key=None):
+        if hasattr(subgraph, "start_node"):
+            start, end = subgraph.start_node, subgraph.end_node
+            key = (start["id"], type(subgraph).__name__, end["id"])
+            if key not in self.relationships:
+                self.relationships[key] = subgraph
+                self._outgoing.setdefault(start["id"], []).append(subgraph)
+            return
+        nodes = self.nodes.by_id.setdefault(subgraph[primary_key or "id"], [])
+        if not any(node.has_label(primary_label) for node in nodes):
+            nodes.append(subgraph)
+
+    def match(self, nodes=None, r_type=None):
+        start = nodes[0] if nodes else None
+        if start is not None:
+            relationships = self._outgoing.get(start["id"], [])
+        else:
+            relationships = self.relationships.values()
+        return [rel for rel in relationships if r_type is None or type(rel).__name__ == r_type]
+
+    def run(self, query, parameters=None, **kwparameters):
+        self.queries.append((query, dict(parameters or {}, **kwparameters)))
+        return []
+
+
+class StubChat:
+    """
+    Chat model stand-in for `CypherPrompt`: answers queries from a fixed
+    list of responses (cycling) after an optional simulated latency.
+    """
+
+    def __init__(self, responses, latency=0.0):
+        self.responses = itertools.cycle(responses)
+        self.latency = latency
+        self.messages = []
+
+    def append_system_message(self, message):
+        self.messages.append({"role": "system", "content": message})
+
+    def query(self, text):
+        self.messages.append({"role": "user", "content": text})
+        if self.latency:
+            time.sleep(self.latency)
+        msg = next(self.responses)
+        self.messages.append({"role": "assistant", "content": msg})
+        return msg, None, None
@@ -1,36 +1,73 @@
 import openai
-import time
+
+from model.llm_cache import ResponseCache
+from model.llm_executor import LLMExecutor, OpenAIChatTransport, RetryableError
 
 openai.api_key = " "
 
-def chat_with_gpt(prompt):
-"""
-To create chatconversation with LLM Model(gpt-3.5-turbo) with ChatCompletion method. 
-Add pip install openai==0.28.0 in the requirements.txt. Reason: The new openai version does not this method
-Limited attempts allowed
+# Shared by every call in the process so that concurrency, rate limits and
+# in-flight deduplication apply across callers. Calls with temperature=0 are
+# answered from the on-disk response cache when they were seen before.
+executor = LLMExecutor(
+    transport=OpenAIChatTransport(),
+    model_name="gpt-3.5-turbo",
+    cache=ResponseCache(),
+)
+
+
+def chat_with_gpt(prompt, **params):
+    """
+    To create chatconversation with LLM Model(gpt-3.5-turbo) with ChatCompletion method.
+    Add pip install openai==0.28.0 in the requirements.txt. Reason: The new openai version does not this method
+    Limited attempts allowed
 
-Try except for error handling. The code works when directly called only
+    Requests go through the shared LLMExecutor, which retries rate-limit and
+    availability errors with exponential backoff (honoring Retry-After)
+    instead of discarding the request. Pass temperature=0 to make the call
+    deterministic and cacheable.
 
-Return: conversation with LLM Model
-"""
+    Return: conversation with LLM Model, or None if all retries failed
+    """
 
     try:
-        response = openai.ChatCompletion.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}]
-        )
-        return response['choices'][0]['message']['content'].strip()
-    except openai.error.RateLimitError:
+        return executor.complete_sync(prompt, **params)
+    except RetryableError:
         print("Rate limit exceeded. Please wait before making more requests.")
-        time.sleep(60)  # Wait for 60 seconds before retrying
         return None
 
+
+def chat_with_gpt_batch(prompts, **params):
+    """
+    Sends many prompts concurrently through the shared executor.
+
+    Return: list of responses in the order of `prompts`; failed prompts hold
+    the exception that ended them
+    """
+    return executor.run_batch(prompts, return_exceptions=True, **params)
+
+
+def stream_chat_with_gpt(prompt, **params):
+    """
+    Streams the response of the LLM Model token by token as it is generated.
+
+    Return: generator of response tokens
+    """
+    return executor.stream_sync(prompt, **params)
+
+
 if __name__ == "__main__":
     while True:
         user_input = input("You: ")
         if user_input.lower() in ["quit", "exit", "bye"]:
             break
 
-        response = chat_with_gpt(user_input)
-        if response:
-            print("Chatbot: ", response)
+        print("Chatbot: ", end="", flush=True)
+        try:
+            for token in stream_chat_with_gpt(user_input):
+                print(token, end="", flush=True)
+        except RetryableError:
+            print("Rate limit exceeded. Please wait before making more requests.", end="")
+        except KeyboardInterrupt:
+            # Ctrl-C stops the current answer, not the chat
+            pass
+        print()
@@ -0,0 +1,275 @@
+import json
+from collections import deque
+from typing import Callable, List, Optional
+
+from .token_counter import TokenCounter
+
+SUMMARY_PREFIX = "Summary of the earlier conversation: "
+
+
+def truncating_summarizer(
+    previous_summary: str, messages: List[dict], max_tokens: int
+) -> str:
+    """
+    Default summarizer that needs no model: appends the evicted turns to the
+    previous summary and keeps the most recent words. The memory trims the
+    result to `max_tokens`, so the word cut here is only a first estimate.
+
+    Args:
+        previous_summary: Summary produced by the last compaction, or "".
+
+        messages: Messages evicted from the verbatim window, oldest first.
+
+        max_tokens: Token budget for the returned summary.
+
+    Returns:
+        New rolling summary.
+    """
+    parts = [previous_summary] if previous_summary else []
+    parts += [f"{m.get('role', '')}: {m.get('content', '')}" for m in messages]
+    words = " ".join(parts).split()
+    return " ".join(words[-max_tokens:])
+
+
+class ConversationMemory:
+    def __init__(
+        self,
+        token_counter: TokenCounter,
+        token_budget: Optional[int] = None,
+        keep_recent: int = 4,
+        summarizer: Optional[Callable[[str, List[dict], int], str]] = None,
+        summary_token_budget: Optional[int] = None,
+    ) -> None:
+        """
+        Message store with a token budget. Pinned messages (system and
+        correcting-agent prompts) are always kept; the most recent turns are
+        kept verbatim and older turns are folded into one rolling summary
+        message once the budget is exceeded. Each message is serialized once
+        when it is added, so producing the JSON state does not re-encode the
+        whole conversation.
+
+        Args:
+            token_counter: Counter used to measure message contents.
+
+            token_budget: Maximum number of tokens across all messages,
+                including the rolling summary. It can only be exceeded when
+                the pinned messages and the `keep_recent` turns alone do not
+                fit. None disables compaction.
+
+            keep_recent: Number of most recent turns that are never
+                summarized.
+
+            summarizer: Callable `(previous_summary, evicted_messages,
+                max_tokens) -> str`. Defaults to `truncating_summarizer`.
+
+            summary_token_budget: Token budget of the rolling summary.
+                Defaults to a quarter of `token_budget`.
+        """
+        self.token_counter = token_counter
+        self.token_budget = token_budget
+        self.keep_recent = keep_recent
+        self.summarizer = summarizer or truncating_summarizer
+        if summary_token_budget is None and token_budget is not None:
+            summary_token_budget = max(token_budget // 4, 1)
+        self.summary_token_budget = summary_token_budget
+
+        self._pinned = []
+        self._turns = deque()
+        self._summary = None
+        self._summary_text = ""
+        self.total_tokens = 0
+        self.compactions = 0
+
+    def _entry(self, message: dict) -> tuple:
+        n = self.token_counter.count(message.get("content", ""))
+        return message, json.dumps(message), n
+
+    def append(self, message: dict, pinned: bool = False) -> None:
+        """
+        Adds a message and compacts the conversation if it is over budget.
+
+        Args:
+            message: Message dictionary with "role" and "content" keys.
+
+            pinned: Whether the message is exempt from summarization.
+        """
+        entry = self._entry(message)
+        self.total_tokens += entry[2]
+        if pinned:
+            self._pinned.append(entry)
+        else:
+            self._turns.append(entry)
+            self._compact()
+
+    def _compact(self) -> None:
+        if self.token_budget is None or self.total_tokens <= self.token_budget:
+            return
+
+        # Tokens of everything but the summary, and room to leave for it
+        rest = self.total_tokens - (self._summary[2] if self._summary else 0)
+        prefix_tokens = self.token_counter.count(SUMMARY_PREFIX)
+        reserve = prefix_tokens + self.summary_token_budget
+
+        evicted = []
+        while (
+            rest + reserve > self.token_budget
+            and len(self._turns) > self.keep_recent
+        ):
+            message, _, n = self._turns.popleft()
+            rest -= n
+            evicted.append(message)
+
+        if not evicted:
+            return
+
+        # Less room than reserved if the recent turns could not be evicted;
+        # with no room at all the budget cannot be met and the summary keeps
+        # its own budget
+        available = self.token_budget - rest
+        limit = min(reserve, available) if available > 0 else reserve
+        max_tokens = limit - prefix_tokens
+        if max_tokens <= 0:
+            # No room for a summary message: keep folding evicted turns into
+            # the summary text, but leave it out of the messages for now
+            summary = self.summarizer(
+                self._summary_text, evicted, self.summary_token_budget
+            )
+            self._summary_text = self._fit(summary, self.summary_token_budget)
+            self._summary = None
+            self.total_tokens = rest
+            self.compactions += 1
+            return
+
+        summary = self.summarizer(self._summary_text, evicted, max_tokens)
+        self._summary_text = self._fit(summary, max_tokens)
+        self._summary = self._entry(
+            {"role": "system", "content": SUMMARY_PREFIX + self._summary_text}
+        )
+        # Tokenizers do not always count a concatenation as the sum of its parts
+        while self._summary_text and self._summary[2] > limit:
+            max_tokens = max(max_tokens - (self._summary[2] - limit), 0)
+            self._summary_text = self._fit(self._summary_text, max_tokens)
+            self._summary = self._entry(
+                {"role": "system", "content": SUMMARY_PREFIX + self._summary_text}
+            )
+        self.total_tokens = rest + self._summary[2]
+        self.compactions += 1
+
+    def _fit(self, text: str, max_tokens: int) -> str:
+        """Drops leading words until `text` fits into `max_tokens`."""
+        words = text.split()
+        n = self.token_counter.count(text)
+        while words and n > max_tokens:
+            keep = max(int(len(words) * max_tokens / n), 0)
+            words = words[-keep:] if keep and keep < len(words) else words[1:]
+            text = " ".join(words)
+            n = self.token_counter.count(text)
+        return text
+
+    def _entries(self) -> list:
+        entries = list(self._pinned)
+        if self._summary is not None:
+            entries.append(self._summary)
+        entries.extend(self._turns)
+        return entries
+
+    @property
+    def messages(self) -> List[dict]:
+        """Pinned messages, then the rolling summary, then recent turns."""
+        return [entry[0] for entry in self._entries()]
+
+    @property
+    def summary(self) -> str:
+        return self._summary_text
+
+    def serialized(self) -> List[str]:
+        """Returns the cached JSON fragment of every message, in order."""
+        return [entry[1] for entry in self._entries()]
+
+    def to_json(self) -> str:
+        return "[" + ", ".join(self.serialized()) + "]"
+
+    def clear(self) -> None:
+        self._pinned.clear()
+        self._turns.clear()
+        self._summary = None
+        self._summary_text = ""
+        self.total_tokens = 0
+        self.compactions = 0
+
+    def __len__(self) -> int:
+        return len(self._pinned) + len(self._turns) + (self._summary is not None)
+
+    def __iter__(self):
+        return iter(self.messages)
+
+
+class ChatMemory:
+    """
+    Message stores of a chat model: the primary conversation (system
+    prompts pinned, turns bounded by the token budget), the
+    correcting-agent prompts and the UI history. Only the primary
+    conversation records the turns, so each reply is sent once.
+    """
+
+    def init_memory(
+        self,
+        token_counter: TokenCounter,
+        token_budget: Optional[int] = None,
+        keep_recent_turns: int = 4,
+        summarizer: Optional[Callable[[str, List[dict], int], str]] = None,
+    ) -> None:
+        self.token_counter = token_counter
+        self.memory = ConversationMemory(
+            token_counter,
+            token_budget=token_budget,
+            keep_recent=keep_recent_turns,
+            summarizer=summarizer,
+        )
+        self.ca_memory = ConversationMemory(token_counter)
+        self.history_memory = ConversationMemory(
+            token_counter,
+            token_budget=token_budget,
+            keep_recent=keep_recent_turns,
+            summarizer=summarizer,
+        )
+
+    @property
+    def messages(self) -> list:
+        return self.memory.messages
+
+    @property
+    def ca_messages(self) -> list:
+        return self.ca_memory.messages
+
+    @property
+    def history(self) -> list:
+        return self.history_memory.messages
+
+    def append_system_message(self, message: str) -> None:
+        self.memory.append({"role": "system", "content": message}, pinned=True)
+
+    def append_ca_message(self, message: str) -> None:
+        self.ca_memory.append({"role": "ca", "content": message}, pinned=True)
+
+    def append_user_message(self, message: str) -> None:
+        self.memory.append({"role": "user", "content": message})
+
+    def append_ai_message(self, message: str) -> None:
+        self.memory.append({"role": "assistant", "content": message})
+
+    def reset(self):
+        self.memory.clear()
+        self.ca_memory.clear()
+        self.history_memory.clear()
+
+    def get_msg_json(self) -> str:
+        fragments = (
+            self.memory.serialized()
+            + self.ca_memory.serialized()
+            + self.history_memory.serialized()
+        )
+        return "[" + ", ".join(fragments) + "]"
+
+    def get_messages_token_size(self) -> int:
+        return self.memory.total_tokens
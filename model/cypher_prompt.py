@@ -3,7 +3,6 @@ import os
 import json
 import yaml
 from ._miscellaneous import verify_iterable, sentencecase_to_pascalcase
-from .llms_connection import ChatInterface, GptChat
 
 
 class CypherPrompt:
@@ -96,6 +95,7 @@ class CypherPrompt:
         self.selected_entities = []
         self.selected_relationships = []
         self.selected_relationship_labels = {}
+        self.selected_properties = []
         self.rel_directions = {}
         self.model_name = model_name
 
@@ -191,7 +191,10 @@ class CypherPrompt:
         Returns:
             chat object.
         """
-        conversation = GptChat(
+        # The default chat needs the full LLM stack; injected chats do not
+        from .llms_connection import GptChat
+
+        chat = GptChat(
             model_name=model_name or self.model_name,
             prompts={},
             correct=False,
@@ -202,7 +205,7 @@ class CypherPrompt:
         return chat
 
     def _select_entities(
-        self, question: str, conversation: "Conversation"
+        self, question: str, chat: "ChatInterface"
     ) -> bool:
         """
         Selects relevant entities based on user's question.
@@ -210,7 +213,7 @@ class CypherPrompt:
         Args:
             question: User's question.
 
-            conversation: Conversation object.
+            chat: chat object.
 
         Returns:
             True if at least one entity was selected, False otherwise.
@@ -240,7 +243,7 @@ class CypherPrompt:
 
         return bool(result)
 
-    def _select_relationships(self, conversation: "ChatInterface") -> bool:
+    def _select_relationships(self, chat: "ChatInterface") -> bool:
         """
         Selects relevant relationships based on selected entities.
 
@@ -265,8 +268,8 @@ class CypherPrompt:
         source_and_target_present = False
         for key, value in self.relationships.items():
             if "source" in value and "target" in value:
-                source = ensure_iterable(value["source"])
-                target = ensure_iterable(value["target"])
+                source = verify_iterable(value["source"])
+                target = verify_iterable(value["target"])
                 pairs = []
                 for s in source:
                     for t in target:
@@ -319,7 +322,7 @@ class CypherPrompt:
             "entity names, relationships, or properties."
         )
 
-        msg, token_usage, correction = conversation.query(self.question)
+        msg, token_usage, correction = chat.query(self.question)
 
         result = msg.split(",") if msg else []
 
@@ -331,14 +334,28 @@ class CypherPrompt:
 
         return bool(result)
 
+    def _select_properties(self, chat: "ChatInterface") -> bool:
+        """
+        Selects relevant properties of the selected entities and
+        relationships. There is no property selection step yet, so no
+        properties are selected.
+
+        Args:
+            chat: chat object.
+
+        Returns:
+            True.
+        """
+        return True
+
     def _generate_query(
         self,
         question: str,
         entities: list,
         relationships: dict,
         properties: list,
+        chat: "ChatInterface",
         query_language: Optional[str] = "Cypher",
-        conversation: "Conversation",
     ) -> str:
         """
         Generates a database query based on selected entities, relationships, and properties.
@@ -352,9 +369,9 @@ class CypherPrompt:
 
             properties: Selected properties.
 
-            query_language: Query language (default is Cypher).
+            chat: chat object.
 
-            conversation: Conversation object.
+            query_language: Query language (default is Cypher).
 
         Returns:
             Generated database query.
@@ -0,0 +1,201 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+from typing import Any, Callable, List, Optional, Union
+
+# Request parameters that do not change the generated text
+_IGNORED_PARAMS = {"stream", "user", "timeout", "request_timeout", "api_key"}
+
+
+def normalize_messages(messages: Union[str, List[dict]]) -> List[dict]:
+    """
+    Brings a prompt into a canonical message list: plain strings become a
+    single user message, only role and content are kept, line endings are
+    unified and surrounding whitespace is stripped.
+    """
+    if isinstance(messages, str):
+        messages = [{"role": "user", "content": messages}]
+    return [
+        {
+            "role": m.get("role", "user"),
+            "content": str(m.get("content", ""))
+            .replace("\r\n", "\n")
+            .strip(),
+        }
+        for m in messages
+    ]
+
+
+def is_deterministic(params: dict) -> bool:
+    """
+    Returns True if a call with these parameters always produces the same
+    output: `do_sample=False` for Hugging Face generation, otherwise
+    `temperature=0`.
+    """
+    if "do_sample" in params:
+        return not params["do_sample"]
+    return params.get("temperature", 1) == 0
+
+
+class ResponseCache:
+    def __init__(
+        self,
+        cache_dir: str = ".llm_cache",
+        max_size_bytes: int = 512 * 1024 * 1024,
+        cache_sampled: bool = False,
+    ) -> None:
+        """
+        Content-addressed on-disk cache for LLM responses. Entries are keyed
+        by a hash of the model name, the generation parameters and the
+        normalized messages, stored one file per entry, and evicted least
+        recently used first once the cache grows beyond `max_size_bytes`.
+
+        Args:
+            cache_dir: Directory for the cache entries.
+
+            max_size_bytes: Size bound of all entries together.
+
+            cache_sampled: Also cache calls that sample (temperature > 0 or
+                `do_sample=True`). Off by default, since such calls are
+                expected to vary.
+        """
+        self.cache_dir = cache_dir
+        self.max_size_bytes = max_size_bytes
+        self.cache_sampled = cache_sampled
+        self.hits = 0
+        self.misses = 0
+        self.skipped = 0
+        self._lock = threading.Lock()
+        os.makedirs(cache_dir, exist_ok=True)
+        self._size = sum(os.path.getsize(p) for p, _ in self._entries())
+
+    def make_key(
+        self, model: str, messages: Union[str, List[dict]], params: dict
+    ) -> str:
+        params = {
+            k: v
+            for k, v in params.items()
+            if k not in _IGNORED_PARAMS and v is not None
+        }
+        blob = json.dumps(
+            {
+                "model": model,
+                "params": params,
+                "messages": normalize_messages(messages),
+            },
+            sort_keys=True,
+            default=str,
+        )
+        return hashlib.sha256(blob.encode()).hexdigest()
+
+    def should_cache(self, params: dict) -> bool:
+        return self.cache_sampled or is_deterministic(params)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.cache_dir, key[:2], key + ".json")
+
+    def _entries(self) -> list:
+        entries = []
+        for root, _, files in os.walk(self.cache_dir):
+            for name in files:
+                if name.endswith(".json"):
+                    path = os.path.join(root, name)
+                    entries.append((path, os.stat(path).st_mtime))
+        return entries
+
+    def get(self, key: str) -> Optional[Any]:
+        path = self._path(key)
+        try:
+            with open(path) as f:
+                value = json.load(f)["response"]
+        except (OSError, ValueError, KeyError):
+            with self._lock:
+                self.misses += 1
+            return None
+        # The modification time doubles as the last-access time for eviction
+        os.utime(path)
+        with self._lock:
+            self.hits += 1
+        return value
+
+    def put(self, key: str, value: Any) -> None:
+        path = self._path(key)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        data = json.dumps({"response": value}).encode()
+        fd, tmp = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        with os.fdopen(fd, "wb") as f:
+            f.write(data)
+        old = os.path.getsize(path) if os.path.exists(path) else 0
+        os.replace(tmp, path)
+        with self._lock:
+            self._size += len(data) - old
+            if self._size > self.max_size_bytes:
+                self._evict()
+
+    def _evict(self) -> None:
+        # Drop entries, oldest access first, down to 90% of the bound so that
+        # eviction does not run on every write.
+        target = int(self.max_size_bytes * 0.9)
+        for path, _ in sorted(self._entries(), key=lambda e: e[1]):
+            if self._size <= target:
+                break
+            try:
+                size = os.path.getsize(path)
+                os.remove(path)
+            except OSError:
+                continue
+            self._size -= size
+
+    def get_or_compute(
+        self,
+        model: str,
+        messages: Union[str, List[dict]],
+        params: dict,
+        compute: Callable[[], Any],
+    ) -> Any:
+        """
+        Returns the cached response for this call, or runs `compute` and
+        caches its result. Sampled calls bypass the cache unless
+        `cache_sampled` is set.
+
+        Args:
+            model: Model name or path.
+
+            messages: Prompt string or list of chat messages.
+
+            params: Generation parameters.
+
+            compute: Callable producing the response on a miss.
+
+        Returns:
+            The (possibly cached) response.
+        """
+        if not self.should_cache(params):
+            with self._lock:
+                self.skipped += 1
+            return compute()
+        key = self.make_key(model, messages, params)
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            if value is not None:
+                self.put(key, value)
+        return value
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "skipped": self.skipped,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "size_bytes": self._size,
+        }
+
+    def clear(self) -> None:
+        with self._lock:
+            for path, _ in self._entries():
+                os.remove(path)
+            self._size = 0
@@ -0,0 +1,593 @@
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from typing import (
+    Any,
+    AsyncIterator,
+    Callable,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Union,
+)
+
+Messages = Union[str, List[dict]]
+
+
+class RetryableError(Exception):
+    def __init__(self, message: str, retry_after: Optional[float] = None):
+        """
+        Error raised by a transport for failures that are worth retrying
+        (rate limits, overloaded or unavailable servers).
+
+        Args:
+            message: Error message.
+
+            retry_after: Seconds the server asked us to wait, if it said so.
+        """
+        super().__init__(message)
+        self.retry_after = retry_after
+
+
+def _parse_retry_after(value: Optional[str]) -> Optional[float]:
+    if value is None:
+        return None
+    try:
+        return max(float(value), 0.0)
+    except ValueError:
+        return None
+
+
+class RateLimiter:
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        Token-bucket limiter for one model. Both buckets start full and refill
+        continuously; None disables the corresponding limit.
+
+        Args:
+            requests_per_minute: Maximum request rate.
+
+            tokens_per_minute: Maximum token rate (prompt plus completion).
+
+            clock: Monotonic clock, replaceable in tests.
+        """
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.clock = clock
+        self._requests = requests_per_minute or 0.0
+        self._tokens = tokens_per_minute or 0.0
+        self._updated = clock()
+        self._lock = None
+
+    def _refill(self) -> None:
+        now = self.clock()
+        elapsed = now - self._updated
+        self._updated = now
+        if self.requests_per_minute:
+            self._requests = min(
+                self.requests_per_minute,
+                self._requests + elapsed * self.requests_per_minute / 60.0,
+            )
+        if self.tokens_per_minute:
+            self._tokens = min(
+                self.tokens_per_minute,
+                self._tokens + elapsed * self.tokens_per_minute / 60.0,
+            )
+
+    def _wait_time(self, tokens: float) -> float:
+        wait = 0.0
+        if self.requests_per_minute and self._requests < 1:
+            wait = (1 - self._requests) * 60.0 / self.requests_per_minute
+        if self.tokens_per_minute and self._tokens < tokens:
+            wait = max(
+                wait, (tokens - self._tokens) * 60.0 / self.tokens_per_minute
+            )
+        return wait
+
+    async def acquire(self, tokens: int = 0) -> None:
+        """
+        Waits until one request and `tokens` tokens are available and takes
+        them. Waiters are served in arrival order.
+
+        Args:
+            tokens: Estimated number of tokens the request will use.
+        """
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        if self.tokens_per_minute:
+            tokens = min(tokens, self.tokens_per_minute)
+        async with self._lock:
+            while True:
+                self._refill()
+                wait = self._wait_time(tokens)
+                if wait <= 0:
+                    break
+                await asyncio.sleep(wait)
+            if self.requests_per_minute:
+                self._requests -= 1
+            if self.tokens_per_minute:
+                self._tokens -= tokens
+
+
+class HTTPChatTransport:
+    def __init__(
+        self,
+        base_url: str = "https://api.openai.com/v1",
+        api_key: Optional[str] = None,
+        timeout: float = 60.0,
+        max_workers: int = 16,
+    ) -> None:
+        """
+        Sends chat completion requests to an OpenAI-compatible HTTP endpoint
+        (`{base_url}/chat/completions`). Works against the OpenAI API, local
+        inference servers and fake servers in tests.
+
+        Args:
+            base_url: Base URL of the API.
+
+            api_key: Bearer token; omitted from the request if None.
+
+            timeout: Request timeout in seconds.
+
+            max_workers: Number of threads used for blocking HTTP calls.
+        """
+        self.url = base_url.rstrip("/") + "/chat/completions"
+        self.api_key = api_key
+        self.timeout = timeout
+        self._pool = ThreadPoolExecutor(max_workers=max_workers)
+
+    def _open(self, payload: dict):
+        headers = {"Content-Type": "application/json"}
+        if self.api_key:
+            headers["Authorization"] = f"Bearer {self.api_key}"
+        request = urllib.request.Request(
+            self.url, data=json.dumps(payload).encode(), headers=headers
+        )
+        try:
+            return urllib.request.urlopen(request, timeout=self.timeout)
+        except urllib.error.HTTPError as e:
+            if e.code == 429 or e.code >= 500:
+                raise RetryableError(
+                    f"HTTP {e.code} from {self.url}",
+                    retry_after=_parse_retry_after(e.headers.get("Retry-After")),
+                ) from e
+            raise
+        except urllib.error.URLError as e:
+            raise RetryableError(f"Connection to {self.url} failed: {e}") from e
+
+    def _post(self, payload: dict) -> dict:
+        with self._open(payload) as resp:
+            return json.loads(resp.read())
+
+    def _read_stream(self, payload, emit, stopped) -> None:
+        try:
+            with self._open(dict(payload, stream=True)) as resp:
+                for line in resp:
+                    if stopped.is_set():
+                        break
+                    line = line.decode().strip()
+                    if not line.startswith("data:"):
+                        continue
+                    data = line[len("data:"):].strip()
+                    if data == "[DONE]":
+                        break
+                    delta = json.loads(data)["choices"][0].get("delta", {})
+                    if delta.get("content"):
+                        emit((delta["content"], None))
+        except Exception as e:
+            emit((None, e))
+        finally:
+            emit((None, StopAsyncIteration()))
+
+    async def __call__(self, payload: dict) -> str:
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(self._pool, self._post, payload)
+        return response["choices"][0]["message"]["content"].strip()
+
+    async def stream(self, payload: dict) -> AsyncIterator[str]:
+        """
+        Yields content deltas of a server-sent-event stream as they arrive.
+        Closing the generator stops reading and releases the connection.
+        """
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        stopped = threading.Event()
+
+        def emit(item):
+            try:
+                loop.call_soon_threadsafe(queue.put_nowait, item)
+            except RuntimeError:
+                # The consuming loop is gone; nobody is listening any more.
+                stopped.set()
+
+        loop.run_in_executor(self._pool, self._read_stream, payload, emit, stopped)
+        try:
+            while True:
+                token, error = await queue.get()
+                if isinstance(error, StopAsyncIteration):
+                    return
+                if error is not None:
+                    raise error
+                yield token
+        finally:
+            stopped.set()
+
+    def close(self) -> None:
+        self._pool.shutdown(wait=False)
+
+
+class OpenAIChatTransport:
+    def __init__(self, api_key: Optional[str] = None) -> None:
+        """
+        Sends requests with `openai.ChatCompletion.acreate` (openai==0.28) and
+        maps rate-limit and availability errors to `RetryableError`.
+
+        Args:
+            api_key: OpenAI API key; defaults to `openai.api_key`.
+        """
+        self.api_key = api_key
+
+    async def _create(self, payload: dict):
+        import openai
+
+        if self.api_key:
+            openai.api_key = self.api_key
+        error = openai.error
+        try:
+            return await openai.ChatCompletion.acreate(**payload)
+        except (
+            error.RateLimitError,
+            error.ServiceUnavailableError,
+            error.APIConnectionError,
+            error.Timeout,
+        ) as e:
+            headers = getattr(e, "headers", None) or {}
+            raise RetryableError(
+                str(e), retry_after=_parse_retry_after(headers.get("Retry-After"))
+            ) from e
+
+    async def __call__(self, payload: dict) -> str:
+        response = await self._create(payload)
+        return response["choices"][0]["message"]["content"].strip()
+
+    async def stream(self, payload: dict) -> AsyncIterator[str]:
+        """Yields content deltas as the completion is generated."""
+        response = await self._create(dict(payload, stream=True))
+        try:
+            async for chunk in response:
+                delta = chunk["choices"][0].get("delta", {})
+                if delta.get("content"):
+                    yield delta["content"]
+        finally:
+            if hasattr(response, "aclose"):
+                await response.aclose()
+
+
+class LLMExecutor:
+    def __init__(
+        self,
+        transport: Optional[Callable[[dict], Any]] = None,
+        model_name: str = "gpt-3.5-turbo",
+        max_concurrency: int = 8,
+        rate_limits: Optional[dict] = None,
+        max_retries: int = 6,
+        base_delay: float = 1.0,
+        max_delay: float = 60.0,
+        token_counter: Optional[object] = None,
+        cache: Optional[object] = None,
+    ) -> None:
+        """
+        Shared executor for chat completion requests. Runs requests
+        concurrently under a per-model rate limit, retries retryable failures
+        with exponential backoff and full jitter (honoring Retry-After), and
+        merges identical in-flight requests into one call.
+
+        Args:
+            transport: Async callable taking an OpenAI-style request payload
+                and returning the completion text. Defaults to
+                `OpenAIChatTransport`.
+
+            model_name: Model used when a request does not name one.
+
+            max_concurrency: Maximum number of requests in flight.
+
+            rate_limits: Mapping of model name to a dict with
+                "requests_per_minute" and/or "tokens_per_minute".
+
+            max_retries: Number of retries after the first attempt.
+
+            base_delay: Backoff delay before the first retry, in seconds.
+
+            max_delay: Upper bound of a single backoff delay, in seconds.
+
+            token_counter: Optional `TokenCounter` for estimating request
+                tokens; a characters/4 estimate is used otherwise.
+
+            cache: Optional `ResponseCache`. Deterministic requests
+                (temperature=0) are answered from it when possible.
+        """
+        self.transport = transport or OpenAIChatTransport()
+        self.model_name = model_name
+        self.max_concurrency = max_concurrency
+        self.rate_limits = rate_limits or {}
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.token_counter = token_counter
+        self.cache = cache
+        self._limiters = {}
+        self._inflight = {}
+        self._semaphore = None
+        self._loop = None
+        self.stats = {"requests": 0, "retries": 0, "deduplicated": 0}
+
+    def _limiter(self, model: str) -> Optional[RateLimiter]:
+        if model not in self._limiters:
+            limits = self.rate_limits.get(model)
+            self._limiters[model] = RateLimiter(**limits) if limits else None
+        return self._limiters[model]
+
+    def build_payload(self, prompt: Messages, **params) -> dict:
+        """
+        Builds an OpenAI-style payload from a prompt string or a message list.
+        """
+        messages = (
+            [{"role": "user", "content": prompt}]
+            if isinstance(prompt, str)
+            else list(prompt)
+        )
+        payload = {"model": params.pop("model", None) or self.model_name}
+        payload["messages"] = messages
+        payload.update(params)
+        return payload
+
+    def _estimate_tokens(self, payload: dict) -> int:
+        texts = [m.get("content", "") for m in payload["messages"]]
+        if self.token_counter is not None:
+            prompt_tokens = sum(self.token_counter.count_batch(texts))
+        else:
+            prompt_tokens = sum(len(t) for t in texts) // 4
+        return prompt_tokens + payload.get("max_tokens", 0)
+
+    @staticmethod
+    def request_key(payload: dict) -> str:
+        return hashlib.sha256(
+            json.dumps(payload, sort_keys=True).encode()
+        ).hexdigest()
+
+    def backoff_delay(self, attempt: int, retry_after: Optional[float]) -> float:
+        """
+        Returns the delay before retry number `attempt` (0-based): a uniform
+        draw in [0, min(max_delay, base_delay * 2**attempt)], but never less
+        than the server's Retry-After.
+        """
+        delay = random.uniform(0, min(self.max_delay, self.base_delay * 2**attempt))
+        if retry_after is not None:
+            delay = max(delay, retry_after)
+        return delay
+
+    def _bind_loop(self) -> None:
+        # asyncio primitives belong to one event loop; the synchronous
+        # wrappers start a new loop per call.
+        loop = asyncio.get_running_loop()
+        if loop is not self._loop:
+            self._loop = loop
+            self._semaphore = asyncio.Semaphore(self.max_concurrency)
+            for limiter in self._limiters.values():
+                if limiter is not None:
+                    limiter._lock = None
+            self._inflight = {}
+
+    async def _send(self, payload: dict) -> str:
+        limiter = self._limiter(payload["model"])
+        tokens = self._estimate_tokens(payload) if limiter else 0
+
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                if limiter:
+                    await limiter.acquire(tokens)
+                self.stats["requests"] += 1
+                try:
+                    return await self.transport(payload)
+                except RetryableError as e:
+                    if attempt >= self.max_retries:
+                        raise
+                    delay = self.backoff_delay(attempt, e.retry_after)
+                    logging.warning(
+                        f"Retryable LLM error ({e}); retrying in {delay:.1f}s"
+                    )
+            self.stats["retries"] += 1
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    async def complete(self, prompt: Messages, **params) -> str:
+        """
+        Sends one request. Identical requests that are already in flight share
+        the same underlying call, and deterministic requests are served from
+        the response cache if one is configured.
+
+        Args:
+            prompt: Prompt string or list of chat messages.
+
+            **params: Request parameters such as model, temperature and
+                max_tokens.
+
+        Returns:
+            Completion text.
+        """
+        self._bind_loop()
+        payload = self.build_payload(prompt, **params)
+
+        cache_key = None
+        if self.cache is not None:
+            gen_params = {
+                k: v for k, v in payload.items() if k not in ("model", "messages")
+            }
+            if self.cache.should_cache(gen_params):
+                cache_key = self.cache.make_key(
+                    payload["model"], payload["messages"], gen_params
+                )
+                cached = self.cache.get(cache_key)
+                if cached is not None:
+                    return cached
+
+        key = self.request_key(payload)
+        if key in self._inflight:
+            self.stats["deduplicated"] += 1
+            return await asyncio.shield(self._inflight[key])
+
+        task = asyncio.ensure_future(self._send(payload))
+        self._inflight[key] = task
+        task.add_done_callback(lambda _: self._inflight.pop(key, None))
+        result = await asyncio.shield(task)
+        if cache_key is not None:
+            self.cache.put(cache_key, result)
+        return result
+
+    async def map(
+        self,
+        prompts: Iterable[Messages],
+        return_exceptions: bool = False,
+        **params,
+    ) -> AsyncIterator[Any]:
+        """
+        Runs many requests concurrently and yields the results in input
+        order, as soon as each next result is available. Only a bounded
+        window of requests is scheduled ahead, so `prompts` may be a long
+        lazy iterable.
+
+        Args:
+            prompts: Prompt strings or message lists.
+
+            return_exceptions: Yield the exception of a failed request in
+                its place instead of raising it.
+
+            **params: Request parameters shared by all requests.
+
+        Yields:
+            Completion texts (or exceptions) in the order of `prompts`.
+        """
+        window = max(self.max_concurrency * 4, 1)
+        pending = []
+        prompts = iter(prompts)
+        exhausted = False
+        try:
+            while True:
+                while not exhausted and len(pending) < window:
+                    try:
+                        prompt = next(prompts)
+                    except StopIteration:
+                        exhausted = True
+                        break
+                    pending.append(
+                        asyncio.ensure_future(self.complete(prompt, **params))
+                    )
+                if not pending:
+                    return
+                task = pending.pop(0)
+                try:
+                    yield await task
+                except Exception as e:
+                    if not return_exceptions:
+                        raise
+                    yield e
+        finally:
+            for task in pending:
+                task.cancel()
+
+    def run_batch(
+        self,
+        prompts: Iterable[Messages],
+        return_exceptions: bool = False,
+        **params,
+    ) -> List[Any]:
+        """Synchronous wrapper around `map` that collects all results."""
+
+        async def collect():
+            return [
+                r
+                async for r in self.map(
+                    prompts, return_exceptions=return_exceptions, **params
+                )
+            ]
+
+        return asyncio.run(collect())
+
+    def complete_sync(self, prompt: Messages, **params) -> str:
+        """Synchronous wrapper around `complete`."""
+        return asyncio.run(self.complete(prompt, **params))
+
+    async def stream(self, prompt: Messages, **params) -> AsyncIterator[str]:
+        """
+        Streams the completion token by token. Rate limiting and concurrency
+        apply as for `complete`; retryable errors are retried only until the
+        first token has been yielded. Closing the generator (e.g. when an HTTP
+        client disconnects) closes the upstream stream as well.
+
+        Args:
+            prompt: Prompt string or list of chat messages.
+
+            **params: Request parameters such as model, temperature and
+                max_tokens.
+
+        Yields:
+            Content deltas as they arrive.
+        """
+        self._bind_loop()
+        payload = self.build_payload(prompt, **params)
+        limiter = self._limiter(payload["model"])
+        tokens = self._estimate_tokens(payload) if limiter else 0
+
+        attempt = 0
+        while True:
+            async with self._semaphore:
+                if limiter:
+                    await limiter.acquire(tokens)
+                self.stats["requests"] += 1
+                started = False
+                upstream = self.transport.stream(payload)
+                try:
+                    async for token in upstream:
+                        started = True
+                        yield token
+                    return
+                except RetryableError as e:
+                    if started or attempt >= self.max_retries:
+                        raise
+                    delay = self.backoff_delay(attempt, e.retry_after)
+                    logging.warning(
+                        f"Retryable LLM error ({e}); retrying in {delay:.1f}s"
+                    )
+                finally:
+                    await upstream.aclose()
+            self.stats["retries"] += 1
+            attempt += 1
+            await asyncio.sleep(delay)
+
+    def stream_sync(self, prompt: Messages, **params) -> Iterator[str]:
+        """Synchronous wrapper around `stream` for command-line use."""
+        loop = asyncio.new_event_loop()
+        tokens = self.stream(prompt, **params)
+        try:
+            while True:
+                try:
+                    yield loop.run_until_complete(tokens.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            loop.run_until_complete(tokens.aclose())
+            loop.close()
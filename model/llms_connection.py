@@ -2,29 +2,44 @@ from abc import ABC, abstractmethod
 import json
 import logging
 import nltk  # Make sure nltk is properly installed and imported
-from transformers import pipeline, BigScienceModule, BloomModule, GPT2Tokenizer, GPT2Model
+from transformers import pipeline, BigScienceModule, BloomModule, GPT2Model
+from typing import Callable, Optional
+from .token_counter import TokenCounter
+from .conversation_memory import ChatMemory
+from .llm_cache import ResponseCache
 
-class ChatInterface(ABC):
+class ChatInterface(ChatMemory, ABC):
     def __init__(
         self,
         model_name_or_path: str,
         prompts: dict,
         correct: bool = True,
         split_correction: bool = False,
+        token_budget: Optional[int] = None,
+        keep_recent_turns: int = 4,
+        summarizer: Optional[Callable] = None,
+        response_cache: Optional[ResponseCache] = None,
+        generation_params: Optional[dict] = None,
     ):
         super().__init__()
         self.model_name_or_path = model_name_or_path
         self.prompts = prompts
         self.correct = correct
         self.split_correction = split_correction
-        self.history = []
-        self.messages = []
-        self.ca_messages = []
         self.current_statements = []
+        # Deterministic calls (e.g. temperature=0) are answered from the
+        # response cache; sampled ones bypass it.
+        self.response_cache = response_cache
+        self.generation_params = generation_params or {}
         self.pipeline = pipeline("conversational", model=self.model_name_or_path)
         self.bigscience_module = BigScienceModule()
         self.bloom_module = BloomModule()
-        self.tokenizer = GPT2Tokenizer.from_pretrained(model_name_or_path)
+        # Primary conversation and UI history are kept within `token_budget`
+        # by summarizing old turns; correcting-agent prompts are all pinned.
+        self.init_memory(
+            TokenCounter(model_name_or_path), token_budget, keep_recent_turns, summarizer
+        )
+        self.tokenizer = self.token_counter.tokenizer
         self.model = GPT2Model.from_pretrained(model_name_or_path)
 
     def setup(self, context: str):
@@ -42,7 +57,7 @@ class ChatInterface(ABC):
     def query(self, text: str) -> tuple[str, dict, str]:
         self.append_user_message(text)
         self.inject_context(text)
-        msg = self.primary_query()
+        msg = self.cached_primary_query()
 
         if self.correct:
             correction = self.correct_query(text)
@@ -50,6 +65,29 @@ class ChatInterface(ABC):
         else:
             return msg, None, None
 
+    def cached_primary_query(self) -> str:
+        """
+        Runs `primary_query`, or returns the cached answer for the current
+        messages. On a cache hit the answer is appended as an AI message, as
+        `primary_query` would have done.
+        """
+        if self.response_cache is None or not self.response_cache.should_cache(
+            self.generation_params
+        ):
+            return self.primary_query()
+
+        key = self.response_cache.make_key(
+            self.model_name_or_path, self.messages, self.generation_params
+        )
+        msg = self.response_cache.get(key)
+        if msg is not None:
+            self.append_ai_message(msg)
+            return msg
+        msg = self.primary_query()
+        if msg is not None:
+            self.response_cache.put(key, msg)
+        return msg
+
     @abstractmethod
     def set_api_key(self, api_key: str, user: Optional[str] = None):
         pass
@@ -66,27 +104,15 @@ class ChatInterface(ABC):
     def inject_context(self, text: str):
         pass
 
-    def append_system_message(self, message: str) -> None:
-        self.messages.append({"role": "system", "content": message})
-
-    def append_ca_message(self, message: str) -> None:
-        self.ca_messages.append({"role": "ca", "content": message})
-
-    def append_user_message(self, message: str) -> None:
-        self.messages.append({"role": "user", "content": message})
-
     def reset(self):
-        self.history.clear()
-        self.messages.clear()
-        self.ca_messages.clear()
+        super().reset()
         self.current_statements.clear()
 
-    def get_msg_json(self) -> str:
-        return json.dumps(self.messages + self.ca_messages + self.history)
-
     def get_token_size(self, text: str) -> int:
-        tokens = self.tokenizer.encode(text, add_special_tokens=False)
-        return len(tokens)
+        return self.token_counter.count(text)
+
+    def get_token_sizes(self, texts: list) -> list:
+        return self.token_counter.count_batch(texts)
 
 # Example usage:
 conversation = Conversation(model_name_or_path="gpt-4", prompts={})
@@ -0,0 +1,105 @@
+from collections import OrderedDict
+from typing import Any, Iterable, List, Optional
+
+
+class TokenCounter:
+    def __init__(
+        self,
+        tokenizer_name_or_path: str = "gpt2",
+        cache_size: int = 4096,
+        tokenizer: Optional[Any] = None,
+    ) -> None:
+        """
+        Counts tokens with a fast (Rust-backed) tokenizer and memoizes the
+        counts of strings that are seen repeatedly, such as system prompts and
+        schema blocks.
+
+        Args:
+            tokenizer_name_or_path: Name or path of the tokenizer to load with
+                `AutoTokenizer`. Ignored if `tokenizer` is given.
+
+            cache_size: Maximum number of distinct strings whose token count
+                is memoized. Least recently used entries are evicted first.
+
+            tokenizer: Optional preloaded tokenizer. Anything that can be
+                called on a list of strings and returns a mapping with
+                "input_ids" works.
+        """
+        if tokenizer is None:
+            from transformers import AutoTokenizer
+
+            tokenizer = AutoTokenizer.from_pretrained(
+                tokenizer_name_or_path, use_fast=True
+            )
+        self.tokenizer = tokenizer
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def count(self, text: str) -> int:
+        """
+        Returns the number of tokens in a single text.
+
+        Args:
+            text: Text to count.
+
+        Returns:
+            Number of tokens, without special tokens.
+        """
+        return self.count_batch([text])[0]
+
+    def count_batch(self, texts: Iterable[str]) -> List[int]:
+        """
+        Returns the number of tokens for each text. Texts that are not in the
+        cache are encoded together in a single tokenizer call.
+
+        Args:
+            texts: Texts to count.
+
+        Returns:
+            List of token counts in the order of `texts`.
+        """
+        texts = list(texts)
+        counts = [None] * len(texts)
+        pending = {}
+        for i, text in enumerate(texts):
+            if text in self._cache:
+                self._cache.move_to_end(text)
+                counts[i] = self._cache[text]
+                self.hits += 1
+            else:
+                pending.setdefault(text, []).append(i)
+
+        if pending:
+            unique = list(pending)
+            self.misses += len(unique)
+            encoded = self.tokenizer(unique, add_special_tokens=False)
+            for text, ids in zip(unique, encoded["input_ids"]):
+                n = len(ids)
+                for i in pending[text]:
+                    counts[i] = n
+                self._remember(text, n)
+
+        return counts
+
+    def _remember(self, text: str, n: int) -> None:
+        if self.cache_size <= 0:
+            return
+        self._cache[text] = n
+        if len(self._cache) > self.cache_size:
+            self._cache.popitem(last=False)
+
+    def cache_info(self) -> dict:
+        """Returns hit/miss counters and the current cache size."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self._cache),
+            "max_size": self.cache_size,
+        }
+
+    def clear_cache(self) -> None:
+        self._cache.clear()
+        self.hits = 0
+        self.misses = 0
@@ -1,6 +1,5 @@
 import networkx as nx
 import xml.etree.ElementTree as ET
-from py2neo import Graph, Node, Relationship
 import logging
 
 # Set up logging
@@ -19,6 +18,10 @@ def parse_drugbank(xml_file):
         drug_type = drug.get('type')
         graph.add_node(drug_id, label=drug_name, type='drug', drug_type=drug_type)
         
+        for prop in drug.findall('calculated-properties/property'):
+            if prop.findtext('kind') == 'SMILES':
+                graph.nodes[drug_id]['smiles'] = prop.findtext('value')
+        
         for target in drug.findall('.//target'):
             target_id = target.find('id').text
             target_name = target.find('name').text
@@ -48,9 +51,12 @@ def parse_drugbank(xml_file):
 
 def nx_to_neo4j(nx_graph, neo4j_graph):
     """Transfers NetworkX graph to Neo4j database."""
+    # Imported here so that parsing does not need the Neo4j driver
+    from py2neo import Node, Relationship
+
     logging.info("Transferring graph to Neo4j")
     for node, data in nx_graph.nodes(data=True):
-        neo_node = Node(data['type'], id=node, label=data['label'], **data)
+        neo_node = Node(data['type'], id=node, **data)
         neo4j_graph.merge(neo_node, data['type'], 'id')
     
     for source, target, data in nx_graph.edges(data=True):
@@ -62,6 +68,12 @@ def nx_to_neo4j(nx_graph, neo4j_graph):
     logging.info("Graph transfer to Neo4j completed")
 
 if __name__ == "__main__":
+    from py2neo import Graph
+
+    from src.data_ingestion import save_data
+    from src.fingerprint_index import FINGERPRINT_INDEX_PATH, FingerprintIndex
+    from src.target_overlap import TARGET_CANDIDATES_PATH, TARGET_OVERLAP_PATH, DrugOverlap, write_similarities
+
     xml_file = 'path_to_drugbank.xml'
     neo4j_url = "bolt://localhost:7687"
     neo4j_user = "neo4j"
@@ -72,10 +84,22 @@ if __name__ == "__main__":
     # Parse the XML file to create a NetworkX graph
     drug_graph = parse_drugbank(xml_file)
     
+    # Index the drug structures for similarity search (served by the API)
+    FingerprintIndex.from_graph(drug_graph).save(FINGERPRINT_INDEX_PATH)
+    
+    # Drugs sharing targets, and repurposing candidates per target
+    overlap = DrugOverlap.from_graph(drug_graph, feature_types=('target',))
+    similar = overlap.similar_drugs(k=20)
+    save_data(similar, TARGET_OVERLAP_PATH)
+    save_data(overlap.feature_candidates(similar, k=20), TARGET_CANDIDATES_PATH)
+    
     # Connect to the Neo4j database
     graph_db = Graph(neo4j_url, auth=(neo4j_user, neo4j_password))
     
     # Transfer NetworkX graph to Neo4j
     nx_to_neo4j(drug_graph, graph_db)
     
+    # Store the precomputed overlaps as SHARES_TARGETS_WITH relationships
+    write_similarities(graph_db, similar)
+    
     logging.info("Script completed successfully")
@@ -1,6 +1,11 @@
+import argparse
+import os
+
 import pandas as pd
-import matplotlib.pyplot as plt
-import seaborn as sns
+
+from src.data_ingestion import load_data as load_chunks
+from src.eda_functions import plot_correlations as plot_correlation_blocks
+from src.eda_functions import plot_distributions as plot_all_distributions, streaming_eda
 
 def load_data(file_path):
     """
@@ -8,40 +13,55 @@ def load_data(file_path):
     """
     return pd.read_csv(file_path)
 
-def plot_distributions(df, column):
-    """
-    Plot distribution of a specified column.
+def plot_correlations(data, method='pearson', k=50, output_dir='plots'):
     """
-    plt.figure(figsize=(10, 6))
-    sns.histplot(df[column], kde=True)
-    plt.title(f'Distribution of {column}')
-    plt.xlabel(column)
-    plt.ylabel('Frequency')
-    plt.show()
-
-def plot_correlations(df):
+    Save the `k` most correlated pairs and heatmaps of the full matrix (few
+    columns) or of the clusters of strongly correlated columns, computed in
+    column blocks (see `src.eda_functions.plot_correlations`). `data` is a
+    DataFrame or an iterable of DataFrame chunks.
     """
-    Plot correlation matrix.
-    """
-    plt.figure(figsize=(12, 8))
-    sns.heatmap(df.corr(), annot=True, cmap='coolwarm', fmt='.2f')
-    plt.title('Correlation Matrix')
-    plt.show()
+    os.makedirs(output_dir, exist_ok=True)
+    return plot_correlation_blocks(data, method=method, k=k, output_dir=output_dir)
 
-def eda(file_path):
+def eda(file_path, streaming=True, chunksize=100_000, sample_size=10_000, strata_column=None, seed=0,
+        max_workers=None, force=False):
     """
     Perform exploratory data analysis.
+
+    By default the file is read in one streaming pass over chunks and the
+    plots are drawn from a reproducible stratified sample (see
+    `src.eda_functions.streaming_eda`), so memory and plotting time do not
+    grow with the number of rows. `streaming=False` loads the whole file,
+    for small datasets. Either way, distributions are drawn in parallel
+    and only for columns that changed since the last run.
     """
+    if streaming:
+        summary = streaming_eda(file_path, chunksize, sample_size, strata_column, seed,
+                                max_workers=max_workers, force=force)
+        # A second pass over the chunks, with memory bounded by the column blocks
+        plot_correlations(load_chunks(file_path, chunksize), output_dir='plots/streaming')
+        return summary
+
     df = load_data(file_path)
-    
-    # Plot distributions for numerical columns
-    numerical_columns = df.select_dtypes(include=['int64', 'float64']).columns
-    for column in numerical_columns:
-        plot_distributions(df, column)
-    
+
+    # Plot distributions for numerical columns, in parallel and only for changed columns
+    os.makedirs('plots', exist_ok=True)
+    plot_all_distributions(df, max_workers, force)
+
     # Plot correlation matrix
     plot_correlations(df)
 
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--in-memory', action='store_true', help="load the whole file instead of streaming it")
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--sample-size', type=int, default=10_000)
+    parser.add_argument('--strata', default=None, help="column to stratify the sample by")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-workers', type=int, default=None)
+    parser.add_argument('--force', action='store_true', help="redraw every distribution")
+    args = parser.parse_args()
+
     data_file = 'data/cleaned_data.csv'
-    eda(data_file)
+    eda(data_file, not args.in_memory, args.chunksize, args.sample_size, args.strata, args.seed,
+        args.max_workers, args.force)
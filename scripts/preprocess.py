@@ -1,35 +1,150 @@
+import argparse
+import itertools
+from collections import deque
+
 import pandas as pd
 import numpy as np
 from sklearn.model_selection import train_test_split
 import spacy
 from tqdm import tqdm
 
+from src.data_ingestion import load_data, save_data, write_chunks
+
 # Load the spaCy model
 nlp = spacy.load('en_core_web_sm')
 
-def clean_text(text):
+# Components lemmatization does not depend on: the lemmatizer only needs the
+# tagger (and the attribute ruler mapping its tags), stop words and
+# punctuation are lexical attributes
+UNUSED_COMPONENTS = ['parser', 'ner']
+
+def clean_doc(doc):
     """
-    Clean and preprocess text data.
+    Lemmatize a processed document, dropping stop words and punctuation.
     """
-    doc = nlp(text)
     tokens = [token.lemma_ for token in doc if not token.is_stop and not token.is_punct]
     return ' '.join(tokens)
 
-def preprocess_data(input_file, output_file):
+def as_text(text):
+    """
+    Missing texts (NaN in a DataFrame) are cleaned as empty strings.
+    """
+    return '' if pd.isna(text) else text
+
+def clean_text(text):
+    """
+    Clean and preprocess text data.
+    """
+    return clean_doc(nlp(as_text(text)))
+
+def clean_texts(texts, batch_size=1000, n_process=1):
+    """
+    Clean many texts by streaming them through `nlp.pipe`, with the
+    components lemmatization does not need disabled. Yields one cleaned
+    text per input text, in input order (also with several processes).
+
+    Args:
+        texts: Iterable of texts.
+
+        batch_size: Number of texts spaCy processes per batch.
+
+        n_process: Number of worker processes; -1 uses all CPUs.
+    """
+    disable = [name for name in UNUSED_COMPONENTS if name in nlp.pipe_names]
+    docs = nlp.pipe(map(as_text, texts), batch_size=batch_size, n_process=n_process, disable=disable)
+    for doc in docs:
+        yield clean_doc(doc)
+
+def clean_chunk(df, bulk=True, batch_size=1000, n_process=1, progress=None):
+    """
+    Add the 'cleaned_text' column to a DataFrame.
+    """
+    if bulk:
+        cleaned = clean_texts(df['text'], batch_size=batch_size, n_process=n_process)
+        df['cleaned_text'] = list(tqdm(cleaned, total=len(df), desc="Cleaning text", disable=progress is not None))
+    else:
+        tqdm.pandas(desc="Cleaning text", disable=progress is not None)
+        df['cleaned_text'] = df['text'].progress_apply(clean_text)
+    if progress is not None:
+        progress.update(len(df))
+    return df
+
+def clean_chunks(chunks, batch_size=1000, n_process=1, progress=None):
+    """
+    Add the 'cleaned_text' column to each DataFrame of a stream of chunks.
+    The texts of all chunks go through a single `clean_texts` stream, so
+    with several processes the worker pool is started, and the model
+    loaded in each worker, once rather than once per chunk.
+    """
+    pending = deque()
+
+    def texts():
+        for chunk in chunks:
+            pending.append(chunk)
+            yield from chunk['text']
+
+    cleaned = clean_texts(texts(), batch_size=batch_size, n_process=n_process)
+    # Pulling one cleaned text makes sure the chunk it belongs to was read
+    head = next(cleaned, None)
+    while pending:
+        chunk = pending.popleft()
+        rows = []
+        if len(chunk):
+            rows = [head] + list(itertools.islice(cleaned, len(chunk) - 1))
+            head = next(cleaned, None)
+        chunk['cleaned_text'] = rows
+        if progress is not None:
+            progress.update(len(chunk))
+        yield chunk
+
+def preprocess_data(input_file, output_file, bulk=True, batch_size=1000, n_process=1, chunksize=None):
     """
     Preprocess the input data and save to output file.
+
+    Args:
+        input_file: Path of the raw CSV or Parquet file with a 'text' column.
+
+        output_file: Path of the cleaned CSV or Parquet file.
+
+        bulk: Clean the texts in batches with `clean_texts` (default) instead
+            of running the full pipeline row by row.
+
+        batch_size: Number of texts per spaCy batch in bulk mode.
+
+        n_process: Number of spaCy worker processes in bulk mode.
+
+        chunksize: Stream the file in chunks of this many rows, so memory use
+            does not grow with the file size. The output is the same as
+            without chunking.
     """
-    # Load the dataset
-    df = pd.read_csv(input_file)
+    if chunksize is None:
+        # Load the dataset
+        df = load_data(input_file)
 
-    # Clean the text data
-    tqdm.pandas(desc="Cleaning text")
-    df['cleaned_text'] = df['text'].progress_apply(clean_text)
+        # Clean the text data
+        df = clean_chunk(df, bulk, batch_size, n_process)
 
-    # Save the preprocessed data
-    df.to_csv(output_file, index=False)
+        # Save the preprocessed data
+        save_data(df, output_file)
+        return
+
+    chunks = load_data(input_file, chunksize)
+    with tqdm(desc="Cleaning text", unit="rows") as progress:
+        if bulk:
+            cleaned = clean_chunks(chunks, batch_size, n_process, progress)
+        else:
+            cleaned = (clean_chunk(chunk, bulk=False, progress=progress) for chunk in chunks)
+        write_chunks(cleaned, output_file)
 
 if __name__ == "__main__":
+    # Run from the repository root: python -m scripts.preprocess
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--chunksize', type=int, default=None, help="stream the file in chunks of this many rows")
+    parser.add_argument('--batch-size', type=int, default=1000)
+    parser.add_argument('--n-process', type=int, default=1)
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help="format of the cleaned file")
+    args = parser.parse_args()
+
     input_file = 'data/raw_data.csv'
-    output_file = 'data/cleaned_data.csv'
-    preprocess_data(input_file, output_file)
+    output_file = f'data/cleaned_data.{args.format}'
+    preprocess_data(input_file, output_file, batch_size=args.batch_size, n_process=args.n_process, chunksize=args.chunksize)
@@ -1,7 +1,14 @@
-from fastapi import FastAPI, HTTPException
+from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import StreamingResponse
 from pydantic import BaseModel
-from py2neo import Graph, NodeMatcher
+import asyncio
+import json
 import logging
+import os
+from typing import Optional
+
+from model.llm_executor import LLMExecutor, OpenAIChatTransport
+from src.api.graph_backend import create_backend
 
 # Initialize the FastAPI app
 app = FastAPI()
@@ -9,22 +16,27 @@ app = FastAPI()
 # Set up logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
-# Neo4j connection details
-NEO4J_URL = "bolt://localhost:7687"
-NEO4J_USER = "neo4j"
-NEO4J_PASSWORD = "password"
+# Graph database backend (Neo4j or in-memory, see graph_backend.py),
+# created on first use so the app starts without a live database
+graph_backend = None
 
-# Connect to the Neo4j database
-graph_db = Graph(NEO4J_URL, auth=(NEO4J_USER, NEO4J_PASSWORD))
+def get_graph_backend():
+    global graph_backend
+    if graph_backend is None:
+        graph_backend = create_backend()
+    return graph_backend
 
-# NodeMatcher for querying nodes
-node_matcher = NodeMatcher(graph_db)
+def set_graph_backend(backend):
+    """Serve graph lookups from `backend`, e.g. an InMemoryBackend."""
+    global graph_backend
+    graph_backend = backend
 
 #Defining pydantic models
 class Drug(BaseModel):
     id: str
     name: str
-    type: str
+    # Drugs only known as interaction partners have no type
+    type: Optional[str] = None
 
 class Target(BaseModel):
     id: str
@@ -35,112 +47,57 @@ class RelationshipResponse(BaseModel):
     target: str
     relationship: str
 
-# Pydantic Models: Define the data structures for drug and target responses.
-# API Endpoints
-
-@app.get("/drugs/{drug_id}", response_model=Drug)
-async def get_drug(drug_id: str):
-    """Get drug information by drug ID."""
-    logging.info(f"Fetching drug with ID: {drug_id}")
-    drug = node_matcher.match("drug", id=drug_id).first()
-    if not drug:
-        logging.error(f"Drug with ID {drug_id} not found")
-        raise HTTPException(status_code=404, detail="Drug not found")
-    return Drug(id=drug['id'], name=drug['label'], type=drug['drug_type'])
-
-@app.get("/targets/{target_id}", response_model=Target)
-async def get_target(target_id: str):
-    """Get target information by target ID."""
-    logging.info(f"Fetching target with ID: {target_id}")
-    target = node_matcher.match("target", id=target_id).first()
-    if not target:
-        logging.error(f"Target with ID {target_id} not found")
-        raise HTTPException(status_code=404, detail="Target not found")
-    return Target(id=target['id'], name=target['label'])
-
-@app.get("/relationships/{drug_id}", response_model=list[RelationshipResponse])
-async def get_relationships(drug_id: str):
-    """Get all relationships for a given drug ID."""
-    logging.info(f"Fetching relationships for drug with ID: {drug_id}")
-    drug = node_matcher.match("drug", id=drug_id).first()
-    if not drug:
-        logging.error(f"Drug with ID {drug_id} not found")
-        raise HTTPException(status_code=404, detail="Drug not found")
+class GenerationRequest(BaseModel):
+    prompt: str
+    model: str = "gpt-3.5-turbo"
+    max_tokens: int = 500
+    temperature: float = 0.7
 
-    relationships = []
-    for rel in graph_db.match((drug,), r_type=None):
-        target_node = rel.end_node
-        relationships.append(RelationshipResponse(
-            source=rel.start_node['id'],
-            target=target_node['id'],
-            relationship=rel.__class__.__name__
-        ))
+class LocalGenerationRequest(BaseModel):
+    prompt: str
+    max_new_tokens: int = 50
 
-    return relationships
+class LocalGenerationResponse(BaseModel):
+    text: str
 
+class SimilarDrug(BaseModel):
+    id: str
+    name: str
+    similarity: float
 
-Sure, let's create a detailed src/api/endpoints.py script for a web API that interacts with the drug-target graph. This script will use FastAPI to provide endpoints for querying the graph, such as retrieving drug information, target details, and relationships. We will also include detailed explanations and comments to ensure clarity.
-
-src/api/endpoints.py
-Importing Required Libraries
-python
-Copy code
-from fastapi import FastAPI, HTTPException
-from pydantic import BaseModel
-from py2neo import Graph, NodeMatcher
-import logging
-
-# Initialize the FastAPI app
-app = FastAPI()
-
-# Set up logging
-logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
-
-# Neo4j connection details
-NEO4J_URL = "bolt://localhost:7687"
-NEO4J_USER = "neo4j"
-NEO4J_PASSWORD = "password"
-
-# Connect to the Neo4j database
-graph_db = Graph(NEO4J_URL, auth=(NEO4J_USER, NEO4J_PASSWORD))
+class SimilaritySearchRequest(BaseModel):
+    smiles: str
+    k: int = 10
+    min_similarity: float = 0.0
 
-# NodeMatcher for querying nodes
-node_matcher = NodeMatcher(graph_db)
-Defining Pydantic Models
-python
-Copy code
-class Drug(BaseModel):
+class SharedTargetDrug(BaseModel):
     id: str
-    name: str
-    type: str
+    score: float
+    shared: int
 
-class Target(BaseModel):
+class TargetCandidate(BaseModel):
     id: str
-    name: str
+    score: float
+    rank: int
+
+# Pydantic Models: Define the data structures for drug and target responses.
+# API Endpoints
 
-class RelationshipResponse(BaseModel):
-    source: str
-    target: str
-    relationship: str
-Pydantic Models: Define the data structures for drug and target responses.
-API Endpoints
-python
-Copy code
 @app.get("/drugs/{drug_id}", response_model=Drug)
 async def get_drug(drug_id: str):
     """Get drug information by drug ID."""
     logging.info(f"Fetching drug with ID: {drug_id}")
-    drug = node_matcher.match("drug", id=drug_id).first()
+    drug = get_graph_backend().get_node("drug", drug_id)
     if not drug:
         logging.error(f"Drug with ID {drug_id} not found")
         raise HTTPException(status_code=404, detail="Drug not found")
-    return Drug(id=drug['id'], name=drug['label'], type=drug['drug_type'])
+    return Drug(id=drug['id'], name=drug['label'], type=drug.get('drug_type'))
 
 @app.get("/targets/{target_id}", response_model=Target)
 async def get_target(target_id: str):
     """Get target information by target ID."""
     logging.info(f"Fetching target with ID: {target_id}")
-    target = node_matcher.match("target", id=target_id).first()
+    target = get_graph_backend().get_node("target", target_id)
     if not target:
         logging.error(f"Target with ID {target_id} not found")
         raise HTTPException(status_code=404, detail="Target not found")
@@ -150,24 +107,144 @@ async def get_target(target_id: str):
 async def get_relationships(drug_id: str):
     """Get all relationships for a given drug ID."""
     logging.info(f"Fetching relationships for drug with ID: {drug_id}")
-    drug = node_matcher.match("drug", id=drug_id).first()
-    if not drug:
+    relationships = get_graph_backend().get_relationships(drug_id)
+    if relationships is None:
         logging.error(f"Drug with ID {drug_id} not found")
         raise HTTPException(status_code=404, detail="Drug not found")
 
-    relationships = []
-    for rel in graph_db.match((drug,), r_type=None):
-        target_node = rel.end_node
-        relationships.append(RelationshipResponse(
-            source=rel.start_node['id'],
-            target=target_node['id'],
-            relationship=rel.__class__.__name__
-        ))
+    return [
+        RelationshipResponse(source=source, target=target, relationship=relationship)
+        for source, target, relationship in relationships
+    ]
+
+# Fingerprint index of the drug structures, loaded on first use
+fingerprint_index = None
+
+def get_fingerprint_index():
+    global fingerprint_index
+    if fingerprint_index is None:
+        from src.fingerprint_index import FINGERPRINT_INDEX_PATH, FingerprintIndex
+
+        if not os.path.exists(FINGERPRINT_INDEX_PATH):
+            logging.error(f"Fingerprint index not found at {FINGERPRINT_INDEX_PATH}")
+            raise HTTPException(status_code=503, detail="Similarity index not available")
+        fingerprint_index = FingerprintIndex.load(FINGERPRINT_INDEX_PATH)
+    return fingerprint_index
+
+@app.get("/drugs/{drug_id}/similar", response_model=list[SimilarDrug])
+async def get_similar_drugs(drug_id: str, k: int = 10, min_similarity: float = 0.0):
+    """Get the drugs structurally most similar to a drug (Tanimoto on Morgan fingerprints)."""
+    logging.info(f"Fetching drugs similar to {drug_id}")
+    try:
+        results = get_fingerprint_index().similar_to(drug_id, k, min_similarity)
+    except KeyError:
+        logging.error(f"No structure indexed for drug {drug_id}")
+        raise HTTPException(status_code=404, detail="Drug structure not found")
+    return [SimilarDrug(id=i, name=name, similarity=score) for i, name, score in results]
+
+@app.post("/similarity/search", response_model=list[SimilarDrug])
+async def search_similar_drugs(body: SimilaritySearchRequest):
+    """Screen all indexed drugs against a query molecule given as SMILES."""
+    logging.info(f"Similarity search for {body.smiles}")
+    try:
+        results = get_fingerprint_index().search(body.smiles, body.k, body.min_similarity)
+    except ValueError as e:
+        raise HTTPException(status_code=422, detail=str(e))
+    return [SimilarDrug(id=i, name=name, similarity=score) for i, name, score in results]
+
+# Precomputed target overlaps and candidates, loaded on first use
+target_overlap = None
+
+def get_target_overlap():
+    global target_overlap
+    if target_overlap is None:
+        from src.data_ingestion import load_data
+        from src.target_overlap import TARGET_CANDIDATES_PATH, TARGET_OVERLAP_PATH
+
+        for path in (TARGET_OVERLAP_PATH, TARGET_CANDIDATES_PATH):
+            if not os.path.exists(path):
+                logging.error(f"Target overlap data not found at {path}")
+                raise HTTPException(status_code=503, detail="Target overlap data not available")
+        # Rows are grouped by drug / target, best first
+        target_overlap = {
+            'similar': load_data(TARGET_OVERLAP_PATH).groupby('drug_id', sort=False),
+            'candidates': load_data(TARGET_CANDIDATES_PATH).groupby('feature_id', sort=False),
+        }
+    return target_overlap
+
+@app.get("/drugs/{drug_id}/shared-targets", response_model=list[SharedTargetDrug])
+async def get_shared_target_drugs(drug_id: str, k: int = 10):
+    """Get the drugs whose targets overlap most with a drug's (Jaccard)."""
+    logging.info(f"Fetching drugs sharing targets with {drug_id}")
+    groups = get_target_overlap()['similar']
+    if drug_id not in groups.groups:
+        raise HTTPException(status_code=404, detail="Drug not found")
+    rows = groups.get_group(drug_id).head(k)
+    return [
+        SharedTargetDrug(id=row.similar_drug_id, score=row.score, shared=row.shared)
+        for row in rows.itertuples()
+    ]
+
+@app.get("/targets/{target_id}/candidates", response_model=list[TargetCandidate])
+async def get_target_candidates(target_id: str, k: int = 10):
+    """Get repurposing candidates for a target: drugs similar to its known drugs."""
+    logging.info(f"Fetching candidate drugs for target {target_id}")
+    groups = get_target_overlap()['candidates']
+    if target_id not in groups.groups:
+        raise HTTPException(status_code=404, detail="Target not found")
+    rows = groups.get_group(target_id).head(k)
+    return [TargetCandidate(id=row.drug_id, score=row.score, rank=row.rank) for row in rows.itertuples()]
+
+# LLM executor shared by all generation requests (rate limits, retries)
+llm_executor = LLMExecutor(transport=OpenAIChatTransport())
+
+@app.post("/generate/stream")
+async def stream_generation(body: GenerationRequest, request: Request):
+    """Stream generated tokens as server-sent events."""
+    logging.info(f"Streaming generation with model {body.model}")
+
+    async def events():
+        tokens = llm_executor.stream(
+            body.prompt,
+            model=body.model,
+            max_tokens=body.max_tokens,
+            temperature=body.temperature,
+        )
+        try:
+            async for token in tokens:
+                if await request.is_disconnected():
+                    logging.info("Client disconnected, cancelling generation")
+                    return
+                yield f"data: {json.dumps({'token': token})}\n\n"
+            yield "data: [DONE]\n\n"
+        except Exception as e:
+            logging.error(f"Generation failed: {e}")
+            yield f"event: error\ndata: {json.dumps({'detail': str(e)})}\n\n"
+        finally:
+            # Closes the upstream LLM stream, also when the server cancels
+            # this generator because the client went away.
+            await tokens.aclose()
+
+    return StreamingResponse(events(), media_type="text/event-stream")
+
+@app.post("/generate/gpt2", response_model=LocalGenerationResponse)
+async def generate_gpt2(body: LocalGenerationRequest):
+    """Generate text with the local GPT-2 model; concurrent requests are batched."""
+    from src.gpt2_model import get_generator
+
+    logging.info(f"Local generation with max_new_tokens={body.max_new_tokens}")
+    future = get_generator().submit(body.prompt, body.max_new_tokens)
+    return LocalGenerationResponse(text=await asyncio.wrap_future(future))
 
-    return relationships
 # GET /drugs/{drug_id}: Fetches drug details by ID.
 # GET /targets/{target_id}: Fetches target details by ID.
 # GET /relationships/{drug_id}: Fetches all relationships for a given drug ID.
+# GET /drugs/{drug_id}/similar: Fetches structurally similar drugs.
+# POST /similarity/search: Screens all drugs against a query SMILES.
+# GET /drugs/{drug_id}/shared-targets: Fetches drugs with overlapping targets.
+# GET /targets/{target_id}/candidates: Fetches repurposing candidates for a target.
+# POST /generate/stream: Streams LLM tokens as server-sent events.
+# POST /generate/gpt2: Generates text with the batched local GPT-2 service.
 
 
 #Running API
@@ -177,9 +254,9 @@ if __name__ == "__main__":
 
 # Runs the FastAPI application using Uvicorn.
 
-# Import Libraries: Import FastAPI, Pydantic, and Py2neo libraries along with logging.
+# Import Libraries: Import FastAPI, Pydantic and the graph backends along with logging.
 # Initialize FastAPI App: Create the FastAPI app instance.
-# Connect to Neo4j: Establish a connection to the Neo4j database and set up a NodeMatcher for querying nodes.
+# Graph Backend: Neo4j (connected on first use) or in-memory, chosen with GRAPH_BACKEND.
 # Define Pydantic Models: Create models to structure the API responses.
 # Create API Endpoints:
 # Get Drug: Retrieves drug details by ID.
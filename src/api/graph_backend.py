@@ -0,0 +1,97 @@
+import logging
+import os
+
+# Backend used by the API unless one is set explicitly: 'neo4j' or 'memory'
+DEFAULT_BACKEND = 'neo4j'
+
+class Neo4jBackend:
+    def __init__(self, url, user, password):
+        """
+        Graph lookups of the API in Neo4j via py2neo. The connection is
+        opened on first use, so the app can start without a database.
+        """
+        self.url = url
+        self.user = user
+        self.password = password
+        self._graph = None
+        self._matcher = None
+
+    def _connect(self):
+        if self._graph is None:
+            from py2neo import Graph, NodeMatcher
+
+            logging.info(f"Connecting to Neo4j at {self.url}")
+            self._graph = Graph(self.url, auth=(self.user, self.password))
+            self._matcher = NodeMatcher(self._graph)
+        return self._graph, self._matcher
+
+    def get_node(self, label, node_id):
+        """Properties of the node with the given label and id, or None."""
+        _, matcher = self._connect()
+        node = matcher.match(label, id=node_id).first()
+        return dict(node) if node else None
+
+    def get_relationships(self, node_id, label='drug'):
+        """
+        Outgoing relationships of a node as (source, target, relationship)
+        tuples, or None if there is no such node.
+        """
+        graph, matcher = self._connect()
+        node = matcher.match(label, id=node_id).first()
+        if not node:
+            return None
+        return [
+            (rel.start_node['id'], rel.end_node['id'], type(rel).__name__)
+            for rel in graph.match((node,), r_type=None)
+        ]
+
+class InMemoryBackend:
+    def __init__(self):
+        """
+        Graph lookups of the API in dictionaries, e.g. filled from a
+        `parse_drugbank` graph: for tests, load tests and demos without a
+        database server.
+        """
+        self.nodes = {}
+        self.adjacency = {}
+
+    @classmethod
+    def from_graph(cls, graph):
+        backend = cls()
+        for node, data in graph.nodes(data=True):
+            backend.nodes[node] = dict(data, id=node)
+        for source, target, data in graph.edges(data=True):
+            backend.adjacency.setdefault(source, []).append((source, target, data.get('relationship')))
+        return backend
+
+    def get_node(self, label, node_id):
+        node = self.nodes.get(node_id)
+        return node if node is not None and node.get('type') == label else None
+
+    def get_relationships(self, node_id, label='drug'):
+        if self.get_node(label, node_id) is None:
+            return None
+        return list(self.adjacency.get(node_id, []))
+
+def create_backend(kind=None):
+    """
+    Backend named by `kind` or the GRAPH_BACKEND environment variable.
+    'neo4j' reads the connection from NEO4J_URL, NEO4J_USER and
+    NEO4J_PASSWORD; 'memory' parses the DrugBank XML file named by
+    GRAPH_BACKEND_XML.
+    """
+    kind = kind or os.getenv('GRAPH_BACKEND', DEFAULT_BACKEND)
+    if kind == 'neo4j':
+        return Neo4jBackend(
+            os.getenv('NEO4J_URL', 'bolt://localhost:7687'),
+            os.getenv('NEO4J_USER', 'neo4j'),
+            os.getenv('NEO4J_PASSWORD', 'password'),
+        )
+    if kind == 'memory':
+        from scripts.build_graph import parse_drugbank
+
+        xml_file = os.getenv('GRAPH_BACKEND_XML')
+        if not xml_file:
+            raise ValueError("Set GRAPH_BACKEND_XML to the DrugBank XML file of the in-memory backend.")
+        return InMemoryBackend.from_graph(parse_drugbank(xml_file))
+    raise ValueError("Invalid graph backend. Choose either 'neo4j' or 'memory'.")
@@ -1,4 +1,160 @@
+"""
+Drug-target graph explorer.
+
+Streamlit re-runs this script on every widget interaction, so query
+results are cached on two levels, both expiring after CACHE_TTL seconds:
+
+- per process with `st.cache_data`, shared by all sessions;
+- per session in `st.session_state`, which also keeps the neighbourhood
+  pages a user has loaded so far, so "Load more" only fetches the next page.
+
+Filtering and paging run in Neo4j (see src/queries/query_drug_target_graph.py),
+so a high-degree drug never loads its whole neighbourhood at once.
+
+Run from the repository root:
+    streamlit run src/app/app.py
+"""
+import os
+import sys
+import time
+from collections import OrderedDict
+
+import pandas as pd
 import streamlit as st
 
-st.title("Hello, Streamlit!")
-st.write("This is my first Streamlit app.")
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+
+from src.queries import query_drug_target_graph as queries
+
+# Seconds query results are reused before asking the database again
+CACHE_TTL = 600
+# Query results kept per session; the least recently used are dropped first
+SESSION_CACHE_ENTRIES = 256
+PAGE_SIZES = [25, 50, 100, 250]
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def cached_drug_types():
+    return queries.get_drug_types()
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def cached_search_drugs(text, drug_type, skip, limit):
+    return queries.search_drugs(text, drug_type, skip, limit)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def cached_count_drugs(text, drug_type):
+    return queries.count_drugs(text, drug_type)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def cached_neighborhood_summary(drug_id):
+    return queries.get_neighborhood_summary(drug_id)
+
+
+@st.cache_data(ttl=CACHE_TTL, show_spinner=False)
+def cached_drug_neighborhood(drug_id, relationship, node_type, text, skip, limit):
+    return queries.get_drug_neighborhood(drug_id, relationship, node_type, text, skip, limit)
+
+
+def session_cached(function, *args):
+    """
+    `function(*args)`, reused from this session for CACHE_TTL seconds. Avoids
+    hashing and copying the arguments and results of the process cache on
+    every re-run. At most SESSION_CACHE_ENTRIES results are kept, so a long
+    session of paging and filtering does not grow without bound.
+    """
+    cache = st.session_state.setdefault("query_cache", OrderedDict())
+    key = (function,) + args
+    hit = cache.get(key)
+    if hit is not None and time.time() - hit[0] < CACHE_TTL:
+        cache.move_to_end(key)
+        return hit[1]
+    value = function(*args)
+    cache[key] = (time.time(), value)
+    cache.move_to_end(key)
+    while len(cache) > SESSION_CACHE_ENTRIES:
+        cache.popitem(last=False)
+    return value
+
+
+def clear_caches():
+    st.cache_data.clear()
+    st.session_state.pop("query_cache", None)
+    st.session_state.pop("neighborhood", None)
+
+
+def neighborhood_pages(drug_id, relationship, node_type, text, page_size):
+    """
+    Rows of the neighbourhood pages loaded so far in this session. They are
+    kept until the drug, a filter or the page size changes.
+    """
+    view = (drug_id, relationship, node_type, text, page_size)
+    state = st.session_state.get("neighborhood")
+    if state is None or state["view"] != view:
+        state = {"view": view, "rows": [], "done": False}
+        st.session_state["neighborhood"] = state
+        load_next_page(state)
+    return state
+
+
+def load_next_page(state):
+    drug_id, relationship, node_type, text, page_size = state["view"]
+    # One row more than a page tells whether there is another page
+    rows = session_cached(
+        cached_drug_neighborhood, drug_id, relationship, node_type, text, len(state["rows"]), page_size + 1
+    )
+    state["rows"] += rows[:page_size]
+    state["done"] = len(rows) <= page_size
+
+
+st.set_page_config(page_title="Drug-Target Graph Explorer", layout="wide")
+st.title("Drug-Target Graph Explorer")
+
+with st.sidebar:
+    st.header("Drugs")
+    text = st.text_input("Name or DrugBank id").strip() or None
+    drug_type = st.selectbox("Drug type", [None] + session_cached(cached_drug_types),
+                             format_func=lambda t: t or "Any")
+    page_size = st.selectbox("Page size", PAGE_SIZES, index=1)
+    if st.button("Refresh data"):
+        clear_caches()
+        st.rerun()
+
+total = session_cached(cached_count_drugs, text, drug_type) or 0
+pages = max(1, -(-total // page_size))
+page = st.sidebar.number_input(f"Page (of {pages})", min_value=1, max_value=pages, value=1)
+drugs = session_cached(cached_search_drugs, text, drug_type, (page - 1) * page_size, page_size)
+st.sidebar.caption(f"{total} matching drugs")
+
+if not drugs:
+    st.info("No drugs match the filters.")
+    st.stop()
+
+labels = {drug["id"]: f"{drug['name']} ({drug['id']})" for drug in drugs}
+drug_id = st.selectbox("Drug", list(labels), format_func=labels.get)
+
+summary = session_cached(cached_neighborhood_summary, drug_id)
+if not summary:
+    st.info("This drug has no relationships.")
+    st.stop()
+
+summary_table = pd.DataFrame(summary)
+st.subheader(f"Neighbourhood: {int(summary_table['count'].sum())} relationships")
+st.dataframe(summary_table, hide_index=True, use_container_width=True)
+
+columns = st.columns(3)
+relationship = columns[0].selectbox("Relationship", [None] + sorted(summary_table["relationship"].unique()),
+                                    format_func=lambda r: r or "Any")
+node_type = columns[1].selectbox("Neighbour type", [None] + sorted(summary_table["type"].unique()),
+                                 format_func=lambda t: t or "Any")
+neighbour_text = columns[2].text_input("Neighbour name contains").strip() or None
+
+state = neighborhood_pages(drug_id, relationship, node_type, neighbour_text, page_size)
+st.dataframe(pd.DataFrame(state["rows"], columns=["id", "name", "type", "relationship"]),
+             hide_index=True, use_container_width=True)
+st.caption(f"Showing {len(state['rows'])} neighbours")
+if not state["done"] and st.button("Load more"):
+    load_next_page(state)
+    st.rerun()
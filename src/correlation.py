@@ -0,0 +1,237 @@
+# src/correlation.py
+import contextlib
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+from scipy.cluster.hierarchy import leaves_list, linkage
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial.distance import squareform
+
+METHODS = ['pearson', 'spearman']
+
+class CorrelationEngine:
+    def __init__(self, method='pearson', block_size=256, workdir=None, out_of_core=None):
+        """
+        Pairwise Pearson or Spearman correlations of many numerical columns,
+        computed one pair of column blocks at a time, so the full matrix is
+        never materialized: memory is bounded by `block_size` columns of
+        data and a `block_size` x `block_size` result.
+
+        The data is staged column-major (each column contiguous), in memory
+        or, for data read in chunks, in a memory-mapped file, so that a
+        block of columns is one sequential read.
+
+        Missing values are handled like `DataFrame.corr`: each pair uses the
+        rows where both columns are present. For Spearman, columns are
+        ranked once with missing values left out, which equals pandas when
+        there are no missing values.
+
+        Args:
+            method: 'pearson' or 'spearman'.
+
+            block_size: Number of columns per block.
+
+            workdir: Directory of the staged data (default: a temporary
+                directory, removed by `close`).
+
+            out_of_core: Stage to disk. Defaults to True for chunked input
+                and False for a DataFrame.
+        """
+        if method not in METHODS:
+            raise ValueError("Invalid method. Choose either 'pearson' or 'spearman'.")
+        self.method = method
+        self.block_size = block_size
+        self.workdir = workdir
+        self.out_of_core = out_of_core
+        self._own_workdir = False
+        self.columns = []
+        self.rows = 0
+        self._data = None  # columns x rows, centered
+        self._missing = None  # per column: has missing values
+        self._norms = None  # per column: norm of the centered values
+
+    # Staging
+
+    def _stage(self, chunks, out_of_core):
+        if out_of_core and self.workdir is None:
+            self.workdir = tempfile.mkdtemp(prefix='correlation-')
+            self._own_workdir = True
+        rows_path = os.path.join(self.workdir, 'rows.f64') if out_of_core else None
+        stripes = []
+        sums = counts = None
+        with open(rows_path, 'wb') if out_of_core else contextlib.nullcontext() as f:
+            for chunk in chunks:
+                numeric = chunk.select_dtypes(include='number')
+                if not self.columns:
+                    self.columns = list(numeric.columns)
+                    sums = np.zeros(len(self.columns))
+                    counts = np.zeros(len(self.columns))
+                values = numeric[self.columns].to_numpy(dtype='float64')
+                sums += np.nansum(values, axis=0)
+                counts += (~np.isnan(values)).sum(axis=0)
+                self.rows += len(values)
+                if out_of_core:
+                    f.write(np.ascontiguousarray(values).tobytes())
+                else:
+                    stripes.append(values)
+        means = sums / np.maximum(counts, 1)
+
+        d = len(self.columns)
+        if out_of_core:
+            rows = np.memmap(rows_path, dtype='float64', mode='r', shape=(self.rows, d))
+            data = np.memmap(os.path.join(self.workdir, 'columns.f64'), dtype='float64', mode='w+', shape=(d, self.rows))
+            stripe = max(1, (64 << 20) // (8 * max(d, 1)))
+            for start in range(0, self.rows, stripe):
+                data[:, start : start + stripe] = rows[start : start + stripe].T
+            del rows
+            os.remove(rows_path)
+        else:
+            data = np.concatenate(stripes).T.copy() if stripes else np.zeros((d, 0))
+        return data, means
+
+    def fit(self, data):
+        """
+        Stage the numerical columns of a DataFrame or of an iterable of
+        DataFrame chunks (e.g. `load_data(path, chunksize)`).
+        """
+        if isinstance(data, pd.DataFrame):
+            chunks, out_of_core = [data], bool(self.out_of_core)
+        else:
+            chunks, out_of_core = data, self.out_of_core is not False
+        self._data, means = self._stage(chunks, out_of_core)
+
+        self._missing = np.zeros(len(self.columns), dtype=bool)
+        self._norms = np.zeros(len(self.columns))
+        for i in range(len(self.columns)):
+            column = np.array(self._data[i])
+            if self.method == 'spearman':
+                column = pd.Series(column).rank().to_numpy(copy=True)
+                mean = np.nanmean(column) if len(column) else 0.0
+            else:
+                mean = means[i]
+            # Centering does not change correlations and avoids cancellation
+            column -= mean
+            self._missing[i] = np.isnan(column).any()
+            self._norms[i] = np.sqrt(np.nansum(column ** 2))
+            self._data[i] = column
+        return self
+
+    # Blocks
+
+    def _block(self, start, stop):
+        return np.asarray(self._data[start:stop])
+
+    def _correlate(self, a, b, index_a, index_b):
+        """
+        Correlations between two blocks of staged columns (a x b array);
+        `index_a` and `index_b` select the blocks' columns.
+        """
+        if not (self._missing[index_a].any() or self._missing[index_b].any()):
+            with np.errstate(invalid='ignore', divide='ignore'):
+                return (a @ b.T) / np.outer(self._norms[index_a], self._norms[index_b])
+
+        # Pairwise complete observations: sums over the rows where both are present
+        mask_a, mask_b = (~np.isnan(a)).astype('float64'), (~np.isnan(b)).astype('float64')
+        a0, b0 = np.nan_to_num(a), np.nan_to_num(b)
+        n = mask_a @ mask_b.T
+        sum_a, sum_b = a0 @ mask_b.T, mask_a @ b0.T
+        with np.errstate(invalid='ignore', divide='ignore'):
+            cov = a0 @ b0.T - sum_a * sum_b / n
+            var_a = (a0 ** 2) @ mask_b.T - sum_a ** 2 / n
+            var_b = mask_a @ (b0 ** 2).T - sum_b ** 2 / n
+            r = cov / np.sqrt(var_a * var_b)
+        r[n < 2] = np.nan
+        return r
+
+    def _block_ranges(self):
+        d = len(self.columns)
+        return [(start, min(start + self.block_size, d)) for start in range(0, d, self.block_size)]
+
+    def top_pairs(self, k=50):
+        """
+        The `k` column pairs with the largest absolute correlation, as a
+        DataFrame with columns feature_a, feature_b and correlation.
+        """
+        best_abs = np.zeros(0)
+        best_i = best_j = np.zeros(0, dtype=np.int64)
+        best_r = np.zeros(0)
+        ranges = self._block_ranges()
+        for x, a_slice in enumerate(ranges):
+            a = self._block(*a_slice)
+            for b_slice in ranges[x:]:
+                b = a if b_slice == a_slice else self._block(*b_slice)
+                r = self._correlate(a, b, slice(*a_slice), slice(*b_slice))
+                i, j = np.indices(r.shape)
+                i, j = i + a_slice[0], j + b_slice[0]
+                keep = i < j
+                values, i, j = r[keep], i[keep], j[keep]
+                strength = np.nan_to_num(np.abs(values), nan=-1.0)
+                if len(strength) > k:
+                    top = np.argpartition(-strength, k - 1)[:k]
+                    values, i, j, strength = values[top], i[top], j[top], strength[top]
+                best_abs = np.concatenate([best_abs, strength])
+                best_i, best_j = np.concatenate([best_i, i]), np.concatenate([best_j, j])
+                best_r = np.concatenate([best_r, values])
+                if len(best_abs) > k:
+                    top = np.argpartition(-best_abs, k - 1)[:k]
+                    best_abs, best_i, best_j, best_r = best_abs[top], best_i[top], best_j[top], best_r[top]
+        order = np.argsort(-best_abs, kind='stable')
+        return pd.DataFrame({
+            'feature_a': [self.columns[i] for i in best_i[order]],
+            'feature_b': [self.columns[j] for j in best_j[order]],
+            'correlation': best_r[order],
+        })
+
+    def submatrix(self, columns, reorder=True):
+        """
+        Correlation matrix of a few columns, optionally reordered by
+        hierarchical clustering so correlated columns are adjacent.
+        """
+        index = [self.columns.index(c) for c in columns]
+        block = np.stack([np.asarray(self._data[i]) for i in index])
+        r = self._correlate(block, block, index, index)
+        np.fill_diagonal(r, 1.0)
+        matrix = pd.DataFrame(r, index=list(columns), columns=list(columns))
+        if reorder and len(columns) > 2:
+            distance = 1 - np.abs(np.nan_to_num(r))
+            np.fill_diagonal(distance, 0.0)
+            order = leaves_list(linkage(squareform(np.clip(distance, 0, None), checks=False), 'average'))
+            matrix = matrix.iloc[order, order]
+        return matrix
+
+    def clusters(self, pairs, threshold=0.5, max_size=40):
+        """
+        Groups of columns connected by pairs (from `top_pairs`) with an
+        absolute correlation of at least `threshold`, largest first. Groups
+        above `max_size` keep their most connected columns.
+        """
+        strong = pairs[pairs['correlation'].abs() >= threshold]
+        if strong.empty:
+            return []
+        names = pd.Index(pd.unique(strong[['feature_a', 'feature_b']].to_numpy().ravel()))
+        i, j = names.get_indexer(strong['feature_a']), names.get_indexer(strong['feature_b'])
+        graph = coo_matrix((np.ones(len(i)), (i, j)), shape=(len(names), len(names)))
+        _, labels = connected_components(graph, directed=False)
+        degree = np.bincount(np.concatenate([i, j]), minlength=len(names))
+
+        groups = []
+        for label in np.unique(labels):
+            members = np.flatnonzero(labels == label)
+            members = members[np.argsort(-degree[members], kind='stable')][:max_size]
+            groups.append([names[m] for m in members])
+        return sorted(groups, key=len, reverse=True)
+
+    def close(self):
+        self._data = None
+        if self._own_workdir and self.workdir and os.path.exists(self.workdir):
+            shutil.rmtree(self.workdir)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
@@ -1,9 +1,120 @@
 # src/data_ingestion.py
+import argparse
+
+import numpy as np
 import pandas as pd
 
-def load_data(file_path):
+PARQUET_EXTENSIONS = ('.parquet', '.pq')
+
+def is_parquet(file_path):
+    return str(file_path).endswith(PARQUET_EXTENSIONS)
+
+def load_data(file_path, chunksize=None, columns=None):
+    """
+    Load a CSV or Parquet file (by extension). With `chunksize`, return an
+    iterator of DataFrames of at most `chunksize` rows instead, with the
+    same column dtypes as a full read (see `infer_dtypes`). `columns`
+    restricts loading to those columns; with Parquet, the other columns are
+    not read from disk at all.
+    """
     print(f"Loading data from {file_path}")
-    return pd.read_csv(file_path)
+    if is_parquet(file_path):
+        if chunksize is None:
+            return pd.read_parquet(file_path, columns=columns)
+        import pyarrow.parquet as pq
+
+        batches = pq.ParquetFile(file_path).iter_batches(batch_size=chunksize, columns=columns)
+        return (batch.to_pandas() for batch in batches)
+    if chunksize is None:
+        return pd.read_csv(file_path, usecols=columns)
+    dtypes = infer_dtypes(file_path, chunksize)
+    return pd.read_csv(file_path, chunksize=chunksize, usecols=columns, dtype=dtypes)
+
+def save_data(df, output_file, schema=None, compression='zstd'):
+    """
+    Write a DataFrame to CSV or Parquet (by extension). Parquet files carry
+    their schema, `schema` if given (values are cast to it) or else the one
+    of `df`, so readers need no type inference.
+    """
+    if is_parquet(output_file):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        table = pa.Table.from_pandas(df, schema=schema, preserve_index=False)
+        pq.write_table(table, output_file, compression=compression)
+    else:
+        df.to_csv(output_file, index=False)
+
+def _common_dtype(a, b):
+    if a == b:
+        return a
+    # pandas falls back to object for booleans mixed with anything else
+    if a.kind == 'b' or b.kind == 'b':
+        return np.dtype(object)
+    return np.result_type(a, b)
+
+def _is_boolean(column):
+    """True if a parsed column holds only booleans and missing values."""
+    if column.dtype == bool:
+        return True
+    values = column.dropna()
+    if values.empty:
+        return True
+    return column.dtype == object and isinstance(values.iloc[0], bool) and values.map(type).eq(bool).all()
+
+def infer_dtypes(file_path, chunksize=100_000):
+    """
+    Infer the dtype pandas would give each column when reading the whole
+    file, one chunk at a time. Chunks are parsed independently, so without
+    this a column can be int in one chunk and float (missing values) or
+    object in another, which changes how it is written back.
+
+    Booleans with missing values, which a full read leaves as Python objects
+    and a read with an explicit object dtype would turn into strings, get
+    the nullable 'boolean' dtype.
+    """
+    dtypes = {}
+    boolean = {}
+    for chunk in pd.read_csv(file_path, chunksize=chunksize):
+        for column, dtype in chunk.dtypes.items():
+            dtypes[column] = _common_dtype(dtypes[column], dtype) if column in dtypes else dtype
+            boolean[column] = boolean.get(column, True) and _is_boolean(chunk[column])
+    for column, dtype in dtypes.items():
+        if dtype == object and boolean[column]:
+            dtypes[column] = 'boolean'
+    return dtypes
+
+def write_chunks(chunks, output_file, schema=None, compression='zstd'):
+    """
+    Write DataFrame chunks to one CSV or Parquet file (by extension). In
+    Parquet, every chunk becomes a row group with the schema of the first
+    chunk, or `schema` if given.
+    """
+    if not is_parquet(output_file):
+        write_csv_chunks(chunks, output_file)
+        return
+    # pyarrow is only needed for Parquet
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+
+    writer = None
+    try:
+        for chunk in chunks:
+            table = pa.Table.from_pandas(chunk, schema=schema, preserve_index=False)
+            if writer is None:
+                schema = table.schema
+                writer = pq.ParquetWriter(output_file, schema, compression=compression)
+            writer.write_table(table)
+    finally:
+        if writer is not None:
+            writer.close()
+
+def write_csv_chunks(chunks, output_file):
+    """Write DataFrame chunks to one CSV file, with the header written once."""
+    header = True
+    for chunk in chunks:
+        chunk.to_csv(output_file, index=False, mode='w' if header else 'a', header=header)
+        header = False
 
 def clean_data(df):
     print("Cleaning data")
@@ -12,8 +123,24 @@ def clean_data(df):
     df.rename(columns=lambda x: x.strip().lower().replace(' ', '_'), inplace=True)  # Normalize column names
     return df
 
+def clean_file(input_file, output_file, chunksize=None):
+    """
+    Clean a CSV or Parquet file into `output_file` (either format). With
+    `chunksize`, the file is streamed in chunks of that many rows, so memory
+    use does not grow with the file size; the output is the same as with
+    the in-memory path.
+    """
+    if chunksize is None:
+        save_data(clean_data(load_data(input_file)), output_file)
+        return
+    write_chunks((clean_data(chunk) for chunk in load_data(input_file, chunksize)), output_file)
+
 if __name__ == "__main__":
-    raw_data = load_data('data/raw/dataset_HTN.csv')
-    cleaned_data = clean_data(raw_data)
-    cleaned_data.to_csv('data/processed/processed_HTN.csv', index=False)
-    print("Data cleaned and saved to data/processed/processed_HTN.csv")
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--chunksize', type=int, default=None, help="stream the file in chunks of this many rows")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help="format of the processed file")
+    args = parser.parse_args()
+
+    output_file = f'data/processed/processed_HTN.{args.format}'
+    clean_file('data/raw/dataset_HTN.csv', output_file, args.chunksize)
+    print(f"Data cleaned and saved to {output_file}")
@@ -1,21 +1,171 @@
 # src/data_preprocessing.py
+import argparse
+import json
+import os
+
+import numpy as np
 import pandas as pd
-from sklearn.preprocessing import StandardScaler, OneHotEncoder
+from sklearn.preprocessing import StandardScaler
+
+from src.data_ingestion import load_data, save_data, write_chunks
+
+NUMERIC_COLUMNS = ['age', 'blood_pressure']
+CATEGORICAL_COLUMN = 'gender'
+
+ENCODINGS = ['onehot', 'sparse', 'codes']
+
+class Preprocessor:
+    """
+    Standard scaling of the numeric columns and encoding of the categorical
+    column, fitted once (over one DataFrame or a stream of chunks), saved
+    to disk and then applied to any number of batches without refitting.
+
+    Encodings of the categorical column:
+        'onehot': one float column per category, like `OneHotEncoder`
+            followed by `toarray()` (the default, compatible output),
+        'sparse': the same columns as pandas sparse arrays (zeros are not
+            stored; for in-memory use, Parquet cannot store them),
+        'codes': the column is replaced by the integer code of the category
+            (int8 or int16).
+    Categories not seen during fitting are encoded as all zeros or code -1.
+    """
+
+    def __init__(self, numeric_columns=None, categorical_column=CATEGORICAL_COLUMN, encoding='onehot'):
+        if encoding not in ENCODINGS:
+            raise ValueError("Invalid encoding. Choose either 'onehot', 'sparse' or 'codes'.")
+        self.numeric_columns = list(numeric_columns or NUMERIC_COLUMNS)
+        self.categorical_column = categorical_column
+        self.encoding = encoding
+        self.scaler = StandardScaler()
+        self.categories = None
+        self._seen = set()
+
+    def partial_fit(self, df):
+        """Update the scaler statistics and the categories with one chunk."""
+        self.scaler.partial_fit(df[self.numeric_columns])
+        self._seen.update(df[self.categorical_column].dropna().unique())
+        self.categories = sorted(self._seen)
+        return self
+
+    def fit(self, chunks):
+        """Fit on an iterable of DataFrame chunks (a list of one for in-memory data)."""
+        for chunk in chunks:
+            self.partial_fit(chunk)
+        return self
+
+    def transform(self, df):
+        """
+        Transform `df` in place (scaled columns are overwritten, the encoded
+        columns replace the categorical column) and return it.
+        """
+        if self.categories is None:
+            raise ValueError("Preprocessor not fitted.")
+        for column, mean, scale in zip(self.numeric_columns, self.scaler.mean_, self.scaler.scale_):
+            values = df[column].to_numpy(dtype='float64', copy=True)
+            values -= mean
+            values /= scale
+            df[column] = values
+
+        codes = pd.Index(self.categories).get_indexer(df.pop(self.categorical_column))
+        if self.encoding == 'codes':
+            dtype = 'int8' if len(self.categories) < 128 else 'int16'
+            df[self.categorical_column] = codes.astype(dtype)
+        else:
+            for code, category in enumerate(self.categories):
+                indicator = (codes == code).astype('float64')
+                if self.encoding == 'sparse':
+                    indicator = pd.arrays.SparseArray(indicator, fill_value=0.0)
+                df[category] = indicator
+        return df
 
-def preprocess_data(df):
+    def save(self, path):
+        """Write the fitted parameters to a JSON file."""
+        state = {
+            'numeric_columns': self.numeric_columns,
+            'categorical_column': self.categorical_column,
+            'encoding': self.encoding,
+            'categories': self.categories,
+            'mean': self.scaler.mean_.tolist(),
+            'var': self.scaler.var_.tolist(),
+            'scale': self.scaler.scale_.tolist(),
+            'n_samples_seen': int(np.max(self.scaler.n_samples_seen_)),
+        }
+        with open(path, 'w') as f:
+            json.dump(state, f, indent=2)
+
+    @classmethod
+    def load(cls, path):
+        """Load a preprocessor written by `save`, ready to transform."""
+        with open(path) as f:
+            state = json.load(f)
+        preprocessor = cls(state['numeric_columns'], state['categorical_column'], state['encoding'])
+        preprocessor.categories = state['categories']
+        preprocessor._seen = set(state['categories'])
+        scaler = preprocessor.scaler
+        scaler.mean_ = np.array(state['mean'])
+        scaler.var_ = np.array(state['var'])
+        scaler.scale_ = np.array(state['scale'])
+        scaler.n_samples_seen_ = state['n_samples_seen']
+        scaler.n_features_in_ = len(state['numeric_columns'])
+        scaler.feature_names_in_ = np.array(state['numeric_columns'], dtype=object)
+        return preprocessor
+
+def preprocess_data(df, preprocessor=None):
+    """
+    Preprocess a DataFrame, fitting a new `Preprocessor` on it unless a
+    fitted one is given.
+    """
     print("Preprocessing data")
-    # Example preprocessing steps
-    scaler = StandardScaler()
-    df[['age', 'blood_pressure']] = scaler.fit_transform(df[['age', 'blood_pressure']])
-    
-    encoder = OneHotEncoder()
-    encoded_features = encoder.fit_transform(df[['gender']]).toarray()
-    df = df.join(pd.DataFrame(encoded_features, columns=encoder.categories_[0]))
-    
-    return df.drop('gender', axis=1)
+    if preprocessor is None:
+        preprocessor = Preprocessor().fit([df])
+    return preprocessor.transform(df)
+
+def preprocess_file(input_file, output_file, chunksize=None, preprocessor=None, preprocessor_path=None):
+    """
+    Preprocess a CSV or Parquet file into `output_file` (either format).
+
+    The preprocessor is, in order of preference, `preprocessor`, the one
+    saved at `preprocessor_path` if that file exists, or a new one fitted
+    on `input_file` (and saved to `preprocessor_path` if given). A fitted
+    preprocessor turns this into a single transform-only pass.
+
+    With `chunksize`, the file is streamed in chunks of that many rows;
+    fitting is then a separate pass that reads only the columns it uses.
+    The output matches the in-memory path up to floating-point rounding of
+    the fitted mean and variance.
+    """
+    if preprocessor is None and preprocessor_path and os.path.exists(preprocessor_path):
+        preprocessor = Preprocessor.load(preprocessor_path)
+
+    df = load_data(input_file) if chunksize is None else None
+
+    if preprocessor is None:
+        preprocessor = Preprocessor()
+        if df is not None:
+            preprocessor.fit([df])
+        else:
+            fit_columns = preprocessor.numeric_columns + [preprocessor.categorical_column]
+            preprocessor.fit(load_data(input_file, chunksize, columns=fit_columns))
+        if preprocessor_path:
+            preprocessor.save(preprocessor_path)
+
+    if df is not None:
+        save_data(preprocess_data(df, preprocessor), output_file)
+        return
+
+    print("Preprocessing data")
+    chunks = load_data(input_file, chunksize)
+    write_chunks((preprocessor.transform(chunk) for chunk in chunks), output_file)
 
 if __name__ == "__main__":
-    data = pd.read_csv('data/processed/processed_HTN.csv')
-    preprocessed_data = preprocess_data(data)
-    preprocessed_data.to_csv('data/processed/preprocessed_HTN.csv', index=False)
-    print("Data preprocessed and saved to data/processed/preprocessed_HTN.csv")
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--chunksize', type=int, default=None, help="stream the file in chunks of this many rows")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help="format of the input and output files")
+    parser.add_argument('--preprocessor', default='data/processed/preprocessor_HTN.json',
+                        help="fitted preprocessor to apply; fitted on the input and saved here if missing")
+    args = parser.parse_args()
+
+    output_file = f'data/processed/preprocessed_HTN.{args.format}'
+    preprocess_file(f'data/processed/processed_HTN.{args.format}', output_file, args.chunksize,
+                    preprocessor_path=args.preprocessor)
+    print(f"Data preprocessed and saved to {output_file}")
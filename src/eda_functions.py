@@ -1,8 +1,17 @@
 # scripts/eda.py
+import argparse
+import json
+import os
+
 import pandas as pd
 import seaborn as sns
 import matplotlib.pyplot as plt
 
+from src.correlation import CorrelationEngine
+from src.data_ingestion import load_data as load_chunks
+from src.eda_runner import run_distribution_plots, run_streaming_distribution_plots
+from src.eda_streaming import StreamingSummary
+
 def load_data(file_path):
     """Load dataset from a CSV file."""
     print(f"Loading data from {file_path}")
@@ -15,28 +24,44 @@ def describe_data(df):
     description.to_csv('plots/descriptive_statistics.csv')
     print("Descriptive statistics saved to plots/descriptive_statistics.csv")
 
-def plot_distributions(df):
-    """Plot and save distributions of numerical features."""
+def plot_distributions(df, max_workers=None, force=False):
+    """
+    Plot and save distributions of numerical features, in parallel, skipping
+    figures whose column is unchanged since the last run (see
+    `src.eda_runner.run_distribution_plots`).
+    """
     print("Plotting distributions")
-    numerical_features = df.select_dtypes(include=['float64', 'int64']).columns
-    for feature in numerical_features:
-        plt.figure(figsize=(10, 6))
-        sns.histplot(df[feature], kde=True)
-        plt.title(f'Distribution of {feature}')
-        plt.savefig(f'plots/{feature}_distribution.png')
-        plt.close()
-    print("Distributions saved to plots/")
-
-def plot_correlations(df):
-    """Plot and save correlation heatmap."""
+    report = run_distribution_plots(df, 'plots', max_workers=max_workers, force=force)
+    print(f"Distributions saved to plots/ ({len(report['rendered'])} drawn, {len(report['skipped'])} unchanged)")
+
+def plot_correlations(data, method='pearson', k=50, threshold=0.5, max_full=30, max_heatmaps=10, block_size=256, output_dir='plots'):
+    """
+    Compute correlations in column blocks (see `src.correlation`), save the
+    `k` most correlated pairs to top_correlations.csv and plot heatmaps.
+    With at most `max_full` numerical columns that is the full matrix;
+    otherwise one heatmap for each of the `max_heatmaps` largest clusters
+    of columns joined by top pairs with |correlation| >= `threshold`.
+    `data` is a DataFrame or an iterable of DataFrame chunks.
+    """
     print("Plotting correlations")
-    correlation_matrix = df.corr()
-    plt.figure(figsize=(12, 8))
-    sns.heatmap(correlation_matrix, annot=True, cmap='coolwarm', fmt='.2f')
-    plt.title('Correlation Heatmap')
-    plt.savefig('plots/correlation_heatmap.png')
-    plt.close()
-    print("Correlation heatmap saved to plots/correlation_heatmap.png")
+    with CorrelationEngine(method, block_size) as engine:
+        engine.fit(data)
+        pairs = engine.top_pairs(k)
+        pairs.to_csv(os.path.join(output_dir, 'top_correlations.csv'), index=False)
+        if len(engine.columns) <= max_full:
+            groups = {'correlation_heatmap.png': engine.columns}
+        else:
+            clusters = engine.clusters(pairs, threshold)[:max_heatmaps]
+            groups = {f'correlation_cluster_{i}.png': columns for i, columns in enumerate(clusters)}
+        for name, columns in groups.items():
+            matrix = engine.submatrix(columns)
+            plt.figure(figsize=(12, 8))
+            sns.heatmap(matrix, annot=len(columns) <= 15, cmap='coolwarm', fmt='.2f', vmin=-1, vmax=1)
+            plt.title(f'Correlation Heatmap ({method})')
+            plt.savefig(os.path.join(output_dir, name))
+            plt.close()
+    print(f"Top {len(pairs)} correlated pairs and {len(groups)} heatmaps saved to {output_dir}/")
+    return pairs
 
 def plot_pairwise_relationships(df):
     """Plot and save pairwise relationships in the dataset."""
@@ -46,7 +71,67 @@ def plot_pairwise_relationships(df):
     plt.close()
     print("Pairwise relationships saved to plots/pairplot.png")
 
+def pairplot_columns(sample, max_columns=6, strata_column=None):
+    """
+    The `max_columns` numerical columns of highest variance in the sample, in
+    their original order, so that the pairplot stays small for wide data.
+    """
+    numeric = sample.select_dtypes(include='number').drop(columns=strata_column, errors='ignore')
+    top = set(numeric.var().nlargest(max_columns).index)
+    return [column for column in numeric.columns if column in top]
+
+def streaming_eda(file_path, chunksize=100_000, sample_size=10_000, strata_column=None, seed=0, output_dir='plots/streaming',
+                  columns=None, max_pairplot_columns=6, max_workers=None, force=False):
+    """
+    EDA for datasets larger than memory. Statistics, histograms and
+    approximate quantiles (with their error bound, 'quantile_error') and
+    the most frequent values of other columns (with 'count_error') come
+    from one pass over the file in chunks; the KDE and pairwise plots use a
+    reproducible stratified sample of `sample_size` rows. Writes the
+    statistics, a sample report with standard errors and the plots to
+    `output_dir`. Distributions are drawn in parallel and only for columns
+    that changed (see `src.eda_runner`); the pairplot shows `columns`, or
+    the `max_pairplot_columns` columns of highest sample variance.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    summary = StreamingSummary(strata_column, sample_size, seed)
+    for chunk in load_chunks(file_path, chunksize):
+        summary.update(chunk)
+
+    description = summary.describe()
+    print(description)
+    description.to_csv(os.path.join(output_dir, 'descriptive_statistics.csv'))
+    summary.describe_categories().to_csv(os.path.join(output_dir, 'category_counts.csv'), index=False)
+    with open(os.path.join(output_dir, 'sample_report.json'), 'w') as f:
+        json.dump(summary.sample_report(), f, indent=2, default=str)
+
+    print("Plotting distributions")
+    sample = summary.sample()
+    report = run_streaming_distribution_plots(summary, sample, output_dir, max_workers=max_workers, force=force)
+    print(f"{len(report['rendered'])} distributions drawn, {len(report['skipped'])} unchanged")
+
+    print("Plotting pairwise relationships")
+    if columns is None:
+        columns = pairplot_columns(sample, max_pairplot_columns, strata_column)
+    sns.pairplot(sample, vars=columns, hue=strata_column)
+    plt.savefig(os.path.join(output_dir, 'pairplot.png'))
+    plt.close()
+    print(f"Streaming EDA saved to {output_dir}/")
+    return summary
+
 if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--in-memory', action='store_true', help="load the whole file instead of streaming it")
+    parser.add_argument('--chunksize', type=int, default=100_000)
+    parser.add_argument('--sample-size', type=int, default=10_000)
+    parser.add_argument('--strata', default=None, help="column to stratify the sample by")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    if not args.in_memory:
+        streaming_eda('data/processed/preprocessed_HTN.csv', args.chunksize, args.sample_size, args.strata, args.seed)
+        raise SystemExit
+
     # Load the preprocessed dataset
     data = load_data('data/processed/preprocessed_HTN.csv')
     
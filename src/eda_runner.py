@@ -0,0 +1,210 @@
+# src/eda_runner.py
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import matplotlib
+
+# Headless backend, also inherited by the worker processes
+matplotlib.use('Agg')
+
+import matplotlib.pyplot as plt
+import numpy as np
+import pandas as pd
+import seaborn as sns
+
+# Bump when the rendering code changes, so existing figures are redrawn
+RENDER_VERSION = 1
+
+DISTRIBUTION_PARAMS = {'kde': True, 'bins': 'auto', 'figsize': [10, 6], 'dpi': 100}
+
+STREAMING_DISTRIBUTION_PARAMS = {'bins': 50, 'figsize': [10, 6], 'dpi': 100}
+
+def column_hash(series):
+    """Content hash of a column: name, dtype and values (not the index)."""
+    digest = hashlib.sha256()
+    digest.update(f"{series.name}|{series.dtype}|".encode('utf-8'))
+    digest.update(pd.util.hash_pandas_object(series, index=False).to_numpy().tobytes())
+    return digest.hexdigest()
+
+def params_hash(kind, params):
+    payload = json.dumps({'kind': kind, 'params': params, 'version': RENDER_VERSION}, sort_keys=True)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+def render_distribution(values, feature, path, params):
+    """Draw the histogram (with KDE) of one column and save it to `path`."""
+    start = time.perf_counter()
+    fig, ax = plt.subplots(figsize=params['figsize'])
+    sns.histplot(values, kde=params['kde'], bins=params['bins'], ax=ax)
+    ax.set_title(f'Distribution of {feature}')
+    ax.set_xlabel(feature)
+    fig.savefig(path, dpi=params['dpi'])
+    plt.close(fig)
+    return time.perf_counter() - start
+
+def render_streaming_distribution(counts, edges, values, feature, path, params):
+    """
+    Draw the histogram of one column from its streaming counts (all rows),
+    with a KDE of the sampled `values` over it, and save it to `path`.
+    """
+    start = time.perf_counter()
+    fig, ax = plt.subplots(figsize=params['figsize'])
+    density = counts / (counts.sum() * np.diff(edges)) if counts.sum() else counts
+    ax.stairs(density, edges, fill=True, alpha=0.5, label=f'all rows ({counts.sum()})')
+    if len(values) > 1:
+        sns.kdeplot(values, label=f'KDE of sample ({len(values)})', ax=ax)
+    ax.set_title(f'Distribution of {feature}')
+    ax.set_xlabel(feature)
+    ax.set_ylabel('Density')
+    ax.legend()
+    fig.savefig(path, dpi=params['dpi'])
+    plt.close(fig)
+    return time.perf_counter() - start
+
+def load_manifest(output_dir):
+    path = os.path.join(output_dir, 'manifest.json')
+    if not os.path.exists(path):
+        return {}
+    with open(path) as f:
+        return json.load(f)
+
+def save_manifest(output_dir, manifest):
+    path = os.path.join(output_dir, 'manifest.json')
+    tmp = path + '.tmp'
+    with open(tmp, 'w') as f:
+        json.dump(manifest, f, indent=2, sort_keys=True)
+    os.replace(tmp, path)
+
+def run_plots(kind, render, inputs, output_dir, params, max_workers=None, force=False):
+    """
+    Render one figure per column in a process pool, skipping figures whose
+    input and plot parameters are unchanged since the figure on disk was
+    drawn. `manifest.json` in `output_dir` records, per artifact, the input
+    hashes, parameters and render time.
+
+    Args:
+        kind: Name of the figure kind, part of the file names and hashes.
+
+        render: Picklable function called as `render(*args, feature, path,
+            params)` in a worker; returns the render time.
+
+        inputs: Dictionary mapping each column to its input hash and the
+            arguments of `render`. Only the arguments are sent to workers.
+
+        output_dir: Directory of the figures and the manifest.
+
+        params: Plot parameters.
+
+        max_workers: Number of worker processes (default: one per CPU).
+
+        force: Redraw every figure.
+
+    Returns:
+        Dictionary with the lists of "rendered" and "skipped" artifact paths.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+    manifest = load_manifest(output_dir)
+    settings_hash = params_hash(kind, params)
+
+    tasks = []
+    skipped = []
+    for feature, (input_hash, args) in inputs.items():
+        path = os.path.join(output_dir, f'{feature}_{kind}.png')
+        entry = manifest.get(path)
+        if (
+            not force
+            and entry is not None
+            and entry['input_hash'] == input_hash
+            and entry['params_hash'] == settings_hash
+            and os.path.exists(path)
+        ):
+            skipped.append(path)
+            continue
+        tasks.append((feature, path, input_hash, args))
+
+    rendered = []
+    if tasks:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            futures = [
+                pool.submit(render, *args, feature, path, params)
+                for feature, path, _, args in tasks
+            ]
+            try:
+                for (feature, path, input_hash, _), future in zip(tasks, futures):
+                    manifest[path] = {
+                        'kind': kind,
+                        'column': feature,
+                        'input_hash': input_hash,
+                        'params_hash': settings_hash,
+                        'params': params,
+                        'render_seconds': round(future.result(), 3),
+                        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                    }
+                    rendered.append(path)
+            finally:
+                # Keep the figures that were drawn even if another one failed
+                save_manifest(output_dir, manifest)
+
+    return {'rendered': rendered, 'skipped': skipped}
+
+def run_distribution_plots(df, output_dir='plots', max_workers=None, params=None, force=False):
+    """
+    Render the distribution plot of every numerical column with `run_plots`,
+    redrawing only the columns whose content or plot parameters changed.
+
+    Args:
+        df: The dataset.
+
+        output_dir: Directory of the figures and the manifest.
+
+        max_workers: Number of worker processes (default: one per CPU).
+
+        params: Plot parameters, overriding `DISTRIBUTION_PARAMS`.
+
+        force: Redraw every figure.
+
+    Returns:
+        Dictionary with the lists of "rendered" and "skipped" artifact paths.
+    """
+    params = dict(DISTRIBUTION_PARAMS, **(params or {}))
+    # Workers receive only the column they draw, not the DataFrame
+    inputs = {
+        feature: (column_hash(df[feature]), (df[feature].to_numpy(),))
+        for feature in df.select_dtypes(include=['float64', 'int64']).columns
+    }
+    return run_plots('distribution', render_distribution, inputs, output_dir, params, max_workers, force)
+
+def run_streaming_distribution_plots(summary, sample, output_dir, max_workers=None, params=None, force=False):
+    """
+    Render the distribution plot of every column of a `StreamingSummary`
+    (counts of all rows, KDE of the `sample`) with `run_plots`, redrawing
+    only the columns whose counts, sample or plot parameters changed.
+
+    Args:
+        summary: StreamingSummary of the dataset.
+
+        sample: Its sample, as returned by `summary.sample()`.
+
+        output_dir: Directory of the figures and the manifest.
+
+        max_workers: Number of worker processes (default: one per CPU).
+
+        params: Plot parameters, overriding `STREAMING_DISTRIBUTION_PARAMS`.
+
+        force: Redraw every figure.
+
+    Returns:
+        Dictionary with the lists of "rendered" and "skipped" artifact paths.
+    """
+    params = dict(STREAMING_DISTRIBUTION_PARAMS, **(params or {}))
+    inputs = {}
+    for feature, column in summary.columns.items():
+        counts, edges = column['histogram'].coarse(params['bins'])
+        values = sample[feature].dropna() if feature in sample else pd.Series([], name=feature, dtype=float)
+        digest = hashlib.sha256(column_hash(values).encode('utf-8'))
+        digest.update(np.ascontiguousarray(counts).tobytes())
+        digest.update(np.ascontiguousarray(edges).tobytes())
+        inputs[feature] = (digest.hexdigest(), (counts, edges, values.to_numpy()))
+    return run_plots('distribution', render_streaming_distribution, inputs, output_dir, params, max_workers, force)
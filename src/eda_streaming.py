@@ -0,0 +1,289 @@
+# src/eda_streaming.py
+import heapq
+
+import numpy as np
+import pandas as pd
+
+def splitmix64(x):
+    """Counter-based hash of uint64 values to uniformly distributed uint64."""
+    # The multiplications are meant to wrap around
+    with np.errstate(over='ignore'):
+        x = np.asarray(x, dtype=np.uint64) + np.uint64(0x9E3779B97F4A7C15)
+        x = (x ^ (x >> np.uint64(30))) * np.uint64(0xBF58476D1CE4E5B9)
+        x = (x ^ (x >> np.uint64(27))) * np.uint64(0x94D049BB133111EB)
+        return x ^ (x >> np.uint64(31))
+
+class StreamingHistogram:
+    """
+    Fixed number of equal-width bins whose range grows with the data: when a
+    value falls outside, adjacent bins are merged pairwise (doubling the
+    width) until it fits. Bin edges stay aligned, so merging loses no counts
+    and any quantile is known to within one bin width.
+    """
+
+    def __init__(self, bins=4096):
+        if bins % 2:
+            raise ValueError("The number of bins must be even.")
+        self.bins = bins
+        self.lo = None
+        self.width = None
+        self.counts = np.zeros(bins, dtype=np.int64)
+
+    @property
+    def hi(self):
+        return self.lo + self.bins * self.width
+
+    def _grow(self, downward):
+        merged = self.counts.reshape(-1, 2).sum(axis=1)
+        empty = np.zeros(self.bins // 2, dtype=np.int64)
+        self.width *= 2
+        if downward:
+            self.counts = np.concatenate([empty, merged])
+            self.lo -= (self.bins // 2) * self.width
+        else:
+            self.counts = np.concatenate([merged, empty])
+
+    def update(self, values):
+        values = values[np.isfinite(values)]
+        if len(values) == 0:
+            return
+        vmin, vmax = float(values.min()), float(values.max())
+        if self.lo is None:
+            self.lo = vmin
+            # Start fine enough for the first chunk; widths only grow later
+            self.width = (vmax - vmin) / self.bins or max(abs(vmin), 1.0) * 1e-9
+        while vmin < self.lo:
+            self._grow(downward=True)
+        while vmax >= self.hi:
+            self._grow(downward=False)
+        index = ((values - self.lo) / self.width).astype(np.int64)
+        self.counts += np.bincount(np.clip(index, 0, self.bins - 1), minlength=self.bins)
+
+    def quantile(self, q):
+        """Approximate q-quantile, linearly interpolated within its bin."""
+        total = self.counts.sum()
+        if total == 0:
+            return np.nan
+        cumulative = np.cumsum(self.counts)
+        rank = q * total
+        b = int(np.searchsorted(cumulative, rank, side='left'))
+        b = min(b, self.bins - 1)
+        before = cumulative[b] - self.counts[b]
+        fraction = (rank - before) / self.counts[b] if self.counts[b] else 0.0
+        return self.lo + (b + fraction) * self.width
+
+    def coarse(self, bins=50):
+        """Counts and edges over the occupied range, merged into at most `bins` bins."""
+        occupied = np.flatnonzero(self.counts)
+        if len(occupied) == 0:
+            return np.zeros(0, dtype=np.int64), np.zeros(1)
+        first, last = occupied[0], occupied[-1] + 1
+        group = -(-(last - first) // bins)
+        counts = self.counts[first:last]
+        counts = np.pad(counts, (0, -len(counts) % group)).reshape(-1, group).sum(axis=1)
+        edges = self.lo + self.width * (first + group * np.arange(len(counts) + 1))
+        return counts, edges
+
+class StreamingSummary:
+    def __init__(self, strata_column=None, sample_size=10_000, seed=0, bins=4096, max_categories=1000):
+        """
+        Summary statistics, histograms, approximate quantiles and a
+        reproducible stratified sample of a dataset, computed in one pass
+        over its chunks (`update` per chunk). Memory does not depend on the
+        number of rows.
+
+        The sample is a bottom-k sample: every row gets a pseudo-random key
+        derived from `seed` and its position, and each stratum keeps the rows
+        with the smallest keys. It is therefore the same for any chunk size,
+        and strata are sampled in proportion to their size.
+
+        Args:
+            strata_column: Column to stratify the sample by (None: a plain
+                uniform sample).
+
+            sample_size: Total number of sampled rows.
+
+            seed: Seed of the sample.
+
+            bins: Resolution of the per-column histograms; quantiles are
+                exact to within one bin width.
+
+            max_categories: Values counted per non-numeric column. Beyond
+                that, counts are kept with the Misra-Gries heavy-hitters
+                sketch: every value more frequent than rows / (max_categories
+                + 1) is kept, and counts are exact to within 'count_error'.
+        """
+        self.strata_column = strata_column
+        self.sample_size = sample_size
+        self.seed = seed
+        self.bins = bins
+        self.max_categories = max_categories
+        self.rows = 0
+        self.columns = {}
+        self.categories = {}
+        self._candidates = {}
+        self._strata_sizes = {}
+
+    def _column(self, name):
+        if name not in self.columns:
+            self.columns[name] = {
+                'count': 0,
+                'missing': 0,
+                'mean': 0.0,
+                'm2': 0.0,
+                'min': np.inf,
+                'max': -np.inf,
+                'histogram': StreamingHistogram(self.bins),
+            }
+        return self.columns[name]
+
+    def update(self, chunk):
+        for name in chunk.select_dtypes(include='number').columns:
+            values = chunk[name].to_numpy(dtype='float64')
+            stats = self._column(name)
+            present = values[~np.isnan(values)]
+            stats['missing'] += len(values) - len(present)
+            n = len(present)
+            if n:
+                # Chan et al. parallel update of count, mean and sum of squares
+                mean = present.mean()
+                m2 = ((present - mean) ** 2).sum()
+                total = stats['count'] + n
+                delta = mean - stats['mean']
+                stats['mean'] += delta * n / total
+                stats['m2'] += m2 + delta ** 2 * stats['count'] * n / total
+                stats['count'] = total
+                stats['min'] = min(stats['min'], present.min())
+                stats['max'] = max(stats['max'], present.max())
+                stats['histogram'].update(present)
+
+        for name in chunk.select_dtypes(exclude='number').columns:
+            self._count_categories(name, chunk[name])
+
+        positions = np.arange(self.rows, self.rows + len(chunk), dtype=np.uint64)
+        keys = splitmix64(positions ^ splitmix64(self.seed))
+        if self.strata_column:
+            groups = chunk.groupby(self.strata_column, dropna=False, sort=False).indices
+        else:
+            groups = {None: np.arange(len(chunk))}
+        for stratum, rows in groups.items():
+            stratum = None if pd.isna(stratum) else stratum
+            self._strata_sizes[stratum] = self._strata_sizes.get(stratum, 0) + len(rows)
+            candidates = chunk.iloc[rows].assign(_key=keys[rows])
+            previous = self._candidates.get(stratum)
+            if previous is not None:
+                candidates = pd.concat([previous, candidates])
+            # A stratum never gets more than the whole sample
+            self._candidates[stratum] = candidates.nsmallest(self.sample_size, '_key')
+        self.rows += len(chunk)
+        return self
+
+    def _count_categories(self, name, values):
+        """Misra-Gries update of the value counts of a column with one chunk."""
+        state = self.categories.setdefault(name, {'counts': {}, 'error': 0, 'truncated': False})
+        counts = state['counts']
+        for value, count in values.value_counts(dropna=False).items():
+            value = None if pd.isna(value) else value
+            counts[value] = counts.get(value, 0) + int(count)
+        if len(counts) > self.max_categories:
+            # Subtracting the (k+1)-th largest count leaves at most k values
+            cut = heapq.nlargest(self.max_categories + 1, counts.values())[-1]
+            state['counts'] = {v: c - cut for v, c in counts.items() if c > cut}
+            state['error'] += cut
+            state['truncated'] = True
+
+    def describe_categories(self, top=20):
+        """
+        The `top` most frequent values of each non-numeric column. 'count'
+        is a lower bound and 'count_error' the most the true count can be
+        higher (0 unless the column had more than `max_categories` values,
+        'truncated').
+        """
+        rows = []
+        for name, state in self.categories.items():
+            counts = sorted(state['counts'].items(), key=lambda item: -item[1])[:top]
+            for value, count in counts:
+                rows.append({
+                    'column': name,
+                    'value': value,
+                    'count': count,
+                    'count_error': state['error'],
+                    'truncated': state['truncated'],
+                })
+        return pd.DataFrame(rows, columns=['column', 'value', 'count', 'count_error', 'truncated'])
+
+    def describe(self):
+        """
+        Like `DataFrame.describe()`, plus the number of missing values and
+        'quantile_error', the maximum error of the quantile rows.
+        """
+        summary = {}
+        for name, stats in self.columns.items():
+            histogram = stats['histogram']
+            count = stats['count']
+            summary[name] = {
+                'count': count,
+                'mean': stats['mean'] if count else np.nan,
+                'std': np.sqrt(stats['m2'] / (count - 1)) if count > 1 else np.nan,
+                'min': stats['min'] if count else np.nan,
+                '25%': histogram.quantile(0.25),
+                '50%': histogram.quantile(0.5),
+                '75%': histogram.quantile(0.75),
+                'max': stats['max'] if count else np.nan,
+                'missing': stats['missing'],
+                'quantile_error': histogram.width if count else np.nan,
+            }
+        return pd.DataFrame(summary)
+
+    def _allocation(self):
+        """Rows per stratum, proportional to stratum size (largest remainders)."""
+        sizes = self._strata_sizes
+        total = sum(sizes.values())
+        if total <= self.sample_size:
+            return dict(sizes)
+        quotas = {s: self.sample_size * n / total for s, n in sizes.items()}
+        allocation = {s: int(q) for s, q in quotas.items()}
+        left = self.sample_size - sum(allocation.values())
+        for s in sorted(quotas, key=lambda s: allocation[s] - quotas[s])[:left]:
+            allocation[s] += 1
+        return allocation
+
+    def sample(self):
+        """The stratified sample, in the order of the original rows."""
+        allocation = self._allocation()
+        parts = [self._candidates[s].nsmallest(k, '_key') for s, k in allocation.items() if k]
+        if not parts:
+            return pd.DataFrame()
+        return pd.concat(parts).sort_index().drop(columns='_key')
+
+    def sample_report(self):
+        """
+        Per stratum: population size and sample size. Per numeric column:
+        the mean estimated from the stratified sample and its standard error
+        (with finite population correction), next to the exact mean of the
+        stream.
+        """
+        allocation = self._allocation()
+        sample = self.sample()
+        strata = {}
+        for s, k in allocation.items():
+            strata[str(s)] = {'rows': self._strata_sizes[s], 'sampled': int(k)}
+
+        columns = {}
+        for name, stats in self.columns.items():
+            estimate, variance = 0.0, 0.0
+            for s, k in allocation.items():
+                if not k:
+                    continue
+                size = self._strata_sizes[s]
+                values = self._candidates[s].nsmallest(k, '_key')[name].dropna()
+                weight = size / self.rows
+                estimate += weight * values.mean() if len(values) else 0.0
+                if len(values) > 1:
+                    variance += weight ** 2 * values.var() / len(values) * (1 - len(values) / size)
+            columns[name] = {
+                'sample_mean': estimate,
+                'stream_mean': stats['mean'],
+                'standard_error': float(np.sqrt(variance)),
+            }
+        return {'sample_size': len(sample), 'rows': self.rows, 'strata': strata, 'columns': columns}
@@ -0,0 +1,190 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from typing import List, Optional
+
+import numpy as np
+
+
+def content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+
+class CachedEmbeddings:
+    def __init__(
+        self,
+        embedding_func: object,
+        model_name: str,
+        cache_dir: Optional[str] = ".embedding_cache",
+        batch_size: int = 64,
+        dtype: str = "float16",
+    ) -> None:
+        """
+        Embedding layer in front of an embedding model (LangChain
+        `Embeddings` interface: `embed_documents` / `embed_query`). Texts are
+        deduplicated, looked up in an on-disk cache keyed by model and
+        content hash, and only the misses are sent to the model, in batches.
+
+        The cache of one model is an append-only file of fixed-size vectors
+        plus a file of content hashes, one per row, so existing entries are
+        memory-mapped instead of parsed.
+
+        Args:
+            embedding_func (object): The embedding model.
+
+            model_name (str): Name of the model; part of the cache key, so
+                vectors of different models never mix.
+
+            cache_dir (Optional[str]): Cache root directory. None keeps the
+                cache in memory only.
+
+            batch_size (int): Number of texts per call to the model.
+
+            dtype (str): Storage precision, "float16" (half the disk size) or
+                "float32". Vectors are always returned as float32.
+        """
+        if dtype not in ["float16", "float32"]:
+            raise ValueError("Invalid dtype. Choose either 'float16' or 'float32'.")
+        self.embedding_func = embedding_func
+        self.model_name = model_name
+        self.batch_size = batch_size
+        self.dtype = np.dtype(dtype)
+        self.dir = None
+        if cache_dir:
+            safe_name = re.sub(r"[^A-Za-z0-9._-]", "_", model_name)
+            self.dir = os.path.join(cache_dir, f"{safe_name}-{dtype}")
+            os.makedirs(self.dir, exist_ok=True)
+
+        self.dim = None
+        self._rows = {}  # (kind, content hash) -> row
+        self._stored = None  # memory-mapped rows present at load time
+        self._new = []  # rows appended since load
+        self._lock = threading.Lock()
+        self.stats = {
+            "texts": 0,
+            "cache_hits": 0,
+            "duplicates": 0,
+            "embedded": 0,
+            "model_calls": 0,
+            "model_seconds": 0.0,
+        }
+        self._load()
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.dir, name)
+
+    def _load(self) -> None:
+        if not self.dir or not os.path.exists(self._file("meta.json")):
+            return
+        with open(self._file("meta.json")) as f:
+            self.dim = json.load(f)["dim"]
+        with open(self._file("keys.txt")) as f:
+            keys = [line.rstrip("\n") for line in f]
+        row_bytes = self.dim * self.dtype.itemsize
+        # Rows whose key was not written (interrupted append) are ignored
+        n = min(len(keys), os.path.getsize(self._file("vectors.bin")) // row_bytes)
+        if n:
+            self._stored = np.memmap(
+                self._file("vectors.bin"),
+                dtype=self.dtype,
+                mode="r",
+                shape=(n, self.dim),
+            )
+        for row, key in enumerate(keys[:n]):
+            kind, digest = key.split(":", 1)
+            self._rows[(kind, digest)] = row
+
+    def _vector(self, row: int) -> np.ndarray:
+        stored = 0 if self._stored is None else len(self._stored)
+        if row < stored:
+            return self._stored[row]
+        return self._new[row - stored]
+
+    def _append(self, keys: List[tuple], vectors: np.ndarray) -> None:
+        vectors = vectors.astype(self.dtype)
+        with self._lock:
+            # Another thread may have embedded the same texts meanwhile
+            new = [i for i, key in enumerate(keys) if key not in self._rows]
+            if not new:
+                return
+            keys = [keys[i] for i in new]
+            vectors = vectors[new]
+            if self.dim is None:
+                self.dim = vectors.shape[1]
+                if self.dir:
+                    with open(self._file("meta.json"), "w") as f:
+                        json.dump({"dim": self.dim, "model": self.model_name}, f)
+            start = (0 if self._stored is None else len(self._stored)) + len(self._new)
+            if self.dir:
+                # Vectors first, keys second: a key never points past the data
+                with open(self._file("vectors.bin"), "ab") as f:
+                    f.write(vectors.tobytes())
+                with open(self._file("keys.txt"), "a") as f:
+                    f.write("".join(f"{kind}:{digest}\n" for kind, digest in keys))
+            for i, key in enumerate(keys):
+                self._rows[key] = start + i
+            self._new.extend(vectors)
+
+    def _embed(self, texts: List[str], kind: str) -> np.ndarray:
+        keys = [(kind, content_hash(t)) for t in texts]
+
+        missing = {}
+        with self._lock:
+            self.stats["texts"] += len(texts)
+            for key, text in zip(keys, texts):
+                if key in self._rows:
+                    self.stats["cache_hits"] += 1
+                elif key in missing:
+                    self.stats["duplicates"] += 1
+                else:
+                    missing[key] = text
+
+        missing_keys = list(missing)
+        for i in range(0, len(missing_keys), self.batch_size):
+            batch_keys = missing_keys[i : i + self.batch_size]
+            batch = [missing[k] for k in batch_keys]
+            start = time.perf_counter()
+            if kind == "query":
+                vectors = [self.embedding_func.embed_query(t) for t in batch]
+            else:
+                vectors = self.embedding_func.embed_documents(batch)
+            with self._lock:
+                self.stats["model_seconds"] += time.perf_counter() - start
+                self.stats["model_calls"] += 1
+                self.stats["embedded"] += len(batch)
+            self._append(batch_keys, np.asarray(vectors, dtype=np.float32))
+
+        if not texts:
+            return np.zeros((0, self.dim or 0), dtype=np.float32)
+        with self._lock:
+            return np.stack([self._vector(self._rows[k]) for k in keys]).astype(
+                np.float32
+            )
+
+    def embed_array(self, texts: List[str]) -> np.ndarray:
+        """Embed documents and return a float32 matrix with one row per text."""
+        return self._embed(list(texts), "document")
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        return self.embed_array(texts).tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        # Queries are keyed separately: some models embed them differently
+        return self._embed([text], "query")[0].tolist()
+
+    def report(self) -> dict:
+        """
+        Cache effectiveness and model throughput (texts embedded per second
+        of model time).
+        """
+        seconds = self.stats["model_seconds"]
+        texts = self.stats["texts"]
+        return dict(
+            self.stats,
+            hit_rate=self.stats["cache_hits"] / texts if texts else 0.0,
+            texts_per_second=self.stats["embedded"] / seconds if seconds else 0.0,
+            cached_vectors=len(self._rows),
+        )
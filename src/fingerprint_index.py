@@ -0,0 +1,162 @@
+# src/fingerprint_index.py
+import logging
+
+import numpy as np
+from rdkit import Chem, RDLogger
+from rdkit.Chem import rdFingerprintGenerator
+
+# Written by scripts/build_graph.py, read by the API
+FINGERPRINT_INDEX_PATH = 'data/processed/drug_fingerprints.npz'
+
+# Set bits of every byte value
+_BYTE_POPCOUNT = np.array([bin(i).count('1') for i in range(256)], dtype=np.uint8)
+
+def _table_bitwise_count(words):
+    """Set bits of each uint64, by table lookup of its bytes."""
+    words = np.ascontiguousarray(words, dtype=np.uint64)
+    return _BYTE_POPCOUNT[words.view(np.uint8)].reshape(words.shape + (8,)).sum(axis=-1, dtype=np.uint8)
+
+# np.bitwise_count needs NumPy 2.0
+_bitwise_count = getattr(np, 'bitwise_count', _table_bitwise_count)
+
+class FingerprintIndex:
+    def __init__(self, radius=2, n_bits=2048):
+        """
+        Structural similarity index of drugs: Morgan fingerprints packed into
+        a (drugs x n_bits / 64) uint64 array, searched by Tanimoto
+        similarity with vectorized popcounts.
+
+        Args:
+            radius: Morgan radius (2 corresponds to ECFP4).
+
+            n_bits: Fingerprint length, a multiple of 64.
+        """
+        if n_bits % 64:
+            raise ValueError("n_bits must be a multiple of 64.")
+        self.radius = radius
+        self.n_bits = n_bits
+        self.ids = []
+        self.names = []
+        self.fingerprints = np.zeros((0, n_bits // 64), dtype=np.uint64)
+        self.counts = np.zeros(0, dtype=np.int32)
+        self._positions = {}
+        self._generator = rdFingerprintGenerator.GetMorganGenerator(radius=radius, fpSize=n_bits)
+
+    def __len__(self):
+        return len(self.ids)
+
+    def fingerprint(self, smiles):
+        """Packed fingerprint of a SMILES string, or None if it does not parse."""
+        mol = Chem.MolFromSmiles(smiles) if smiles else None
+        if mol is None:
+            return None
+        bits = self._generator.GetFingerprintAsNumPy(mol).astype(np.uint8)
+        return np.packbits(bits).view(np.uint64)
+
+    def add_fingerprints(self, ids, fingerprints, names=None):
+        """Append packed fingerprints (drugs x n_bits / 64 uint64 array)."""
+        fingerprints = np.asarray(fingerprints, dtype=np.uint64).reshape(len(ids), -1)
+        start = len(self.ids)
+        self.ids.extend(ids)
+        self.names.extend(names if names is not None else [''] * len(ids))
+        self.fingerprints = np.concatenate([self.fingerprints, fingerprints])
+        self.counts = np.concatenate([self.counts, _bitwise_count(fingerprints).sum(axis=1, dtype=np.int32)])
+        self._positions.update((drug_id, start + i) for i, drug_id in enumerate(ids))
+
+    def add(self, ids, smiles, names=None):
+        """
+        Fingerprint and append drugs. Drugs whose SMILES does not parse are
+        skipped.
+
+        Returns:
+            The number of drugs added.
+        """
+        names = names if names is not None else [''] * len(ids)
+        kept_ids, kept_names, fingerprints = [], [], []
+        RDLogger.DisableLog('rdApp.*')
+        try:
+            for drug_id, name, text in zip(ids, names, smiles):
+                fingerprint = self.fingerprint(text)
+                if fingerprint is None:
+                    logging.warning(f"Skipping {drug_id}: invalid SMILES")
+                    continue
+                kept_ids.append(drug_id)
+                kept_names.append(name)
+                fingerprints.append(fingerprint)
+        finally:
+            RDLogger.EnableLog('rdApp.*')
+        if fingerprints:
+            self.add_fingerprints(kept_ids, np.stack(fingerprints), kept_names)
+        return len(kept_ids)
+
+    @classmethod
+    def from_graph(cls, graph, radius=2, n_bits=2048):
+        """Index the drug nodes of a `parse_drugbank` graph that have a SMILES."""
+        index = cls(radius, n_bits)
+        drugs = [
+            (node, data.get('label', ''), data['smiles'])
+            for node, data in graph.nodes(data=True)
+            if data.get('type') == 'drug' and data.get('smiles')
+        ]
+        if drugs:
+            ids, names, smiles = zip(*drugs)
+            index.add(list(ids), list(smiles), list(names))
+        logging.info(f"Indexed {len(index)} drug structures")
+        return index
+
+    def similarity(self, fingerprint):
+        """Tanimoto similarity of a packed fingerprint to every indexed drug."""
+        common = _bitwise_count(self.fingerprints & fingerprint).sum(axis=1, dtype=np.int32)
+        union = self.counts + _bitwise_count(fingerprint).sum(dtype=np.int32) - common
+        return np.divide(common, union, out=np.zeros(len(common)), where=union > 0)
+
+    def search_fingerprint(self, fingerprint, k=10, min_similarity=0.0, exclude=None):
+        """
+        The `k` most similar drugs as (id, name, similarity) tuples, most
+        similar first.
+        """
+        scores = self.similarity(fingerprint)
+        if exclude is not None:
+            scores[exclude] = -1.0
+        k = min(k, len(scores))
+        if k == 0:
+            return []
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top], kind='stable')]
+        return [
+            (self.ids[i], self.names[i], float(scores[i]))
+            for i in top
+            if scores[i] >= min_similarity and scores[i] >= 0
+        ]
+
+    def search(self, smiles, k=10, min_similarity=0.0):
+        """Drugs most similar to a query molecule given as SMILES."""
+        fingerprint = self.fingerprint(smiles)
+        if fingerprint is None:
+            raise ValueError(f"Invalid SMILES: {smiles}")
+        return self.search_fingerprint(fingerprint, k, min_similarity)
+
+    def similar_to(self, drug_id, k=10, min_similarity=0.0):
+        """Drugs most similar to an indexed drug, excluding itself."""
+        position = self._positions.get(drug_id)
+        if position is None:
+            raise KeyError(drug_id)
+        return self.search_fingerprint(self.fingerprints[position], k, min_similarity, exclude=position)
+
+    def save(self, path):
+        """Write the index to a .npz file."""
+        np.savez_compressed(
+            path,
+            fingerprints=self.fingerprints,
+            ids=np.array(self.ids, dtype=str),
+            names=np.array(self.names, dtype=str),
+            params=np.array([self.radius, self.n_bits]),
+        )
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            radius, n_bits = (int(v) for v in data['params'])
+            index = cls(radius, n_bits)
+            index.add_fingerprints(data['ids'].tolist(), data['fingerprints'], data['names'].tolist())
+        return index
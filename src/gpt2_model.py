@@ -1,33 +1,247 @@
-from transformers import GPT2LMHeadModel, GPT2Tokenizer
+import queue
+import threading
+import time
+from concurrent.futures import Future, InvalidStateError
 
-# Load pre-trained model and tokenizer
-model_name = 'gpt2'
-tokenizer = GPT2Tokenizer.from_pretrained(model_name)
-model = GPT2LMHeadModel.from_pretrained(model_name)
+import torch
+from transformers import AutoTokenizer, GPT2LMHeadModel, StoppingCriteria, StoppingCriteriaList
 
-# Set the padding token to the EOS token
-tokenizer.pad_token = tokenizer.eos_token
+from model.llm_cache import ResponseCache
 
-# Define your input text
-input_text = input("Enter your prompt:")
-
-# Tokenize input text
-inputs = tokenizer(input_text, return_tensors='pt', padding=True)
-
-# Generate text
-output = model.generate(
-    inputs.input_ids,
-    attention_mask=inputs.attention_mask,  # Set the attention mask
-    max_length=1000,
-    pad_token_id=tokenizer.eos_token_id,    # Set the pad token ID to the EOS token ID
+# Default generation settings; do_sample=False makes the output deterministic,
+# so identical prompts are served from the response cache
+GENERATION_PARAMS = dict(
     do_sample=False,
     temperature=0.2,                       # Adjusted temperature for a balance between randomness and focus
     #top_k=50,                             # Use top 50 tokens
     #top_p=0.9,                            # Cumulative probability for nucleus sampling
     repetition_penalty=1.5,               # Add repetition penalty to reduce repetitive text
-    num_return_sequences=1                # Number of variations to return
 )
 
-# Decode and print the generated text
-generated_text = tokenizer.decode(output[0], skip_special_tokens=True, clean_up_tokenization_spaces=True)
-print(generated_text)
+
+class _MaxNewTokensPerSequence(StoppingCriteria):
+    """Marks each sequence of a batch as done once it has its own token limit."""
+
+    def __init__(self, prompt_length, limits):
+        self.prompt_length = prompt_length
+        self.limits = limits
+
+    def __call__(self, input_ids, scores, **kwargs):
+        generated = input_ids.shape[1] - self.prompt_length
+        return generated >= self.limits.to(input_ids.device)
+
+
+class _Request:
+    def __init__(self, prompt, max_new_tokens):
+        self.prompt = prompt
+        self.max_new_tokens = max_new_tokens
+        self.future = Future()
+
+
+class GPT2Generator:
+    def __init__(
+        self,
+        model_name='gpt2',
+        max_batch_size=8,
+        max_wait_ms=10,
+        num_threads=None,
+        cache=None,
+        model=None,
+        tokenizer=None,
+        generation_params=None,
+        cache_name=None,
+    ):
+        """
+        Text generation service around a GPT-2 model that is loaded once.
+        Concurrent `generate` calls are collected into batches of up to
+        `max_batch_size` prompts (waiting at most `max_wait_ms` for a batch to
+        fill) and run through a single `model.generate` call with left
+        padding, attention masks and the KV cache.
+
+        Args:
+            model_name: Hugging Face model name or path.
+
+            max_batch_size: Maximum number of prompts per forward batch.
+
+            max_wait_ms: How long the batcher waits for more prompts after
+                the first one arrived.
+
+            num_threads: Intra-op CPU threads for PyTorch; defaults to the
+                PyTorch default (one per physical core).
+
+            cache: Optional ResponseCache for deterministic generations.
+
+            model, tokenizer: Preloaded model and tokenizer (skip loading).
+
+            generation_params: Overrides for GENERATION_PARAMS.
+
+            cache_name: Model name the responses are cached under; defaults
+                to `model_name`. Required to cache the responses of an
+                injected `model`, which need not be the `model_name`
+                checkpoint (e.g. a quantized or fine-tuned copy).
+        """
+        if cache is not None and model is not None and cache_name is None:
+            raise ValueError("Invalid cache_name. Name the injected model to cache its responses.")
+        if num_threads:
+            torch.set_num_threads(num_threads)
+        self.model_name = model_name
+        self.cache_name = cache_name or model_name
+        self.tokenizer = tokenizer or AutoTokenizer.from_pretrained(model_name)
+        # Decoder-only models continue from the last position, so prompts
+        # are padded on the left; the EOS token doubles as padding
+        self.tokenizer.padding_side = 'left'
+        if self.tokenizer.pad_token is None:
+            self.tokenizer.pad_token = self.tokenizer.eos_token
+        self.model = model or GPT2LMHeadModel.from_pretrained(model_name)
+        self.model.eval()
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait_ms / 1000
+        self.cache = cache
+        self.generation_params = dict(GENERATION_PARAMS, **(generation_params or {}))
+        self._queue = queue.Queue()
+        self._worker = None
+        self._lock = threading.Lock()
+
+    def generate_batch(self, prompts, max_new_tokens=50):
+        """
+        Generates continuations for a list of prompts in one batch.
+
+        Args:
+            prompts: List of prompt strings.
+
+            max_new_tokens: Token limit, either one int for all prompts or a
+                list with one limit per prompt.
+
+        Returns:
+            List of generated continuations (without the prompt).
+        """
+        if isinstance(max_new_tokens, int):
+            max_new_tokens = [max_new_tokens] * len(prompts)
+        inputs = self.tokenizer(prompts, return_tensors='pt', padding=True)
+        prompt_length = inputs.input_ids.shape[1]
+        limits = torch.tensor(max_new_tokens)
+        with torch.inference_mode():
+            output = self.model.generate(
+                inputs.input_ids,
+                attention_mask=inputs.attention_mask,
+                max_new_tokens=max(max_new_tokens),
+                stopping_criteria=StoppingCriteriaList(
+                    [_MaxNewTokensPerSequence(prompt_length, limits)]
+                ),
+                pad_token_id=self.tokenizer.pad_token_id,
+                use_cache=True,
+                **self.generation_params
+            )
+        return [
+            self.tokenizer.decode(
+                row[prompt_length:prompt_length + n],
+                skip_special_tokens=True,
+                clean_up_tokenization_spaces=True,
+            )
+            for row, n in zip(output, max_new_tokens)
+        ]
+
+    def _cache_params(self, max_new_tokens):
+        return dict(self.generation_params, max_new_tokens=max_new_tokens)
+
+    def submit(self, prompt, max_new_tokens=50):
+        """
+        Queues a prompt for batched generation.
+
+        Returns:
+            concurrent.futures.Future resolving to the generated text.
+        """
+        if self.cache is not None:
+            params = self._cache_params(max_new_tokens)
+            if self.cache.should_cache(params):
+                cached = self.cache.get(self.cache.make_key(self.cache_name, prompt, params))
+                if cached is not None:
+                    future = Future()
+                    future.set_result(cached)
+                    return future
+        self._ensure_worker()
+        request = _Request(prompt, max_new_tokens)
+        self._queue.put(request)
+        return request.future
+
+    def generate(self, prompt, max_new_tokens=50):
+        """Generates a continuation of `prompt`, batched with concurrent calls."""
+        return self.submit(prompt, max_new_tokens).result()
+
+    def _ensure_worker(self):
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+
+    def _next_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            timeout = deadline - time.monotonic()
+            if timeout <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=timeout))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            # Requests cancelled while queued (e.g. the client disconnected)
+            # are dropped; the others can no longer be cancelled
+            batch = [r for r in self._next_batch() if r.future.set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                texts = self.generate_batch(
+                    [r.prompt for r in batch], [r.max_new_tokens for r in batch]
+                )
+            except Exception as e:
+                for request in batch:
+                    _resolve(request.future, exception=e)
+                continue
+            for request, text in zip(batch, texts):
+                if self.cache is not None:
+                    params = self._cache_params(request.max_new_tokens)
+                    if self.cache.should_cache(params):
+                        self.cache.put(
+                            self.cache.make_key(self.cache_name, request.prompt, params), text
+                        )
+                _resolve(request.future, result=text)
+
+
+def _resolve(future, result=None, exception=None):
+    """Sets the outcome of a future; one that is already done is left alone."""
+    try:
+        if exception is not None:
+            future.set_exception(exception)
+        else:
+            future.set_result(result)
+    except InvalidStateError:
+        pass
+
+
+_default_generator = None
+
+
+def get_generator():
+    """Returns the process-wide generator, loading the model on first use."""
+    global _default_generator
+    if _default_generator is None:
+        _default_generator = GPT2Generator(cache=ResponseCache())
+    return _default_generator
+
+
+def generate_text(input_text, max_new_tokens=200):
+    """Generate a continuation of `input_text` with the shared generator."""
+    return get_generator().generate(input_text, max_new_tokens)
+
+
+if __name__ == "__main__":
+    # Define your input text
+    input_text = input("Enter your prompt:")
+
+    # Print the generated text
+    print(input_text + generate_text(input_text))
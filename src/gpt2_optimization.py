@@ -0,0 +1,290 @@
+import io
+import os
+import tempfile
+import time
+from abc import ABC, abstractmethod
+
+import torch
+from torch import nn
+from transformers.pytorch_utils import Conv1D
+
+from src.gpt2_model import GPT2Generator
+
+VARIANTS = ('fp32', 'int8', 'torchscript', 'onnx')
+
+# Fixed prompt set for the accuracy check
+AGREEMENT_PROMPTS = [
+    "Angiotensin II receptor blockers lower blood pressure by",
+    "The main molecular targets of beta blockers are",
+    "Hypertension is associated with an increased risk of",
+    "Calcium channel blockers act on",
+    "Drug repurposing uses knowledge graphs to",
+    "ACE inhibitors such as lisinopril work by",
+]
+
+
+def conv1d_to_linear(model):
+    """
+    Replace GPT-2's Conv1D layers (which are linear layers with a transposed
+    weight) by nn.Linear, so that dynamic quantization picks them up.
+    """
+    for name, module in model.named_children():
+        if isinstance(module, Conv1D):
+            linear = nn.Linear(module.weight.shape[0], module.weight.shape[1])
+            linear.weight.data = module.weight.data.t().contiguous()
+            linear.bias.data = module.bias.data
+            setattr(model, name, linear)
+        else:
+            conv1d_to_linear(module)
+    return model
+
+
+def quantize_int8(model):
+    """Dynamic int8 quantization of all linear layers (weights int8, activations fp32)."""
+    model = conv1d_to_linear(model)
+    return torch.ao.quantization.quantize_dynamic(model, {nn.Linear}, dtype=torch.qint8)
+
+
+class _LogitsOnly(nn.Module):
+    """Forward pass without KV cache that returns next-token logits only, for export."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def forward(self, input_ids, attention_mask):
+        # Positions follow the attention mask so that left padding is handled
+        position_ids = (attention_mask.cumsum(-1) - 1).clamp(min=0)
+        logits = self.model(
+            input_ids=input_ids,
+            attention_mask=attention_mask,
+            position_ids=position_ids,
+            use_cache=False,
+            return_dict=False,
+        )[0]
+        return logits[:, -1, :]
+
+
+class EagerVariant:
+    """PyTorch eager model (fp32 or quantized), decoded with model.generate and the KV cache."""
+
+    def __init__(self, model):
+        self.model = model.eval()
+
+    def generate_ids(self, input_ids, attention_mask, max_new_tokens, pad_token_id, eos_token_id):
+        with torch.inference_mode():
+            output = self.model.generate(
+                input_ids,
+                attention_mask=attention_mask,
+                max_new_tokens=max_new_tokens,
+                do_sample=False,
+                pad_token_id=pad_token_id,
+                eos_token_id=eos_token_id,
+            )
+        new = output[:, input_ids.shape[1]:]
+        # generate stops early once every sequence hit EOS; pad to full length
+        if new.shape[1] < max_new_tokens:
+            padding = new.new_full((new.shape[0], max_new_tokens - new.shape[1]), pad_token_id)
+            new = torch.cat([new, padding], dim=1)
+        return new
+
+
+class _GreedyExportedVariant(ABC):
+    """
+    Greedy decoding over an exported next-token-logits graph. The exported
+    graphs have no KV cache, so every step re-runs the full sequence; they pay
+    off for short continuations.
+    """
+
+    @abstractmethod
+    def next_token_logits(self, input_ids, attention_mask):
+        """Logits of the next token for each sequence, shape (batch, vocab)."""
+
+    def generate_ids(self, input_ids, attention_mask, max_new_tokens, pad_token_id, eos_token_id):
+        generated = []
+        finished = torch.zeros(input_ids.shape[0], 1, dtype=torch.bool)
+        for _ in range(max_new_tokens):
+            logits = self.next_token_logits(input_ids, attention_mask)
+            next_ids = logits.argmax(-1, keepdim=True)
+            # Like model.generate: sequences that emitted EOS continue with padding
+            next_ids = torch.where(finished, torch.full_like(next_ids, pad_token_id), next_ids)
+            finished |= next_ids == eos_token_id
+            generated.append(next_ids)
+            input_ids = torch.cat([input_ids, next_ids], dim=1)
+            attention_mask = torch.cat([attention_mask, torch.ones_like(next_ids)], dim=1)
+        return torch.cat(generated, dim=1)
+
+
+class TorchScriptVariant(_GreedyExportedVariant):
+    def __init__(self, model, example_inputs):
+        with torch.inference_mode():
+            traced = torch.jit.trace(_LogitsOnly(model).eval(), example_inputs, check_trace=False)
+        self.graph = torch.jit.freeze(traced)
+
+    def next_token_logits(self, input_ids, attention_mask):
+        with torch.inference_mode():
+            return self.graph(input_ids, attention_mask)
+
+
+class OnnxVariant(_GreedyExportedVariant):
+    def __init__(self, model, example_inputs, num_threads=None, path=None):
+        try:
+            import onnxruntime as ort
+        except ImportError as e:
+            raise ImportError(
+                "The 'onnx' variant needs onnxruntime: pip install onnxruntime"
+            ) from e
+
+        path = path or os.path.join(tempfile.mkdtemp(), 'gpt2.onnx')
+        torch.onnx.export(
+            _LogitsOnly(model).eval(),
+            example_inputs,
+            path,
+            input_names=['input_ids', 'attention_mask'],
+            output_names=['logits'],
+            dynamic_axes={
+                'input_ids': {0: 'batch', 1: 'sequence'},
+                'attention_mask': {0: 'batch', 1: 'sequence'},
+                'logits': {0: 'batch'},
+            },
+            dynamo=False,
+        )
+        options = ort.SessionOptions()
+        if num_threads:
+            options.intra_op_num_threads = num_threads
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.path = path
+        self.session = ort.InferenceSession(path, options, providers=['CPUExecutionProvider'])
+
+    def next_token_logits(self, input_ids, attention_mask):
+        logits = self.session.run(
+            ['logits'],
+            {'input_ids': input_ids.numpy(), 'attention_mask': attention_mask.numpy()},
+        )[0]
+        return torch.from_numpy(logits)
+
+
+def build_variant(name, model, tokenizer, num_threads=None):
+    """
+    Build an inference variant of a float GPT-2 model.
+
+    Args:
+        name: One of 'fp32', 'int8', 'torchscript', 'onnx'.
+
+        model: Float GPT2LMHeadModel. It is not modified.
+
+        tokenizer: Tokenizer used to build the example inputs for export.
+
+        num_threads: Intra-op CPU threads (PyTorch and ONNX Runtime).
+
+    Returns:
+        Object with a `generate_ids(input_ids, attention_mask, max_new_tokens,
+        pad_token_id, eos_token_id)` method returning the new token ids.
+    """
+    if name not in VARIANTS:
+        raise ValueError(f"Unknown variant {name!r}. Choose one of {VARIANTS}.")
+    if num_threads:
+        torch.set_num_threads(num_threads)
+    model = _copy(model)
+    if name == 'fp32':
+        return EagerVariant(model)
+    if name == 'int8':
+        return EagerVariant(quantize_int8(model))
+
+    example = tokenizer(AGREEMENT_PROMPTS[:2], return_tensors='pt', padding=True)
+    example_inputs = (example.input_ids, example.attention_mask)
+    if name == 'torchscript':
+        return TorchScriptVariant(model, example_inputs)
+    return OnnxVariant(model, example_inputs, num_threads=num_threads)
+
+
+def _copy(model):
+    buffer = io.BytesIO()
+    torch.save(model, buffer)
+    buffer.seek(0)
+    return torch.load(buffer, weights_only=False)
+
+
+def model_size_bytes(variant):
+    """Serialized size of the variant's weights, as a proxy for its memory footprint."""
+    if isinstance(variant, OnnxVariant):
+        return os.path.getsize(variant.path)
+    module = variant.graph if isinstance(variant, TorchScriptVariant) else variant.model
+    buffer = io.BytesIO()
+    if isinstance(module, torch.jit.ScriptModule):
+        torch.jit.save(module, buffer)
+    else:
+        torch.save(module.state_dict(), buffer)
+    return buffer.tell()
+
+
+def _generate(variant, tokenizer, prompts, max_new_tokens):
+    inputs = tokenizer(prompts, return_tensors='pt', padding=True)
+    return variant.generate_ids(
+        inputs.input_ids,
+        inputs.attention_mask,
+        max_new_tokens,
+        tokenizer.pad_token_id,
+        tokenizer.eos_token_id,
+    )
+
+
+def token_agreement(reference, candidate, tokenizer, prompts=AGREEMENT_PROMPTS, max_new_tokens=20):
+    """
+    Fraction of greedily generated tokens on which `candidate` agrees with
+    `reference`, position by position. Prompts are run one at a time, so
+    padding does not play a role.
+    """
+    matches = total = 0
+    for prompt in prompts:
+        ref = _generate(reference, tokenizer, [prompt], max_new_tokens)[0]
+        cand = _generate(candidate, tokenizer, [prompt], max_new_tokens)[0]
+        matches += int((ref == cand).sum())
+        total += len(ref)
+    return matches / total
+
+
+def benchmark_variants(model, tokenizer, variants=VARIANTS, num_threads=None,
+                       max_new_tokens=20, repeats=3):
+    """
+    Build each variant and report token agreement with fp32, mean latency
+    per prompt and serialized model size.
+
+    Returns:
+        List of result dictionaries, one per variant.
+    """
+    reference = build_variant('fp32', model, tokenizer, num_threads)
+    results = []
+    for name in variants:
+        variant = reference if name == 'fp32' else build_variant(name, model, tokenizer, num_threads)
+        _generate(variant, tokenizer, AGREEMENT_PROMPTS[:1], 2)  # warm-up
+        start = time.perf_counter()
+        for _ in range(repeats):
+            for prompt in AGREEMENT_PROMPTS:
+                _generate(variant, tokenizer, [prompt], max_new_tokens)
+        latency = (time.perf_counter() - start) / (repeats * len(AGREEMENT_PROMPTS))
+        results.append({
+            'variant': name,
+            'agreement': round(token_agreement(reference, variant, tokenizer, max_new_tokens=max_new_tokens), 4),
+            'latency_ms': round(latency * 1000, 1),
+            'size_mb': round(model_size_bytes(variant) / 2**20, 1),
+            'threads': torch.get_num_threads(),
+        })
+    return results
+
+
+def load_optimized_generator(variant='int8', model_name='gpt2', num_threads=None, **kwargs):
+    """
+    GPT2Generator whose model is replaced by an eager optimized variant
+    ('fp32' or 'int8'); exported graphs have no `generate` and are used
+    through `build_variant` directly. Responses of a quantized model are
+    cached apart from the fp32 ones.
+    """
+    if variant not in ('fp32', 'int8'):
+        raise ValueError("Only 'fp32' and 'int8' can back a GPT2Generator.")
+    if variant != 'fp32':
+        kwargs.setdefault('cache_name', f"{model_name}:{variant}")
+    generator = GPT2Generator(model_name, num_threads=num_threads, **kwargs)
+    if variant == 'int8':
+        generator.model = quantize_int8(generator.model)
+    return generator
@@ -0,0 +1,432 @@
+# src/graph_embedding.py
+import argparse
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+import torch
+
+# Written by `python -m src.graph_embedding`
+NODE_EMBEDDINGS_PATH = 'data/processed/node_embeddings.npz'
+
+class WalkGraph:
+    def __init__(self, nodes, indptr, indices, types=None):
+        """
+        Compact (CSR) undirected adjacency of a graph for random walks:
+        the neighbours of node i are `indices[indptr[i]:indptr[i + 1]]`,
+        sorted, so edge lookups are binary searches.
+
+        Args:
+            nodes: Node ids, one per position.
+
+            indptr: CSR row pointers (len(nodes) + 1).
+
+            indices: CSR column indices, sorted within each row.
+
+            types: Optional node types (e.g. 'drug', 'target'), one per node.
+        """
+        self.nodes = list(nodes)
+        self.indptr = np.asarray(indptr, dtype=np.int64)
+        self.indices = np.asarray(indices, dtype=np.int32)
+        self.types = np.asarray(types, dtype=object) if types is not None else None
+        self.degree = np.diff(self.indptr)
+        self._positions = pd.Index(self.nodes)
+        # Sorted keys of all (source, target) entries, for vectorized edge lookups
+        n = len(self.nodes)
+        self._edge_keys = np.repeat(np.arange(n, dtype=np.int64), self.degree) * n + self.indices
+
+    def __len__(self):
+        return len(self.nodes)
+
+    @classmethod
+    def from_graph(cls, graph, exclude=()):
+        """
+        Build from a NetworkX graph (e.g. from `parse_drugbank`), ignoring
+        edge directions and the (source, target) pairs in `exclude`.
+        """
+        nodes = list(graph.nodes())
+        positions = pd.Index(nodes)
+        excluded = {frozenset(pair) for pair in exclude}
+        edges = [(u, v) for u, v in graph.edges() if u != v and frozenset((u, v)) not in excluded]
+        if edges:
+            sources, targets = (positions.get_indexer(side) for side in zip(*edges))
+        else:
+            sources = targets = np.zeros(0, dtype=np.int64)
+        rows = np.concatenate([sources, targets])
+        cols = np.concatenate([targets, sources])
+        adjacency = sp.csr_matrix((np.ones(len(rows), dtype=np.int8), (rows, cols)), shape=(len(nodes), len(nodes)))
+        adjacency.sum_duplicates()
+        adjacency.sort_indices()
+        types = [data.get('type') for _, data in graph.nodes(data=True)]
+        return cls(nodes, adjacency.indptr, adjacency.indices, types)
+
+    def index(self, ids):
+        """Positions of node ids (-1 for unknown ids)."""
+        return self._positions.get_indexer(ids)
+
+    def has_edges(self, sources, targets):
+        """Whether each (sources[i], targets[i]) pair of positions is an edge."""
+        keys = np.asarray(sources, dtype=np.int64) * len(self.nodes) + targets
+        found = np.searchsorted(self._edge_keys, keys)
+        found = np.minimum(found, len(self._edge_keys) - 1)
+        return (self._edge_keys[found] == keys) if len(self._edge_keys) else np.zeros(len(keys), dtype=bool)
+
+    def nodes_of_type(self, node_type):
+        return np.flatnonzero(self.types == node_type)
+
+def _walk_round(graph, starts, walk_length, p, q, seed):
+    """
+    One walk from every start node, all walkers advancing together. The
+    biased second-order step is drawn by rejection sampling: a uniformly
+    drawn neighbour x of the current node is accepted with probability
+    proportional to 1/p if x is the previous node, 1 if x is a neighbour of
+    the previous node and 1/q otherwise, which samples the node2vec
+    transition without precomputing per-edge alias tables.
+    """
+    rng = np.random.default_rng(seed)
+    walks = np.empty((len(starts), walk_length), dtype=np.int32)
+    walks[:, 0] = starts
+
+    def uniform_neighbours(current):
+        offsets = (rng.random(len(current)) * graph.degree[current]).astype(np.int64)
+        return graph.indices[graph.indptr[current] + offsets]
+
+    if walk_length > 1:
+        walks[:, 1] = uniform_neighbours(walks[:, 0])
+    upper = max(1.0 / p, 1.0, 1.0 / q)
+    for step in range(2, walk_length):
+        previous, current = walks[:, step - 2], walks[:, step - 1]
+        if p == 1 and q == 1:
+            walks[:, step] = uniform_neighbours(current)
+            continue
+        pending = np.arange(len(starts))
+        while len(pending):
+            candidates = uniform_neighbours(current[pending])
+            back = previous[pending]
+            weight = np.where(
+                candidates == back,
+                1.0 / p,
+                np.where(graph.has_edges(back, candidates), 1.0, 1.0 / q),
+            )
+            accept = rng.random(len(pending)) * upper < weight
+            walks[pending[accept], step] = candidates[accept]
+            pending = pending[~accept]
+    return walks
+
+# Graph and walk settings of a worker process, sent once by the pool initializer
+_worker_state = None
+
+def _init_walk_worker(graph, starts, walk_length, p, q):
+    global _worker_state
+    _worker_state = (graph, starts, walk_length, p, q)
+
+def _worker_walk_round(seed):
+    return _walk_round(*_worker_state, seed)
+
+def random_walks(graph, num_walks=10, walk_length=40, p=1.0, q=1.0, seed=0, workers=1):
+    """
+    node2vec random walks: `num_walks` rounds of one walk per non-isolated
+    node. Each round has its own seed derived from `seed`, so the walks are
+    the same for any number of worker processes.
+
+    Args:
+        graph: WalkGraph to walk.
+
+        num_walks: Walks per node.
+
+        walk_length: Nodes per walk.
+
+        p: Return parameter; high values make walks less likely to go back.
+
+        q: In-out parameter; values above 1 keep walks local (BFS-like),
+            below 1 push them outward (DFS-like).
+
+        seed: Seed of the walks.
+
+        workers: Number of worker processes the rounds are spread over.
+
+    Returns:
+        Array of node positions (walks x walk_length, int32).
+    """
+    starts = np.flatnonzero(graph.degree > 0).astype(np.int32)
+    seeds = np.random.SeedSequence(seed).spawn(num_walks)
+    if workers > 1 and num_walks > 1:
+        # Only the round seeds are sent per task; the graph once per worker
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_walk_worker,
+            initargs=(graph, starts, walk_length, p, q),
+        ) as pool:
+            rounds = list(pool.map(_worker_walk_round, seeds))
+    else:
+        rounds = [_walk_round(graph, starts, walk_length, p, q, s) for s in seeds]
+    if not rounds:
+        return np.zeros((0, walk_length), dtype=np.int32)
+    return np.concatenate(rounds)
+
+def _noise_table(walks, n, size=1_000_000):
+    """Lookup table drawing nodes with probability proportional to frequency^0.75."""
+    frequency = np.bincount(walks.ravel(), minlength=n).astype(np.float64) ** 0.75
+    cumulative = np.cumsum(frequency / frequency.sum())
+    return np.searchsorted(cumulative, (np.arange(size) + 0.5) / size).astype(np.int64)
+
+class Node2Vec:
+    def __init__(
+        self,
+        dimensions=64,
+        walk_length=40,
+        num_walks=10,
+        window=5,
+        p=1.0,
+        q=1.0,
+        negatives=5,
+        epochs=1,
+        batch_size=1024,
+        learning_rate=0.025,
+        workers=1,
+        seed=0,
+    ):
+        """
+        node2vec node embeddings: biased random walks (`random_walks`) fed
+        to a skip-gram model with negative sampling, trained on CPU by
+        minibatch SGD that only touches the rows of each batch.
+        Links are scored by the cosine similarity of their end nodes.
+
+        Args:
+            dimensions: Embedding size.
+
+            walk_length, num_walks, p, q: Walk parameters (see
+                `random_walks`).
+
+            window: Context window of the skip-gram, in nodes on each side.
+
+            negatives: Negative samples per (node, context) pair.
+
+            epochs: Passes over the walks.
+
+            batch_size: (node, context) pairs per optimizer step.
+
+            learning_rate: Initial SGD learning rate.
+
+            workers: Processes generating walks.
+
+            seed: Seed of walks, sampling and initialization.
+        """
+        self.dimensions = dimensions
+        self.walk_length = walk_length
+        self.num_walks = num_walks
+        self.window = window
+        self.p = p
+        self.q = q
+        self.negatives = negatives
+        self.epochs = epochs
+        self.batch_size = batch_size
+        self.learning_rate = learning_rate
+        self.workers = workers
+        self.seed = seed
+        self.nodes = []
+        self.embeddings = np.zeros((0, dimensions), dtype=np.float32)
+        self.timings = {}
+        self._positions = pd.Index([])
+
+    def _pairs(self, walks):
+        """All (node, context) pairs within the window of each walk."""
+        centers, contexts = [], []
+        for offset in range(1, min(self.window, walks.shape[1] - 1) + 1):
+            left, right = walks[:, :-offset].ravel(), walks[:, offset:].ravel()
+            centers += [left, right]
+            contexts += [right, left]
+        return np.concatenate(centers).astype(np.int64), np.concatenate(contexts).astype(np.int64)
+
+    def train(self, walks, n):
+        """
+        Fit the skip-gram on walks over `n` nodes; returns the embeddings.
+        Gradients are computed in closed form and scattered into the rows
+        of each batch with `index_add_` (no autograd), with the learning
+        rate decaying linearly to zero as in word2vec.
+        """
+        generator = torch.Generator().manual_seed(self.seed)
+        rng = np.random.default_rng(self.seed)
+        node_vectors = (torch.rand(n, self.dimensions, generator=generator) - 0.5) / self.dimensions
+        context_vectors = torch.zeros(n, self.dimensions)
+        noise = _noise_table(walks, n)
+
+        # Pairs are generated a slice of walks at a time to bound memory
+        walks_per_slice = max(1, (self.batch_size * 64) // max(1, 2 * self.window * walks.shape[1]))
+        total = self.epochs * len(walks)
+        done = 0
+        for _ in range(self.epochs):
+            order = rng.permutation(len(walks))
+            for start in range(0, len(walks), walks_per_slice):
+                chunk = order[start : start + walks_per_slice]
+                learning_rate = self.learning_rate * max(1 - done / total, 1e-4)
+                done += len(chunk)
+                centers, contexts = self._pairs(walks[chunk])
+                shuffle = rng.permutation(len(centers))
+                for batch in range(0, len(centers), self.batch_size):
+                    index = shuffle[batch : batch + self.batch_size]
+                    center_index = torch.from_numpy(centers[index])
+                    # Column 0 is the true context, the others negative samples
+                    context_index = torch.from_numpy(np.concatenate(
+                        [contexts[index, None], noise[rng.integers(len(noise), size=(len(index), self.negatives))]],
+                        axis=1,
+                    ))
+                    center = node_vectors[center_index]
+                    context = context_vectors[context_index]
+                    labels = torch.zeros(context_index.shape)
+                    labels[:, 0] = 1.0
+                    scores = torch.bmm(context, center.unsqueeze(2)).squeeze(2)
+                    # Gradient of the negative log-likelihood with respect to the scores
+                    error = (torch.sigmoid(scores) - labels) * learning_rate
+                    node_vectors.index_add_(0, center_index, -(error.unsqueeze(2) * context).sum(dim=1))
+                    context_vectors.index_add_(
+                        0, context_index.reshape(-1), -(error.unsqueeze(2) * center.unsqueeze(1)).reshape(-1, self.dimensions)
+                    )
+        return node_vectors.numpy().copy()
+
+    def fit(self, graph):
+        """Walk a WalkGraph and train the embeddings of its nodes."""
+        start = time.perf_counter()
+        walks = random_walks(graph, self.num_walks, self.walk_length, self.p, self.q, self.seed, self.workers)
+        walked = time.perf_counter()
+        self.embeddings = self.train(walks, len(graph))
+        trained = time.perf_counter()
+        self.nodes = list(graph.nodes)
+        self._positions = pd.Index(self.nodes)
+        self.timings = {
+            'walks': len(walks),
+            'walk_seconds': walked - start,
+            'walks_per_second': len(walks) / max(walked - start, 1e-9),
+            'train_seconds': trained - walked,
+        }
+        logging.info(
+            f"Embedded {len(graph)} nodes: {len(walks)} walks in {self.timings['walk_seconds']:.1f}s, "
+            f"training in {self.timings['train_seconds']:.1f}s"
+        )
+        return self
+
+    def _normalized(self, positions):
+        vectors = self.embeddings[positions]
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        return vectors / np.where(norms > 0, norms, 1.0)
+
+    def score_links(self, sources, targets):
+        """Cosine similarity of each (sources[i], targets[i]) pair of node ids."""
+        a = self._normalized(self._positions.get_indexer(sources))
+        b = self._normalized(self._positions.get_indexer(targets))
+        return (a * b).sum(axis=1)
+
+    def rank_links(self, source, candidates, k=10, exclude=()):
+        """
+        The `k` candidate nodes with the highest link score from `source`,
+        as (id, score) tuples, best first; `exclude` are skipped (e.g. the
+        source's known targets).
+        """
+        exclude = set(exclude) | {source}
+        candidates = [c for c in candidates if c not in exclude]
+        if not candidates:
+            return []
+        scores = self.score_links([source] * len(candidates), candidates)
+        top = np.argsort(-scores, kind='stable')[:k]
+        return [(candidates[i], float(scores[i])) for i in top]
+
+    def save(self, path):
+        np.savez_compressed(path, embeddings=self.embeddings, nodes=np.array(self.nodes, dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as data:
+            model = cls(dimensions=data['embeddings'].shape[1])
+            model.embeddings = data['embeddings']
+            model.nodes = data['nodes'].tolist()
+        model._positions = pd.Index(model.nodes)
+        return model
+
+def split_links(graph, relationship='targets', fraction=0.1, seed=0):
+    """
+    Hold out a random `fraction` of the edges with the given relationship
+    for link-prediction evaluation. Only edges whose both end nodes keep
+    another edge of that relationship are held out, so every held-out link
+    connects nodes that are still in the training graph.
+
+    Returns:
+        List of held-out (source, target) pairs.
+    """
+    rng = np.random.default_rng(seed)
+    edges = [(u, v) for u, v, data in graph.edges(data=True) if data.get('relationship') == relationship]
+    degree = {}
+    for u, v in edges:
+        degree[u] = degree.get(u, 0) + 1
+        degree[v] = degree.get(v, 0) + 1
+    held_out = []
+    budget = int(round(fraction * len(edges)))
+    for i in rng.permutation(len(edges)):
+        if len(held_out) >= budget:
+            break
+        u, v = edges[i]
+        if degree[u] > 1 and degree[v] > 1:
+            held_out.append((u, v))
+            degree[u] -= 1
+            degree[v] -= 1
+    return held_out
+
+def recall_at_k(model, graph, held_out, k=10, candidate_type='target', block_size=1024):
+    """
+    Recall@k of held-out links: for each source node, all nodes of
+    `candidate_type` it is not linked to in the training WalkGraph are
+    ranked by link score, and a held-out link counts as recalled if its
+    target is among the top `k`.
+
+    Returns:
+        Dictionary with recall, the number of held-out links and k.
+    """
+    candidates = graph.nodes_of_type(candidate_type)
+    candidate_vectors = model._normalized(model._positions.get_indexer([graph.nodes[c] for c in candidates]))
+    column = np.full(len(graph), -1)
+    column[candidates] = np.arange(len(candidates))
+    top_k = min(k, len(candidates))
+    expected = {}
+    for source, target in held_out:
+        expected.setdefault(graph.index([source])[0], []).append(graph.index([target])[0])
+
+    sources = np.fromiter(expected, dtype=np.int64)
+    hits = 0
+    for start in range(0, len(sources), block_size):
+        block = sources[start : start + block_size]
+        scores = model._normalized(model._positions.get_indexer([graph.nodes[s] for s in block])) @ candidate_vectors.T
+        for row, source in enumerate(block):
+            # Links of the training graph are not candidates
+            neighbours = graph.indices[graph.indptr[source] : graph.indptr[source + 1]]
+            known = column[neighbours]
+            scores[row, known[known >= 0]] = -np.inf
+            top = np.argpartition(-scores[row], top_k - 1)[:top_k] if top_k else []
+            hits += len(set(candidates[top]) & set(expected[source]))
+    return {'recall': hits / max(len(held_out), 1), 'links': len(held_out), 'k': k}
+
+if __name__ == "__main__":
+    from scripts.build_graph import parse_drugbank
+
+    parser = argparse.ArgumentParser()
+    parser.add_argument('xml_file', help="DrugBank XML file")
+    parser.add_argument('--dimensions', type=int, default=64)
+    parser.add_argument('--p', type=float, default=1.0)
+    parser.add_argument('--q', type=float, default=1.0)
+    parser.add_argument('--workers', type=int, default=1, help="processes generating walks")
+    parser.add_argument('--evaluate', action='store_true', help="report recall@k on held-out targets edges")
+    parser.add_argument('--k', type=int, default=10)
+    args = parser.parse_args()
+
+    drug_graph = parse_drugbank(args.xml_file)
+    model = Node2Vec(dimensions=args.dimensions, p=args.p, q=args.q, workers=args.workers)
+    if args.evaluate:
+        held_out = split_links(drug_graph)
+        train_graph = WalkGraph.from_graph(drug_graph, exclude=held_out)
+        model.fit(train_graph)
+        print(recall_at_k(model, train_graph, held_out, args.k))
+    else:
+        model.fit(WalkGraph.from_graph(drug_graph))
+    model.save(NODE_EMBEDDINGS_PATH)
+    print(f"Node embeddings saved to {NODE_EMBEDDINGS_PATH}")
@@ -0,0 +1,480 @@
+import json
+import logging
+import os
+import uuid
+from typing import Any, List, Optional
+
+import numpy as np
+
+# Rows the write log may hold before the snapshot is rewritten, at least
+LOG_MIN_ROWS = 1024
+
+
+class Document:
+    """Search result with the same attributes as a LangChain document."""
+
+    def __init__(self, page_content: str, metadata: Optional[dict] = None):
+        self.page_content = page_content
+        self.metadata = metadata or {}
+
+    def __repr__(self) -> str:
+        return f"Document(page_content={self.page_content!r}, metadata={self.metadata!r})"
+
+
+def kmeans(
+    vectors: np.ndarray, k: int, iterations: int = 10, seed: int = 0
+) -> np.ndarray:
+    """
+    Spherical k-means (Lloyd iterations on unit vectors) for the IVF
+    coarse quantizer.
+
+    Returns:
+        Array of shape (k, dim) with unit-norm centroids.
+    """
+    rng = np.random.default_rng(seed)
+    k = min(k, len(vectors))
+    centroids = vectors[rng.choice(len(vectors), size=k, replace=False)].copy()
+    for _ in range(iterations):
+        assignment = np.argmax(vectors @ centroids.T, axis=1)
+        for c in range(k):
+            members = vectors[assignment == c]
+            if len(members):
+                centroids[c] = members.sum(axis=0)
+            else:
+                centroids[c] = vectors[rng.integers(len(vectors))]
+        centroids /= np.linalg.norm(centroids, axis=1, keepdims=True) + 1e-12
+    return centroids
+
+
+class VectorDatabaseAgentLocal:
+    def __init__(
+        self,
+        embedding_func: Optional[object] = None,
+        connection_args: Optional[dict] = None,
+    ) -> None:
+        """
+        Embedded vector store with the same contract as the Milvus agent
+        (`connect`, `similarity_search`), for small corpora and CI. Vectors
+        are kept L2-normalized in a float32 matrix that is memory-mapped
+        from disk, so scores are cosine similarities.
+
+        Args:
+            embedding_func (object): Embedding model with `embed_documents`
+                and `embed_query` methods (LangChain `Embeddings` interface).
+
+            connection_args (dict): Options of the store:
+                "path": directory for persistence (None keeps everything in
+                    memory),
+                "index": "exact" (brute force, default) or "ivf" (inverted
+                    file over k-means clusters; exact until `build_index`
+                    has trained the clusters),
+                "nlist": number of IVF clusters (default: 4 * sqrt(N)),
+                "nprobe": number of clusters scanned per query (default 8),
+                "autosave": make every write durable (default True). Writes
+                    are appended to a log next to the snapshot, which is
+                    rewritten once the log holds as many rows as it, so N
+                    inserts cost O(N) I/O. Bulk loaders can turn it off and
+                    call `save` once.
+        """
+        connection_args = connection_args or {}
+        self.embedding_func = embedding_func
+        self.path = connection_args.get("path")
+        self.index_type = connection_args.get("index", "exact")
+        if self.index_type not in ["exact", "ivf"]:
+            raise ValueError("Invalid index. Choose either 'exact' or 'ivf'.")
+        self.nlist = connection_args.get("nlist")
+        self.nprobe = connection_args.get("nprobe", 8)
+        self.autosave = connection_args.get("autosave", True)
+
+        self.dim = None
+        self._vectors = None  # capacity x dim, first `_count` rows in use
+        self._count = 0
+        self._alive = np.zeros(0, dtype=bool)
+        self._row_doc = np.zeros(0, dtype=np.int32)
+        self._doc_ids = []  # doc code -> doc id
+        self._doc_codes = {}  # doc id -> doc code
+        self._texts = []
+        self._metadatas = []
+        self._centroids = None
+        self._row_list = np.zeros(0, dtype=np.int32)
+        self._lists = None
+        self._write_listeners = []
+        self._saved_count = 0  # rows in the snapshot
+        self._log_rows = 0  # rows added since, in the log
+
+    def add_write_listener(self, callback: callable) -> None:
+        """Call `callback()` after every write, e.g. to invalidate caches."""
+        self._write_listeners.append(callback)
+
+    def _notify_write(self) -> None:
+        for callback in self._write_listeners:
+            callback()
+
+    # Persistence
+
+    def _file(self, name: str) -> str:
+        return os.path.join(self.path, name)
+
+    def connect(self) -> None:
+        """Open the store, loading a persisted index and its write log if there are."""
+        if not self.path:
+            return
+        os.makedirs(self.path, exist_ok=True)
+        if os.path.exists(self._file("meta.json")):
+            with open(self._file("meta.json")) as f:
+                meta = json.load(f)
+            self.dim = meta["dim"]
+            self._count = meta["count"]
+            self._doc_ids = meta["doc_ids"]
+            self._doc_codes = {d: i for i, d in enumerate(self._doc_ids)}
+            self._texts = meta["texts"]
+            self._metadatas = meta["metadatas"]
+            self.index_type = meta.get("index", self.index_type)
+            arrays = np.load(self._file("arrays.npz"))
+            self._alive = arrays["alive"].copy()
+            self._row_doc = arrays["row_doc"].copy()
+            if "centroids" in arrays:
+                self._centroids = arrays["centroids"]
+                self._row_list = arrays["row_list"].copy()
+                self._lists = None
+        self._saved_count = self._count
+        self._replay_log()
+        if self.dim is None or not os.path.exists(self._file("vectors.f32")):
+            return
+        # The file may have grown after the snapshot was written
+        capacity = os.path.getsize(self._file("vectors.f32")) // (self.dim * 4)
+        self._vectors = np.memmap(
+            self._file("vectors.f32"),
+            dtype=np.float32,
+            mode="r+",
+            shape=(capacity, self.dim),
+        )
+        logging.info(f"Loaded local vector store with {self._count} rows")
+
+    def _replay_log(self) -> None:
+        """Apply the writes logged since the last snapshot."""
+        if not os.path.exists(self._file("log.jsonl")):
+            return
+        with open(self._file("log.jsonl")) as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    # A write interrupted while logging; nothing follows it
+                    break
+                if record["op"] == "add":
+                    self.dim = record["dim"]
+                    lists = record.get("lists")
+                    self._append_rows(
+                        record["doc_id"],
+                        record["texts"],
+                        record["metadatas"],
+                        None if lists is None else np.asarray(lists, dtype=np.int32),
+                    )
+                    self._log_rows += len(record["texts"])
+                else:
+                    self._tombstone(record["doc_id"])
+
+    def _log(self, record: dict) -> None:
+        """
+        Make a write durable by appending it to the log, or by rewriting the
+        snapshot once the log holds as many rows as it.
+        """
+        if not self.autosave or not self.path:
+            return
+        if self._log_rows >= max(self._saved_count, LOG_MIN_ROWS):
+            self.save()
+            return
+        if isinstance(self._vectors, np.memmap):
+            self._vectors.flush()
+        with open(self._file("log.jsonl"), "a") as f:
+            f.write(json.dumps(record) + "\n")
+
+    def save(self) -> None:
+        """Flush vectors and write the row metadata and index to `path`."""
+        if not self.path or self._vectors is None:
+            return
+        if isinstance(self._vectors, np.memmap):
+            self._vectors.flush()
+        arrays = {"alive": self._alive, "row_doc": self._row_doc}
+        if self._centroids is not None:
+            arrays["centroids"] = self._centroids
+            arrays["row_list"] = self._row_list
+        np.savez(self._file("arrays.npz"), **arrays)
+        meta = {
+            "dim": self.dim,
+            "count": self._count,
+            "capacity": len(self._vectors),
+            "index": self.index_type,
+            "doc_ids": self._doc_ids,
+            "texts": self._texts,
+            "metadatas": self._metadatas,
+        }
+        tmp = self._file("meta.json.tmp")
+        with open(tmp, "w") as f:
+            json.dump(meta, f)
+        os.replace(tmp, self._file("meta.json"))
+        if os.path.exists(self._file("log.jsonl")):
+            os.remove(self._file("log.jsonl"))
+        self._saved_count = self._count
+        self._log_rows = 0
+
+    def _reserve(self, n: int) -> None:
+        """Make room for `n` more rows, doubling the capacity as needed."""
+        capacity = 0 if self._vectors is None else len(self._vectors)
+        needed = self._count + n
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, 2 * capacity, 1024)
+        if self.path:
+            if isinstance(self._vectors, np.memmap):
+                self._vectors.flush()
+                del self._vectors
+            with open(self._file("vectors.f32"), "ab") as f:
+                f.truncate(new_capacity * self.dim * 4)
+            self._vectors = np.memmap(
+                self._file("vectors.f32"),
+                dtype=np.float32,
+                mode="r+",
+                shape=(new_capacity, self.dim),
+            )
+        else:
+            vectors = np.zeros((new_capacity, self.dim), dtype=np.float32)
+            if self._vectors is not None:
+                vectors[: self._count] = self._vectors[: self._count]
+            self._vectors = vectors
+
+    # Writes
+
+    def add_vectors(
+        self,
+        vectors: np.ndarray,
+        texts: List[str],
+        metadatas: Optional[List[dict]] = None,
+        doc_id: Optional[str] = None,
+    ) -> str:
+        """
+        Insert precomputed embeddings as chunks of one document.
+
+        Returns:
+            The document id.
+        """
+        vectors = np.asarray(vectors, dtype=np.float32)
+        if vectors.ndim != 2 or len(vectors) != len(texts):
+            raise ValueError("Expected one vector per text.")
+        if self.dim is None:
+            self.dim = vectors.shape[1]
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(
+                f"Vector dimension {vectors.shape[1]} does not match the "
+                f"store dimension {self.dim}."
+            )
+        vectors = vectors / (np.linalg.norm(vectors, axis=1, keepdims=True) + 1e-12)
+
+        doc_id = doc_id or uuid.uuid4().hex
+        n = len(vectors)
+        self._reserve(n)
+        self._vectors[self._count : self._count + n] = vectors
+        metadatas = [dict(m, doc_id=doc_id) for m in metadatas or [{} for _ in texts]]
+        lists = None
+        if self._centroids is not None:
+            lists = np.argmax(vectors @ self._centroids.T, axis=1).astype(np.int32)
+        self._append_rows(doc_id, texts, metadatas, lists)
+
+        self._log_rows += n
+        record = {"op": "add", "dim": self.dim, "doc_id": doc_id, "texts": list(texts), "metadatas": metadatas}
+        if lists is not None:
+            record["lists"] = lists.tolist()
+        self._log(record)
+        self._notify_write()
+        return doc_id
+
+    def _append_rows(
+        self,
+        doc_id: str,
+        texts: List[str],
+        metadatas: List[dict],
+        lists: Optional[np.ndarray],
+    ) -> None:
+        """Row bookkeeping of an insert whose vectors are already written."""
+        if doc_id not in self._doc_codes:
+            self._doc_codes[doc_id] = len(self._doc_ids)
+            self._doc_ids.append(doc_id)
+        code = self._doc_codes[doc_id]
+
+        n = len(texts)
+        self._count += n
+        self._alive = np.concatenate([self._alive, np.ones(n, dtype=bool)])
+        self._row_doc = np.concatenate(
+            [self._row_doc, np.full(n, code, dtype=np.int32)]
+        )
+        self._texts.extend(texts)
+        self._metadatas.extend(metadatas)
+        if lists is not None:
+            self._row_list = np.concatenate([self._row_list, lists])
+            self._lists = None
+
+    def add_texts(
+        self,
+        texts: List[str],
+        metadatas: Optional[List[dict]] = None,
+        doc_id: Optional[str] = None,
+    ) -> str:
+        """Embed texts with `embedding_func` and insert them as one document."""
+        # CachedEmbeddings hands back a matrix directly, skipping list conversion
+        embed = getattr(self.embedding_func, "embed_array", None)
+        vectors = embed(texts) if embed else self.embedding_func.embed_documents(texts)
+        return self.add_vectors(vectors, texts, metadatas, doc_id)
+
+    def store_embeddings(self, documents: List[Any]) -> str:
+        """Insert the chunks (objects with page_content and metadata) of one document."""
+        return self.add_texts(
+            [d.page_content for d in documents],
+            [dict(d.metadata or {}) for d in documents],
+        )
+
+    def remove_document(self, doc_id: str) -> bool:
+        """
+        Delete all chunks of a document. Rows are tombstoned and skipped by
+        searches; `compact` reclaims the space.
+        """
+        if not self._tombstone(doc_id):
+            return False
+        self._log({"op": "remove", "doc_id": doc_id})
+        self._notify_write()
+        return True
+
+    def _tombstone(self, doc_id: str) -> bool:
+        code = self._doc_codes.get(doc_id)
+        if code is None:
+            return False
+        self._alive[self._row_doc == code] = False
+        return True
+
+    def compact(self) -> None:
+        """Rewrite the store without deleted rows."""
+        keep = np.flatnonzero(self._alive)
+        vectors = np.array(self._vectors[keep])
+        texts = [self._texts[i] for i in keep]
+        metadatas = [self._metadatas[i] for i in keep]
+        row_doc = self._row_doc[keep]
+        row_list = self._row_list[keep] if self._centroids is not None else None
+
+        self._count = 0
+        self._vectors = None
+        if self.path and os.path.exists(self._file("vectors.f32")):
+            os.remove(self._file("vectors.f32"))
+        self._reserve(len(keep))
+        self._vectors[: len(keep)] = vectors
+        self._count = len(keep)
+        self._alive = np.ones(len(keep), dtype=bool)
+        self._row_doc = row_doc
+        self._texts = texts
+        self._metadatas = metadatas
+        if row_list is not None:
+            self._row_list = row_list
+            self._lists = None
+        self.save()
+        self._notify_write()
+
+    def build_index(self, nlist: Optional[int] = None, seed: int = 0) -> None:
+        """
+        Train the IVF coarse quantizer on the current vectors and switch the
+        store to approximate search. Rows inserted later are assigned to the
+        nearest existing cluster.
+        """
+        vectors = np.asarray(self._vectors[: self._count])
+        nlist = nlist or self.nlist or max(int(4 * np.sqrt(self._count)), 1)
+        sample = vectors
+        if len(vectors) > 256 * nlist:
+            rng = np.random.default_rng(seed)
+            sample = vectors[rng.choice(len(vectors), 256 * nlist, replace=False)]
+        self._centroids = kmeans(sample, nlist, seed=seed)
+        self._row_list = np.argmax(vectors @ self._centroids.T, axis=1).astype(
+            np.int32
+        )
+        self._lists = None
+        self.index_type = "ivf"
+        self.save()
+        self._notify_write()
+
+    # Search
+
+    def _allowed(
+        self, rows: Optional[np.ndarray], doc_ids: Optional[List[str]]
+    ) -> np.ndarray:
+        """Mask of live rows (among `rows`, or all rows) inside the workspace."""
+        if rows is None:
+            rows = slice(0, self._count)
+        allowed = self._alive[rows].copy()
+        if doc_ids is not None:
+            codes = [self._doc_codes[d] for d in doc_ids if d in self._doc_codes]
+            allowed &= np.isin(self._row_doc[rows], codes)
+        return allowed
+
+    def _inverted_lists(self) -> tuple:
+        """Rows sorted by IVF cluster, and the start offset of each cluster."""
+        if self._lists is None:
+            row_list = self._row_list[: self._count]
+            order = np.argsort(row_list, kind="stable")
+            offsets = np.searchsorted(
+                row_list[order], np.arange(len(self._centroids) + 1)
+            )
+            self._lists = (order, offsets)
+        return self._lists
+
+    def search_vector(
+        self, query: np.ndarray, k: int = 3, doc_ids: Optional[List[str]] = None
+    ) -> List[tuple]:
+        """
+        Return the `k` nearest rows to an embedding as (row, score) pairs.
+        The workspace filter is applied to the candidate set before ranking,
+        so `k` results are returned whenever `k` rows match it.
+        """
+        if self._count == 0:
+            return []
+        query = np.asarray(query, dtype=np.float32)
+        query = query / (np.linalg.norm(query) + 1e-12)
+
+        ivf = self.index_type == "ivf" and self._centroids is not None
+        if ivf:
+            probe = np.argsort(-(self._centroids @ query))[: self.nprobe]
+            order, offsets = self._inverted_lists()
+            rows = np.concatenate(
+                [order[offsets[c] : offsets[c + 1]] for c in probe]
+            )
+            candidates = rows[self._allowed(rows, doc_ids)]
+        else:
+            candidates = np.flatnonzero(self._allowed(None, doc_ids))
+
+        if len(candidates) == 0:
+            return []
+        # IVF candidates come in cluster order, not row order
+        if len(candidates) == self._count and not ivf:
+            scores = self._vectors[: self._count] @ query
+        else:
+            scores = self._vectors[candidates] @ query
+        k = min(k, len(candidates))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(int(candidates[i]), float(scores[i])) for i in top]
+
+    def similarity_search(
+        self, query: str, k: int = 3, doc_ids: Optional[List[str]] = None
+    ) -> List[Document]:
+        """
+        Embed the query and return the `k` most similar chunks, optionally
+        restricted to the documents in `doc_ids`.
+        """
+        hits = self.search_vector(self.embedding_func.embed_query(query), k, doc_ids)
+        return [
+            Document(self._texts[row], dict(self._metadatas[row], score=score))
+            for row, score in hits
+        ]
+
+    def get_all_documents(self) -> List[str]:
+        alive_codes = set(self._row_doc[: self._count][self._alive[: self._count]])
+        return [d for d in self._doc_ids if self._doc_codes[d] in alive_codes]
+
+    def __len__(self) -> int:
+        return int(self._alive[: self._count].sum())
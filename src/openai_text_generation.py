@@ -1,34 +1,57 @@
+import sys
+
 import openai
-from time import sleep
+
+from model.llm_executor import LLMExecutor, OpenAIChatTransport, RetryableError
 
 # Set up your OpenAI API key
 openai.api_key = 'your-api-key'
 
-# Define the prompt input from the user
-input_text = input("Enter your prompt: ").strip()
-
-if not input_text:
-    print("No prompt provided.")
-else:
-    try:
-        # Call the OpenAI API to generate the response using GPT-3.5
-        response = openai.Completion.create(
-            engine="gpt-3.5-turbo",  # GPT-3.5 model
-            prompt=input_text,
-            max_tokens=500,  # Maximum number of tokens to generate
-            temperature=0.7,  # Adjust temperature for creativity (higher = more creative)
-            top_p=0.9,  # Nucleus sampling
-            frequency_penalty=0,  # Control repetition
-            presence_penalty=0,  # Encourage new topics
-            n=1,  # Number of outputs (1 for single output)
-            stop=None  # No stop sequence (can define if needed)
-        )
-
-        # Extract the generated text from the response
-        generated_text = response.choices[0].text.strip()
-
-        # Print the generated text
-        print("\nGenerated Text:\n", generated_text)
-    except openai.error.RateLimitError:
-        print("Rate limit exceeded. Please try again later.")
-        sleep(60)  # Wait for a minute before retrying
+# Generation parameters shared by single and batch mode
+GENERATION_PARAMS = dict(
+    max_tokens=500,  # Maximum number of tokens to generate
+    temperature=0.7,  # Adjust temperature for creativity (higher = more creative)
+    top_p=0.9,  # Nucleus sampling
+    frequency_penalty=0,  # Control repetition
+    presence_penalty=0,  # Encourage new topics
+    n=1,  # Number of outputs (1 for single output)
+)
+
+# gpt-3.5-turbo is a chat model, so requests go to the chat completion API.
+# The executor retries rate-limit errors with backoff instead of dropping them.
+executor = LLMExecutor(transport=OpenAIChatTransport(), model_name="gpt-3.5-turbo")
+
+
+def generate_batch(prompt_file):
+    """Generate a response for every non-empty line of `prompt_file`."""
+    with open(prompt_file) as f:
+        prompts = [line.strip() for line in f if line.strip()]
+    results = executor.run_batch(prompts, return_exceptions=True, **GENERATION_PARAMS)
+    for prompt, result in zip(prompts, results):
+        print(f"\nPrompt: {prompt}")
+        if isinstance(result, Exception):
+            print(f"Failed: {result}")
+        else:
+            print(f"Generated Text:\n{result}")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1:
+        # Batch mode: python -m src.openai_text_generation prompts.txt
+        generate_batch(sys.argv[1])
+        sys.exit()
+
+    # Define the prompt input from the user
+    input_text = input("Enter your prompt: ").strip()
+
+    if not input_text:
+        print("No prompt provided.")
+    else:
+        try:
+            # Stream the response from GPT-3.5 and print tokens as they arrive
+            print("\nGenerated Text:")
+            for token in executor.stream_sync(input_text, **GENERATION_PARAMS):
+                print(token, end="", flush=True)
+            print()
+        except RetryableError:
+            print("Rate limit exceeded. Please try again later.")
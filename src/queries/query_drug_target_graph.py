@@ -6,7 +6,6 @@
 
 #Importing Required Libraries
 
-from py2neo import Graph
 import networkx as nx
 import matplotlib.pyplot as plt
 import logging
@@ -19,22 +18,29 @@ NEO4J_URL = "bolt://localhost:7687"
 NEO4J_USER = "neo4j"
 NEO4J_PASSWORD = "password"
 
-# Connect to the Neo4j database
-graph_db = Graph(NEO4J_URL, auth=(NEO4J_USER, NEO4J_PASSWORD))
-Function to Retrieve Nodes and Relationships
-python
-Copy code
+# Connection to the Neo4j database, opened on first use
+graph_db = None
+
+def get_graph_db():
+    global graph_db
+    if graph_db is None:
+        from py2neo import Graph
+
+        graph_db = Graph(NEO4J_URL, auth=(NEO4J_USER, NEO4J_PASSWORD))
+    return graph_db
+
+#Functions to Retrieve Nodes and Relationships
 def get_all_drugs():
     """Retrieve all drug nodes from the Neo4j database."""
     query = "MATCH (d:drug) RETURN d.id as id, d.label as name, d.drug_type as type"
-    results = graph_db.run(query).data()
+    results = get_graph_db().run(query).data()
     logging.info(f"Retrieved {len(results)} drugs")
     return results
 
 def get_all_targets():
     """Retrieve all target nodes from the Neo4j database."""
     query = "MATCH (t:target) RETURN t.id as id, t.label as name"
-    results = graph_db.run(query).data()
+    results = get_graph_db().run(query).data()
     logging.info(f"Retrieved {len(results)} targets")
     return results
 
@@ -44,18 +50,93 @@ def get_drug_target_relationships():
     MATCH (d:drug)-[r:targets]->(t:target)
     RETURN d.id as drug_id, t.id as target_id, r
     """
-    results = graph_db.run(query).data()
+    results = get_graph_db().run(query).data()
     logging.info(f"Retrieved {len(results)} drug-target relationships")
-return results
+    return results
+
+def _drug_filter(text, drug_type):
+    """WHERE clause and parameters of the drug search filters."""
+    conditions, parameters = [], {}
+    if text:
+        conditions.append("(toLower(d.label) CONTAINS toLower($text) OR d.id = $text)")
+        parameters['text'] = text
+    if drug_type:
+        conditions.append("d.drug_type = $drug_type")
+        parameters['drug_type'] = drug_type
+    where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+    return where, parameters
+
+def search_drugs(text=None, drug_type=None, skip=0, limit=50):
+    """
+    One page of the drugs whose name contains `text` (or whose id is
+    `text`) and whose type is `drug_type`, ordered by id. Filtering and
+    paging happen in the database.
+    """
+    where, parameters = _drug_filter(text, drug_type)
+    query = f"""
+    MATCH (d:drug) {where}
+    RETURN d.id as id, d.label as name, d.drug_type as type
+    ORDER BY d.id SKIP $skip LIMIT $limit
+    """
+    return get_graph_db().run(query, skip=skip, limit=limit, **parameters).data()
+
+def count_drugs(text=None, drug_type=None):
+    """Number of drugs matching the `search_drugs` filters."""
+    where, parameters = _drug_filter(text, drug_type)
+    query = f"MATCH (d:drug) {where} RETURN count(d) as count"
+    return get_graph_db().run(query, **parameters).evaluate()
+
+def get_drug_types():
+    """Distinct drug types, for filter choices."""
+    query = "MATCH (d:drug) WHERE d.drug_type IS NOT NULL RETURN DISTINCT d.drug_type as type ORDER BY type"
+    return [row['type'] for row in get_graph_db().run(query).data()]
+
+def get_neighborhood_summary(drug_id):
+    """
+    Number of neighbours of a drug per relationship type and neighbour
+    type, counted in the database without returning the neighbours.
+    """
+    query = """
+    MATCH (d:drug {id: $drug_id})-[r]->(n)
+    RETURN type(r) as relationship, labels(n)[0] as type, count(*) as count
+    ORDER BY count DESC
+    """
+    return get_graph_db().run(query, drug_id=drug_id).data()
+
+def get_drug_neighborhood(drug_id, relationship=None, node_type=None, text=None, skip=0, limit=50):
+    """
+    One page of the neighbours of a drug, optionally only those reached by
+    `relationship`, of `node_type` or whose name contains `text`, ordered
+    by relationship and id. Filtering and paging happen in the database,
+    so high-degree drugs are never loaded whole.
+    """
+    query = """
+    MATCH (d:drug {id: $drug_id})-[r]->(n)
+    WHERE ($relationship IS NULL OR type(r) = $relationship)
+      AND ($node_type IS NULL OR $node_type IN labels(n))
+      AND ($text IS NULL OR toLower(n.label) CONTAINS toLower($text))
+    RETURN n.id as id, n.label as name, labels(n)[0] as type, type(r) as relationship
+    ORDER BY relationship, id SKIP $skip LIMIT $limit
+    """
+    return get_graph_db().run(
+        query,
+        drug_id=drug_id,
+        relationship=relationship,
+        node_type=node_type,
+        text=text or None,
+        skip=skip,
+        limit=limit,
+    ).data()
+
 #Function to Analyze Data
 def find_shortest_path_between_drugs(drug_id_1, drug_id_2):
     """Find the shortest path between two drugs in the Neo4j database."""
-    query = f"""
-    MATCH (d1:drug {{id: '{drug_id_1}'}}), (d2:drug {{id: '{drug_id_2}'}}),
+    query = """
+    MATCH (d1:drug {id: $drug_id_1}), (d2:drug {id: $drug_id_2}),
           p = shortestPath((d1)-[*]-(d2))
     RETURN p
     """
-    result = graph_db.run(query).evaluate()
+    result = get_graph_db().run(query, drug_id_1=drug_id_1, drug_id_2=drug_id_2).evaluate()
     if result:
         logging.info(f"Found shortest path between {drug_id_1} and {drug_id_2}")
     else:
@@ -68,7 +149,7 @@ def visualize_graph():
     MATCH (n)-[r]->(m)
     RETURN n.id as source, m.id as target, type(r) as relationship
     """
-    results = graph_db.run(query).data()
+    results = get_graph_db().run(query).data()
     
     G = nx.DiGraph()
     
@@ -87,33 +168,6 @@ def visualize_graph():
 #Shortest Path Function: Implement a function to find the shortest path between two drugs.
 #Graph Visualization: Use NetworkX and Matplotlib to visualize the drug-target graph.
 
-if __name__ == "__main__":
-    logging.info("Starting query script")
-    
-    # Retrieve and log all drugs
-    drugs = get_all_drugs()
-    for drug in drugs:
-        logging.info(f"Drug: {drug['id']}, Name: {drug['name']}, Type: {drug['type']}")
-    
-    # Retrieve and log all targets
-    targets = get_all_targets()
-    for target in targets:
-        logging.info(f"Target: {target['id']}, Name: {target['name']}")
-    
-    # Retrieve and log all drug-target relationships
-    relationships = get_drug_target_relationships()
-    for rel in relationships:
-        logging.info(f"Drug {rel['drug_id']} targets {rel['target_id']}")
-    
-    # Example of finding shortest path
-    path = find_shortest_path_between_drugs("DB00001", "DB00002")
-    if path:
-        logging.info(f"Shortest path: {path}")
-    
-    # Visualize the graph
-    visualize_graph()
-    
-    logging.info("Query script completed successfully")
 # Main Execution Block
 if __name__ == "__main__":
     logging.info("Starting query script")
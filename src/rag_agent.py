@@ -1,11 +1,43 @@
+import logging
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
 from typing import Optional, List, Tuple, Any
 from .database_agent import DatabaseAgent
 from .vectorstore_agent import VectorDatabaseAgentMilvus
+from .local_vectorstore_agent import VectorDatabaseAgentLocal
+from .retrieval_cache import RetrievalCache
 
 
 class RagAgentModeEnum:
     VectorStore = "vectorstore"
     KG = "kg"
+    Hybrid = "hybrid"
+
+
+def reciprocal_rank_fusion(
+    ranked_lists: List[List[Tuple[str, Any]]], k: int = 60
+) -> List[Tuple[str, Any]]:
+    """
+    Merge ranked result lists with reciprocal rank fusion: every result scores
+    sum(1 / (k + rank)) over the lists it appears in. Results are identified
+    by their text; the metadata of the first occurrence is kept.
+
+    Args:
+        ranked_lists: Lists of (page_content, metadata) tuples, best first.
+
+        k: Smoothing constant; 60 is the value from the original paper.
+
+    Returns:
+        Fused list of (page_content, metadata) tuples, best first.
+    """
+    scores = {}
+    first = {}
+    for results in ranked_lists:
+        for rank, (content, metadata) in enumerate(results, start=1):
+            scores[content] = scores.get(content, 0.0) + 1.0 / (k + rank)
+            first.setdefault(content, metadata)
+    ranked = sorted(scores, key=scores.get, reverse=True)
+    return [(content, first[content]) for content in ranked]
 
 
 class RagAgent:
@@ -20,13 +52,17 @@ class RagAgent:
         conversation_factory: Optional[callable] = None,
         embedding_func: Optional[object] = None,
         documentids_workspace: Optional[List[str]] = None,
+        backend_timeout: Optional[float] = None,
+        vectorstore_backend: Optional[str] = "milvus",
+        retrieval_cache: Optional[RetrievalCache] = None,
     ) -> None:
         """
         Create a RAG agent that can return results from a database or vector
         store using a query engine.
 
         Args:
-            mode (str): The mode of the agent. Either "kg" or "vectorstore".
+            mode (str): The mode of the agent. Either "kg", "vectorstore" or
+                "hybrid" (query both concurrently and fuse the results).
 
             model_name (str): The name of the model to use.
 
@@ -41,33 +77,66 @@ class RagAgent:
                 False, will not retrieve any results and return an empty list.
 
             schema_config_or_info_dict (dict): A dictionary of schema
-                information for the database. Required if mode is "kg".
+                information for the database. Required if mode is "kg" or
+                "hybrid".
 
             conversation_factory (callable): A function used to create a
                 conversation for creating the KG query. Required if mode is
                 "kg".
 
             embedding_func (object): An embedding function. Required if mode is
-                "vectorstore".
+                "vectorstore" or "hybrid".
 
             documentids_workspace (Optional[List[str]], optional): a list of
                 document IDs that defines the scope within which similarity
                 search occurs. Defaults to None, which means the operations will
                 be performed across all documents in the database.
 
+            backend_timeout (Optional[float]): In hybrid mode, seconds to wait
+                for each backend. A backend that does not answer in time is
+                left out of the fused result. Defaults to None (no timeout).
+
+            vectorstore_backend (Optional[str]): "milvus" (default) for the
+                Milvus service, or "local" for the embedded
+                VectorDatabaseAgentLocal, configured by `connection_args`.
+
+            retrieval_cache (Optional[RetrievalCache]): Cache of retrieval
+                results, keyed on mode, normalized question, `n_results` and
+                `documentids_workspace`. Writes to the local vector store
+                invalidate it automatically; call `invalidate_cache` after
+                writing to the knowledge graph or Milvus. Defaults to None
+                (no caching). A cache can be shared between agents.
+
         Raises:
             ValueError: If an invalid mode is provided or required arguments
                 are missing.
         """
-        if mode not in [RagAgentModeEnum.KG, RagAgentModeEnum.VectorStore]:
-            raise ValueError("Invalid mode. Choose either 'kg' or 'vectorstore'.")
+        if mode not in [
+            RagAgentModeEnum.KG,
+            RagAgentModeEnum.VectorStore,
+            RagAgentModeEnum.Hybrid,
+        ]:
+            raise ValueError(
+                "Invalid mode. Choose either 'kg', 'vectorstore' or 'hybrid'."
+            )
 
-        if mode == RagAgentModeEnum.KG and not schema_config_or_info_dict:
+        if (
+            mode in [RagAgentModeEnum.KG, RagAgentModeEnum.Hybrid]
+            and not schema_config_or_info_dict
+        ):
             raise ValueError("Please provide a schema config or info dict.")
 
-        if mode == RagAgentModeEnum.VectorStore and not embedding_func:
+        if (
+            mode in [RagAgentModeEnum.VectorStore, RagAgentModeEnum.Hybrid]
+            and not embedding_func
+        ):
             raise ValueError("Please provide an embedding function.")
 
+        if vectorstore_backend not in ["milvus", "local"]:
+            raise ValueError(
+                "Invalid vectorstore backend. Choose either 'milvus' or 'local'."
+            )
+
         self.mode = mode
         self.model_name = model_name
         self.connection_args = connection_args
@@ -77,30 +146,120 @@ class RagAgent:
         self.conversation_factory = conversation_factory
         self.embedding_func = embedding_func
         self.documentids_workspace = documentids_workspace
+        self.backend_timeout = backend_timeout
+        self.vectorstore_backend = vectorstore_backend
+        self.retrieval_cache = retrieval_cache
         self.last_response = []
         self.agent = None
         self.query_func = None
+        self.backends = {}
+        self._fanout_pool = None
         self._initialize_agent()
 
     def _initialize_agent(self) -> None:
         """Initialize the appropriate database or vector store agent."""
-        if self.mode == RagAgentModeEnum.KG:
-            self.agent = DatabaseAgent(
+        if self.mode in [RagAgentModeEnum.KG, RagAgentModeEnum.Hybrid]:
+            agent = DatabaseAgent(
                 model_name=self.model_name,
                 connection_args=self.connection_args,
                 schema_config_or_info_dict=self.schema_config_or_info_dict,
                 conversation_factory=self.conversation_factory,
             )
-            self.query_func = self.agent.get_query_results
-        elif self.mode == RagAgentModeEnum.VectorStore:
-            self.agent = VectorDatabaseAgentMilvus(
+            agent.connect()
+            self.backends[RagAgentModeEnum.KG] = (
+                agent,
+                agent.get_query_results,
+            )
+        if self.mode in [RagAgentModeEnum.VectorStore, RagAgentModeEnum.Hybrid]:
+            vectorstore_class = (
+                VectorDatabaseAgentLocal
+                if self.vectorstore_backend == "local"
+                else VectorDatabaseAgentMilvus
+            )
+            agent = vectorstore_class(
                 embedding_func=self.embedding_func,
                 connection_args=self.connection_args,
             )
-            self.query_func = self.agent.similarity_search
+            agent.connect()
+            if self.retrieval_cache is not None and hasattr(
+                agent, "add_write_listener"
+            ):
+                agent.add_write_listener(
+                    lambda: self.invalidate_cache(
+                        [RagAgentModeEnum.VectorStore, RagAgentModeEnum.Hybrid]
+                    )
+                )
+            self.backends[RagAgentModeEnum.VectorStore] = (
+                agent,
+                self._workspace_search(agent),
+            )
+
+        if self.mode == RagAgentModeEnum.Hybrid:
+            # Long-lived pool, so that a backend still running past its
+            # timeout does not block the caller on pool shutdown
+            self._fanout_pool = ThreadPoolExecutor(
+                max_workers=16, thread_name_prefix="rag-fanout"
+            )
+            self.query_func = self._hybrid_query
+        else:
+            self.agent, self.query_func = self.backends[self.mode]
+
+    def _hybrid_query(
+        self, user_question: str, n_results: int
+    ) -> Tuple[List[Tuple[str, Any]], bool]:
+        """
+        Query the knowledge graph and the vector store concurrently and fuse
+        their rankings. Latency is that of the slower backend, capped by
+        `backend_timeout`.
+
+        Returns:
+            Tuple[List[Tuple[str, Any]], bool]: The fused results, and whether
+                every backend answered (False if one timed out or failed).
+        """
+        futures = {
+            self._fanout_pool.submit(query_func, user_question, n_results): name
+            for name, (_, query_func) in self.backends.items()
+        }
+        done, not_done = wait(futures, timeout=self.backend_timeout)
+
+        ranked_lists = []
+        errors = []
+        for future in not_done:
+            future.cancel()
+            logging.warning(
+                f"{futures[future]} backend timed out after "
+                f"{self.backend_timeout}s; answering without it"
+            )
+        for future in done:
+            try:
+                ranked_lists.append(self._as_tuples(future.result()))
+            except Exception as e:
+                errors.append(e)
+                logging.warning(f"{futures[future]} backend failed: {e}")
+
+        if not ranked_lists:
+            if errors:
+                raise errors[0]
+            raise TimeoutError("No backend answered within the timeout.")
+
+        complete = len(ranked_lists) == len(futures)
+        return reciprocal_rank_fusion(ranked_lists)[:n_results], complete
+
+    def _workspace_search(self, agent) -> callable:
+        """Similarity search restricted to `documentids_workspace`, if set."""
+
+        def search(user_question: str, n_results: int):
+            if self.documentids_workspace is None:
+                return agent.similarity_search(user_question, n_results)
+            return agent.similarity_search(
+                user_question, n_results, doc_ids=self.documentids_workspace
+            )
+
+        return search
 
-        if self.agent:
-            self.agent.connect()
+    @staticmethod
+    def _as_tuples(results) -> List[Tuple[str, Any]]:
+        return [(result.page_content, result.metadata) for result in results]
 
     def generate_responses(self, user_question: str) -> List[Tuple[str, Any]]:
         """
@@ -117,13 +276,98 @@ class RagAgent:
         if not self.use_prompt:
             return []
 
+        self.last_response = self._retrieve(user_question)
+
+        return self.last_response
+
+    def _retrieve(self, user_question: str) -> List[Tuple[str, Any]]:
         if not self.query_func:
             raise ValueError("Agent not initialized.")
 
-        results = self.query_func(user_question, self.n_results)
+        key = None
+        if self.retrieval_cache is not None:
+            key = self.retrieval_cache.make_key(
+                self.mode,
+                user_question,
+                self.n_results,
+                self.documentids_workspace,
+            )
+            cached = self.retrieval_cache.get(key)
+            if cached is not None:
+                return cached
+
+        complete = True
+        if self.mode == RagAgentModeEnum.Hybrid:
+            results, complete = self.query_func(user_question, self.n_results)
+        else:
+            results = self._as_tuples(
+                self.query_func(user_question, self.n_results)
+            )
 
-        self.last_response = [
-            (result.page_content, result.metadata) for result in results
-        ]
+        # A fusion missing a backend is not cached, so that the next call
+        # asks the slow or failing backend again
+        if key is not None and complete:
+            self.retrieval_cache.put(key, results)
+        return results
 
-        return self.last_response
+    def invalidate_cache(self, modes: Optional[List[str]] = None) -> int:
+        """
+        Drop cached retrieval results after the underlying store was written
+        to.
+
+        Args:
+            modes (Optional[List[str]]): Only drop results of these modes.
+                Defaults to None (drop all).
+
+        Returns:
+            int: Number of dropped results.
+        """
+        if self.retrieval_cache is None:
+            return 0
+        return self.retrieval_cache.invalidate(modes)
+
+    def cache_stats(self) -> dict:
+        """Hit/miss counts of the retrieval cache (empty if disabled)."""
+        if self.retrieval_cache is None:
+            return {}
+        return self.retrieval_cache.stats()
+
+    def generate_responses_batch(
+        self, user_questions: List[str], max_workers: Optional[int] = 8
+    ) -> List[dict]:
+        """
+        Run the query function for many questions concurrently on a bounded
+        thread pool. A failing question does not affect the others.
+
+        Args:
+            user_questions (List[str]): The user questions.
+
+            max_workers (int): Maximum number of concurrent queries.
+
+        Returns:
+            results (List[dict]): One dictionary per question, in input order,
+                with the keys "question", "results" (list of tuples as
+                returned by `generate_responses`, empty on failure), "error"
+                (the exception or None) and "latency" (seconds).
+        """
+        if not self.use_prompt:
+            return [
+                {"question": q, "results": [], "error": None, "latency": 0.0}
+                for q in user_questions
+            ]
+
+        def run(question: str) -> dict:
+            start = time.perf_counter()
+            try:
+                results, error = self._retrieve(question), None
+            except Exception as e:
+                results, error = [], e
+            return {
+                "question": question,
+                "results": results,
+                "error": error,
+                "latency": time.perf_counter() - start,
+            }
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            return list(pool.map(run, user_questions))
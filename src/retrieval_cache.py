@@ -0,0 +1,114 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Iterable, List, Optional
+
+
+def normalize_question(question: str) -> str:
+    """Lower-case the question and collapse whitespace."""
+    return " ".join(question.lower().split())
+
+
+class RetrievalCache:
+    def __init__(
+        self,
+        max_entries: int = 1024,
+        ttl: Optional[float] = 300.0,
+        clock: Callable[[], float] = time.monotonic,
+    ) -> None:
+        """
+        In-memory cache of RAG retrieval results, keyed on mode, normalized
+        question, number of results and document workspace. Bounded by LRU
+        eviction and a time-to-live; thread-safe, so it can back batch
+        retrieval.
+
+        Args:
+            max_entries (int): Maximum number of cached results.
+
+            ttl (Optional[float]): Seconds after which an entry expires.
+                None keeps entries until they are evicted or invalidated.
+
+            clock (Callable): Monotonic clock, replaceable in tests.
+        """
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.clock = clock
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.expirations = 0
+        self.invalidations = 0
+
+    @staticmethod
+    def make_key(
+        mode: str,
+        question: str,
+        n_results: int,
+        workspace: Optional[Iterable[str]] = None,
+    ) -> tuple:
+        return (
+            mode,
+            normalize_question(question),
+            n_results,
+            None if workspace is None else tuple(sorted(workspace)),
+        )
+
+    def get(self, key: tuple) -> Optional[List[Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and self.ttl is not None:
+                if self.clock() - entry[0] > self.ttl:
+                    del self._entries[key]
+                    self.expirations += 1
+                    entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return list(entry[1])
+
+    def put(self, key: tuple, results: List[Any]) -> None:
+        with self._lock:
+            self._entries[key] = (self.clock(), list(results))
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def invalidate(self, modes: Optional[Iterable[str]] = None) -> int:
+        """
+        Drop cached results, e.g. after the underlying store was written to.
+
+        Args:
+            modes: Only drop entries of these modes; None drops everything.
+
+        Returns:
+            Number of dropped entries.
+        """
+        with self._lock:
+            if modes is None:
+                dropped = len(self._entries)
+                self._entries.clear()
+            else:
+                modes = set(modes)
+                stale = [k for k in self._entries if k[0] in modes]
+                for key in stale:
+                    del self._entries[key]
+                dropped = len(stale)
+            self.invalidations += dropped
+            return dropped
+
+    def stats(self) -> dict:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": len(self._entries),
+            "evictions": self.evictions,
+            "expirations": self.expirations,
+            "invalidations": self.invalidations,
+        }
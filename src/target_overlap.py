@@ -0,0 +1,189 @@
+# src/target_overlap.py
+import logging
+
+import numpy as np
+import pandas as pd
+import scipy.sparse as sp
+
+METRICS = ['jaccard', 'cosine']
+
+# Written by scripts/build_graph.py, read by the API
+TARGET_OVERLAP_PATH = 'data/processed/target_overlap.parquet'
+TARGET_CANDIDATES_PATH = 'data/processed/target_candidates.parquet'
+
+# Node types linked from drugs in parse_drugbank graphs
+FEATURE_TYPES = ['target', 'enzyme', 'pathway']
+
+def _top_k_per_row(rows, cols, scores, k, *extra):
+    """
+    Keep the `k` highest scores of every row of COO triplets sorted by row
+    and column (ties keep the lower column), best first per row; `extra`
+    arrays are filtered along.
+    """
+    if len(rows) == 0:
+        return (rows, cols, scores) + extra
+    # One stable sort on a composite key is several times faster than lexsort
+    span = float(scores.max()) + 1.0
+    order = np.argsort(rows * span - scores, kind='stable')
+    rows = rows[order]
+    starts = np.flatnonzero(np.diff(rows, prepend=-1))
+    rank = np.arange(len(rows)) - np.repeat(starts, np.diff(starts, append=len(rows)))
+    keep = order[rank < k]
+    return (rows[rank < k], cols[keep], scores[keep]) + tuple(e[keep] for e in extra)
+
+class DrugOverlap:
+    def __init__(self, drugs, features, incidence):
+        """
+        Sparse drug x feature incidence matrix (features are targets, enzymes
+        and/or pathways) with all-pairs overlap scoring by sparse matrix
+        products.
+
+        Args:
+            drugs: Drug ids, one per row.
+
+            features: Feature ids, one per column.
+
+            incidence: scipy sparse matrix (drugs x features); nonzero
+                entries mark a relationship.
+        """
+        self.drugs = list(drugs)
+        self.features = list(features)
+        self.incidence = sp.csr_matrix(incidence, dtype=np.float32)
+        # Binary: repeated relationships count once
+        self.incidence.sum_duplicates()
+        self.incidence.data[:] = 1.0
+        self.degree = np.asarray(self.incidence.sum(axis=1)).ravel()
+        self._drugs = pd.Index(self.drugs)
+        self._features = pd.Index(self.features)
+
+    @classmethod
+    def from_edges(cls, edges, drug_key='drug_id', feature_key='target_id'):
+        """
+        Build from relationship rows, e.g. the output of
+        `get_drug_target_relationships()` (dicts with 'drug_id' and
+        'target_id'), or (drug, feature) tuples when the keys are None.
+        """
+        if drug_key is None:
+            pairs = pd.DataFrame(list(edges), columns=['drug', 'feature'])
+        else:
+            pairs = pd.DataFrame([(e[drug_key], e[feature_key]) for e in edges], columns=['drug', 'feature'])
+        drug_codes, drugs = pd.factorize(pairs['drug'])
+        feature_codes, features = pd.factorize(pairs['feature'])
+        incidence = sp.coo_matrix(
+            (np.ones(len(pairs), dtype=np.float32), (drug_codes, feature_codes)),
+            shape=(len(drugs), len(features)),
+        )
+        return cls(drugs, features, incidence)
+
+    @classmethod
+    def from_graph(cls, graph, feature_types=('target',)):
+        """
+        Build from a `parse_drugbank` graph, with the edges from drug nodes to
+        nodes of the given types ('target', 'enzyme', 'pathway'); several
+        types are combined into one feature space.
+        """
+        types = set(feature_types)
+        if not types <= set(FEATURE_TYPES):
+            raise ValueError("Invalid feature type. Choose from 'target', 'enzyme' or 'pathway'.")
+        edges = [
+            (source, target)
+            for source, target in graph.edges()
+            if graph.nodes[source].get('type') == 'drug' and graph.nodes[target].get('type') in types
+        ]
+        overlap = cls.from_edges(edges, drug_key=None)
+        logging.info(f"Built {len(overlap.drugs)} x {len(overlap.features)} incidence matrix from {len(edges)} edges")
+        return overlap
+
+    def _score(self, shared, degree_a, degree_b, metric):
+        if metric == 'jaccard':
+            return shared / (degree_a + degree_b - shared)
+        return shared / np.sqrt(degree_a * degree_b)
+
+    def similar_drugs(self, k=10, metric='jaccard', block_size=4096, min_shared=1):
+        """
+        The `k` most similar drugs of every drug, by Jaccard or cosine
+        overlap of their features. Shared-feature counts come from
+        `incidence[block] @ incidence.T`, one block of drugs at a time, so
+        memory is bounded by the nonzeros of one block product.
+
+        Returns:
+            DataFrame with columns drug_id, similar_drug_id, score and
+            shared (number of shared features), best first per drug.
+        """
+        if metric not in METRICS:
+            raise ValueError("Invalid metric. Choose either 'jaccard' or 'cosine'.")
+        transposed = self.incidence.T.tocsc()
+        parts = []
+        for start in range(0, len(self.drugs), block_size):
+            shared = (self.incidence[start : start + block_size] @ transposed).tocsr()
+            shared.sort_indices()
+            shared = shared.tocoo()
+            rows, cols, counts = shared.row.astype(np.int64) + start, shared.col.astype(np.int64), shared.data
+            keep = (rows != cols) & (counts >= min_shared)
+            rows, cols, counts = rows[keep], cols[keep], counts[keep]
+            scores = self._score(counts, self.degree[rows], self.degree[cols], metric)
+            parts.append(_top_k_per_row(rows, cols, scores, k, counts))
+
+        empty = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0), np.zeros(0))
+        rows, cols, scores, counts = (np.concatenate(p) for p in zip(*parts, empty))
+        drugs = np.asarray(self.drugs, dtype=object)
+        return pd.DataFrame({
+            'drug_id': drugs[rows],
+            'similar_drug_id': drugs[cols],
+            'score': scores.astype(np.float64),
+            'shared': counts.astype(np.int64),
+        })
+
+    def similarity_matrix(self, pairs):
+        """Sparse drug x drug matrix of the scores in a `similar_drugs` result."""
+        rows = self._drugs.get_indexer(pairs['drug_id'])
+        cols = self._drugs.get_indexer(pairs['similar_drug_id'])
+        n = len(self.drugs)
+        return sp.csr_matrix((pairs['score'].to_numpy(), (rows, cols)), shape=(n, n))
+
+    def feature_candidates(self, pairs, k=20, features=None):
+        """
+        Repurposing candidates per feature (e.g. per target): drugs that do
+        not have the feature yet, ranked by the summed similarity to their
+        neighbours (from `similar_drugs`) that do.
+
+        Returns:
+            DataFrame with columns feature_id, drug_id, score and rank.
+        """
+        incidence = self.incidence
+        if features is not None:
+            selected = self._features.get_indexer(pd.Index(features).intersection(self._features))
+            incidence = incidence[:, selected]
+        else:
+            selected = np.arange(len(self.features))
+        scores = self.similarity_matrix(pairs) @ incidence
+        # Drugs that already have the feature are not candidates
+        scores = (scores - scores.multiply(incidence > 0)).tocsc()
+        scores.eliminate_zeros()
+        scores.sort_indices()
+        scores = scores.tocoo()
+        # Ranked per column (feature), so columns play the part of rows
+        cols, rows, values = _top_k_per_row(scores.col.astype(np.int64), scores.row.astype(np.int64), scores.data, k)
+        rank = np.arange(len(cols)) - np.searchsorted(cols, cols, side='left') + 1
+        return pd.DataFrame({
+            'feature_id': np.asarray(self.features, dtype=object)[selected[cols]],
+            'drug_id': np.asarray(self.drugs, dtype=object)[rows],
+            'score': values.astype(np.float64),
+            'rank': rank,
+        })
+
+def write_similarities(graph_db, pairs, relationship='SHARES_TARGETS_WITH', batch_size=5000):
+    """
+    Store `similar_drugs` results in Neo4j as relationships between drug
+    nodes, with score and shared properties, in batched UNWIND queries.
+    """
+    query = f"""
+    UNWIND $rows AS row
+    MATCH (a:drug {{id: row.drug_id}}), (b:drug {{id: row.similar_drug_id}})
+    MERGE (a)-[r:{relationship}]->(b)
+    SET r.score = row.score, r.shared = row.shared
+    """
+    rows = pairs[['drug_id', 'similar_drug_id', 'score', 'shared']].to_dict('records')
+    for start in range(0, len(rows), batch_size):
+        graph_db.run(query, rows=rows[start : start + batch_size])
+    logging.info(f"Wrote {len(rows)} {relationship} relationships")
@@ -1 +1,50 @@
+import networkx as nx
+import pytest
+from fastapi.testclient import TestClient
 
+from src.api import endpoints
+from src.api.graph_backend import InMemoryBackend, Neo4jBackend, create_backend
+
+
+@pytest.fixture
+def client():
+    graph = nx.DiGraph()
+    graph.add_node("DB00945", label="Aspirin", type="drug", drug_type="small molecule")
+    graph.add_node("BE0000017", label="Prostaglandin G/H synthase 1", type="target")
+    graph.add_node("SMP00001", label="Aspirin Pathway", type="pathway")
+    # Interaction partners are added without a drug_type
+    graph.add_node("DB00682", label="Warfarin", type="drug")
+    graph.add_edge("DB00945", "BE0000017", relationship="targets")
+    graph.add_edge("DB00945", "SMP00001", relationship="participates_in")
+    endpoints.set_graph_backend(InMemoryBackend.from_graph(graph))
+    yield TestClient(endpoints.app)
+    endpoints.set_graph_backend(None)
+
+
+def test_drug_target_and_relationships(client):
+    assert client.get("/drugs/DB00945").json() == {"id": "DB00945", "name": "Aspirin", "type": "small molecule"}
+    assert client.get("/drugs/DB00682").json() == {"id": "DB00682", "name": "Warfarin", "type": None}
+    assert client.get("/targets/BE0000017").json()["name"] == "Prostaglandin G/H synthase 1"
+    assert client.get("/relationships/DB00945").json() == [
+        {"source": "DB00945", "target": "BE0000017", "relationship": "targets"},
+        {"source": "DB00945", "target": "SMP00001", "relationship": "participates_in"},
+    ]
+
+
+def test_unknown_ids_and_wrong_types_are_404(client):
+    assert client.get("/drugs/DB99999").status_code == 404
+    # A target id is not a drug
+    assert client.get("/drugs/BE0000017").status_code == 404
+    assert client.get("/relationships/BE0000017").status_code == 404
+
+
+def test_backend_selection(monkeypatch):
+    monkeypatch.setenv("NEO4J_URL", "bolt://graph:7687")
+    backend = create_backend("neo4j")
+    # Nothing is connected until the first lookup
+    assert isinstance(backend, Neo4jBackend) and backend.url == "bolt://graph:7687" and backend._graph is None
+    monkeypatch.delenv("GRAPH_BACKEND_XML", raising=False)
+    with pytest.raises(ValueError):
+        create_backend("memory")
+    with pytest.raises(ValueError):
+        create_backend("sqlite")
@@ -0,0 +1,87 @@
+import json
+
+from model.conversation_memory import ChatMemory, ConversationMemory
+from model.token_counter import TokenCounter
+
+
+class WhitespaceTokenizer:
+    def __call__(self, texts, add_special_tokens=False):
+        return {"input_ids": [text.split() for text in texts]}
+
+
+def make_memory(**kwargs):
+    return ConversationMemory(TokenCounter(tokenizer=WhitespaceTokenizer()), **kwargs)
+
+
+def test_prompt_size_stays_bounded():
+    calls = []
+
+    def summarizer(previous, messages, max_tokens):
+        calls.append(len(messages))
+        return f"{len(calls)} summaries"
+
+    memory = make_memory(token_budget=40, keep_recent=2, summarizer=summarizer)
+    memory.append({"role": "system", "content": "you are helpful"}, pinned=True)
+    for i in range(200):
+        memory.append({"role": "user", "content": f"question {i} " + "word " * 8})
+
+    assert memory.total_tokens <= 40
+    assert calls
+    messages = memory.messages
+    assert messages[0]["content"] == "you are helpful"
+    assert messages[1]["content"].endswith("summaries")
+    assert messages[-1]["content"].startswith("question 199")
+    assert messages[-2]["content"].startswith("question 198")
+
+
+def test_serialized_state_matches_messages():
+    memory = make_memory(token_budget=10, keep_recent=1)
+    for i in range(5):
+        memory.append({"role": "user", "content": f"turn {i} a b c"})
+    assert json.loads(memory.to_json()) == memory.messages
+
+
+def test_unbounded_without_budget():
+    memory = make_memory()
+    for i in range(50):
+        memory.append({"role": "user", "content": "x"})
+    assert len(memory) == 50
+    assert memory.compactions == 0
+
+
+def test_budget_includes_the_summary():
+    memory = make_memory(token_budget=40, keep_recent=2)
+    memory.append({"role": "system", "content": "you are helpful"}, pinned=True)
+    for i in range(100):
+        memory.append({"role": "user", "content": f"question {i} " + "word " * (i % 7)})
+        counted = sum(memory.token_counter.count(m["content"]) for m in memory.messages)
+        assert counted == memory.total_tokens <= 40
+    assert memory.compactions
+    assert memory.messages[1]["content"].startswith("Summary of the earlier conversation:")
+
+
+def test_clear_resets_the_memory():
+    memory = make_memory(token_budget=10, keep_recent=1)
+    for i in range(10):
+        memory.append({"role": "user", "content": f"turn {i} a b c"})
+    assert memory.compactions
+
+    memory.clear()
+    assert len(memory) == 0
+    assert memory.total_tokens == 0
+    assert memory.compactions == 0
+
+
+def test_chat_prompt_sends_each_reply_once():
+    counter = TokenCounter(tokenizer=WhitespaceTokenizer())
+    chat = ChatMemory()
+    chat.init_memory(counter, token_budget=40, keep_recent_turns=2)
+    chat.append_system_message("you are helpful")
+    for i in range(50):
+        chat.append_user_message(f"question {i} " + "word " * 6)
+        chat.append_ai_message(f"answer {i} " + "word " * 6)
+
+    prompt = json.loads(chat.get_msg_json())
+    contents = [message["content"] for message in prompt]
+    assert contents.count("answer 49 " + "word " * 6) == 1
+    assert sum(counter.count_batch(contents)) <= 40
@@ -0,0 +1,25 @@
+from benchmarks.synthetic import StubChat
+from model.cypher_prompt import CypherPrompt
+
+SCHEMA = {
+    "drug": {"represented_as": "node", "properties": {"id": "str", "label": "str"}},
+    "target": {"represented_as": "node", "properties": {"id": "str", "label": "str"}},
+    "targets": {"represented_as": "edge", "source": "drug", "target": "target", "label_as_edge": "targets"},
+}
+
+
+def test_generate_query_runs_selection_steps():
+    answers = iter(["Drug, Target, Gene", "Targets"])
+    chats = []
+
+    def chat_factory():
+        chats.append(StubChat([next(answers, "")]))
+        return chats[-1]
+
+    prompt = CypherPrompt(schema_config_or_info_dict=SCHEMA, chat_factory=chat_factory)
+    query = prompt.generate_query("Which targets does aspirin act on?")
+
+    assert prompt.selected_entities == ["Drug", "Target"]
+    assert query.startswith("Generated query based on Drug, Target")
+    # Entity and relationship selection query their chat
+    assert [len(chat.messages) for chat in chats[:2]] == [3, 2]
@@ -1 +1,64 @@
+import sys
 
+import numpy as np
+import pandas as pd
+
+from src.data_ingestion import clean_file, infer_dtypes, load_data
+
+
+def write_raw(path, rows=500):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "Patient ID": np.arange(rows),
+        "Age": rng.integers(20, 90, size=rows).astype(float),
+        "Blood Pressure": rng.normal(130, 15, size=rows).round(1),
+        "Gender": rng.choice(["F", "M"], size=rows),
+        "Smoker": rng.choice([True, False], size=rows),
+    })
+    # Missing values only in the last rows, so early chunks infer other dtypes
+    df.loc[450:, "Age"] = np.nan
+    df["Smoker"] = df["Smoker"].astype(object)
+    df.loc[480:, "Smoker"] = np.nan
+    df.to_csv(path, index=False)
+
+
+def test_infer_dtypes_matches_full_read(tmp_path):
+    raw = tmp_path / "raw.csv"
+    write_raw(raw)
+    expected = dict(pd.read_csv(raw).dtypes, Smoker="boolean")
+    assert infer_dtypes(raw, chunksize=100) == expected
+
+
+def test_chunked_cleaning_matches_in_memory(tmp_path):
+    raw = tmp_path / "raw.csv"
+    write_raw(raw)
+    clean_file(raw, tmp_path / "full.csv")
+    clean_file(raw, tmp_path / "chunked.csv", chunksize=64)
+
+    assert (tmp_path / "chunked.csv").read_text() == (tmp_path / "full.csv").read_text()
+    assert pd.read_csv(tmp_path / "full.csv").columns[1] == "age"
+
+
+def test_parquet_output_matches_csv_and_projects_columns(tmp_path):
+    raw = tmp_path / "raw.csv"
+    write_raw(raw)
+    clean_file(raw, tmp_path / "full.csv")
+    clean_file(raw, tmp_path / "chunked.parquet", chunksize=64)
+
+    expected = pd.read_csv(tmp_path / "full.csv")
+    # "smoker" comes back as nullable boolean
+    pd.testing.assert_frame_equal(load_data(tmp_path / "chunked.parquet"), expected, check_dtype=False)
+
+    chunks = list(load_data(tmp_path / "chunked.parquet", chunksize=100, columns=["age", "gender"]))
+    assert [len(c) for c in chunks] == [100, 100, 100, 100, 50]
+    assert list(chunks[0].columns) == ["age", "gender"]
+
+
+def test_csv_does_not_need_pyarrow(tmp_path, monkeypatch):
+    for name in ["pyarrow", "pyarrow.parquet"]:
+        monkeypatch.setitem(sys.modules, name, None)
+    raw = tmp_path / "raw.csv"
+    write_raw(raw)
+    clean_file(raw, tmp_path / "chunked.csv", chunksize=100)
+    clean_file(raw, tmp_path / "full.csv")
+    pd.testing.assert_frame_equal(load_data(tmp_path / "chunked.csv"), load_data(tmp_path / "full.csv"))
@@ -1 +1,64 @@
+import numpy as np
+import pandas as pd
 
+from src.data_preprocessing import preprocess_file
+
+
+def test_chunked_preprocessing_matches_in_memory(tmp_path):
+    rng = np.random.default_rng(0)
+    pd.DataFrame({
+        "age": rng.integers(20, 90, size=1000),
+        "blood_pressure": rng.normal(130, 15, size=1000),
+        # "X" only appears after the first chunks
+        "gender": ["F", "M"] * 450 + ["X"] * 100,
+    }).to_csv(tmp_path / "processed.csv", index=False)
+
+    preprocess_file(tmp_path / "processed.csv", tmp_path / "full.csv")
+    preprocess_file(tmp_path / "processed.csv", tmp_path / "chunked.csv", chunksize=128)
+
+    full = pd.read_csv(tmp_path / "full.csv")
+    chunked = pd.read_csv(tmp_path / "chunked.csv")
+    assert list(chunked.columns) == ["age", "blood_pressure", "F", "M", "X"]
+    pd.testing.assert_frame_equal(chunked, full, rtol=1e-12)
+    assert chunked["X"].sum() == 100
+
+
+def test_parquet_intermediate_matches_csv(tmp_path):
+    rng = np.random.default_rng(1)
+    df = pd.DataFrame({
+        "age": rng.integers(20, 90, size=300),
+        "blood_pressure": rng.normal(130, 15, size=300),
+        "gender": rng.choice(["F", "M"], size=300),
+    })
+    df.to_csv(tmp_path / "processed.csv", index=False)
+    df.to_parquet(tmp_path / "processed.parquet", index=False)
+
+    preprocess_file(tmp_path / "processed.csv", tmp_path / "out.csv")
+    preprocess_file(tmp_path / "processed.parquet", tmp_path / "out.parquet", chunksize=50)
+
+    pd.testing.assert_frame_equal(
+        pd.read_parquet(tmp_path / "out.parquet"), pd.read_csv(tmp_path / "out.csv"), rtol=1e-12
+    )
+
+
+def test_saved_preprocessor_transforms_without_refitting(tmp_path):
+    from src.data_preprocessing import Preprocessor
+
+    train = pd.DataFrame({"age": [30, 50, 70], "blood_pressure": [120.0, 130.0, 140.0], "gender": ["F", "M", "F"]})
+    Preprocessor().fit([train]).save(tmp_path / "preprocessor.json")
+
+    batch = pd.DataFrame({"age": [50], "blood_pressure": [140.0], "gender": ["X"]})
+    loaded = Preprocessor.load(tmp_path / "preprocessor.json")
+    out = loaded.transform(batch)
+    assert out is batch
+    assert out.loc[0, "age"] == 0.0
+    assert list(out.columns) == ["age", "blood_pressure", "F", "M"]
+    assert out.loc[0, ["F", "M"]].tolist() == [0.0, 0.0]
+
+    codes = Preprocessor(encoding="codes").fit([train]).transform(train.copy())
+    assert codes["gender"].tolist() == [0, 1, 0]
+    assert codes["gender"].dtype == np.int8
+
+    sparse = Preprocessor(encoding="sparse").fit([train]).transform(train.copy())
+    assert isinstance(sparse["F"].dtype, pd.SparseDtype)
+    assert sparse["F"].sparse.density == 2 / 3
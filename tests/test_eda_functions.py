@@ -1 +1,132 @@
+import json
 
+import numpy as np
+import pandas as pd
+
+from src.eda_runner import run_distribution_plots
+
+
+def test_distribution_plots_are_incremental(tmp_path):
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "age": rng.normal(50, 10, size=200),
+        "blood_pressure": rng.normal(130, 15, size=200),
+        "gender": rng.choice(["F", "M"], size=200),
+    })
+
+    first = run_distribution_plots(df, tmp_path, max_workers=2)
+    assert len(first["rendered"]) == 2 and first["skipped"] == []
+
+    df["age"] += 1
+    second = run_distribution_plots(df, tmp_path, max_workers=2)
+    assert second["rendered"] == [str(tmp_path / "age_distribution.png")]
+    assert second["skipped"] == [str(tmp_path / "blood_pressure_distribution.png")]
+
+    third = run_distribution_plots(df, tmp_path, max_workers=2, params={"bins": 20})
+    assert len(third["rendered"]) == 2
+
+    manifest = json.loads((tmp_path / "manifest.json").read_text())
+    assert manifest[str(tmp_path / "age_distribution.png")]["params"]["bins"] == 20
+
+
+def test_streaming_summary_matches_full_statistics():
+    from src.eda_streaming import StreamingSummary
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        "age": rng.normal(50, 10, size=20_000),
+        "blood_pressure": rng.lognormal(4, 0.3, size=20_000),
+        "gender": rng.choice(["F", "M", "X"], p=[0.5, 0.4, 0.1], size=20_000),
+    })
+    df.loc[::50, "age"] = np.nan
+
+    def summarize(chunksize):
+        summary = StreamingSummary("gender", sample_size=500, seed=7)
+        for start in range(0, len(df), chunksize):
+            summary.update(df.iloc[start : start + chunksize])
+        return summary
+
+    summary = summarize(3000)
+    streaming, full = summary.describe(), df.describe()
+    for column in ["age", "blood_pressure"]:
+        assert streaming.loc["count", column] == full.loc["count", column]
+        assert np.isclose(streaming.loc["mean", column], full.loc["mean", column])
+        assert np.isclose(streaming.loc["std", column], full.loc["std", column])
+        bound = streaming.loc["quantile_error", column]
+        for q in ["25%", "50%", "75%"]:
+            assert abs(streaming.loc[q, column] - full.loc[q, column]) <= bound
+
+    sample = summary.sample()
+    assert sample.equals(summarize(7000).sample())
+    report = summary.sample_report()
+    assert sum(s["sampled"] for s in report["strata"].values()) == 500
+    assert report["strata"]["X"]["sampled"] == round(500 * report["strata"]["X"]["rows"] / 20_000)
+
+
+def test_blocked_correlations_match_pandas():
+    from src.correlation import CorrelationEngine
+
+    rng = np.random.default_rng(0)
+    base = rng.normal(size=(500, 5))
+    values = base[:, rng.integers(5, size=40)] + rng.normal(size=(500, 40))
+    df = pd.DataFrame(values, columns=[f"f{i}" for i in range(40)])
+    df[df > 2.8] = np.nan
+
+    for method in ["pearson", "spearman"]:
+        data = df if method == "pearson" else df.fillna(0)
+        full = data.corr(method=method)
+        with CorrelationEngine(method, block_size=7) as engine:
+            engine.fit(data.iloc[start : start + 128] for start in range(0, 500, 128))
+            pairs = engine.top_pairs(10)
+            assert np.allclose(pairs["correlation"], [full.loc[a, b] for a, b in zip(pairs["feature_a"], pairs["feature_b"])])
+            upper = full.where(np.triu(np.ones(full.shape, dtype=bool), 1)).abs().stack()
+            assert np.allclose(pairs["correlation"].abs(), upper.nlargest(10).to_numpy())
+
+            cluster = engine.clusters(pairs, threshold=0.3)[0]
+            sub = engine.submatrix(cluster)
+            assert np.allclose(sub.to_numpy(), full.loc[sub.index, sub.columns].to_numpy())
+
+
+def test_category_counts_are_bounded():
+    from src.eda_streaming import StreamingSummary
+
+    rng = np.random.default_rng(0)
+    # Three frequent values and a long tail of unique ids
+    values = np.concatenate([rng.choice(["a", "b", "c"], size=6000), [f"id{i}" for i in range(4000)]])
+    rng.shuffle(values)
+    df = pd.DataFrame({"code": values})
+
+    summary = StreamingSummary(max_categories=50)
+    for start in range(0, len(df), 1000):
+        summary.update(df.iloc[start : start + 1000])
+        assert len(summary.categories["code"]["counts"]) <= 50
+
+    top = summary.describe_categories(top=3)
+    assert top["value"].tolist() == df["code"].value_counts().index[:3].tolist()
+    exact = df["code"].value_counts()
+    for value, count, error in zip(top["value"], top["count"], top["count_error"]):
+        assert count <= exact[value] <= count + error
+    assert top["truncated"].all() and 0 < top["count_error"].iloc[0] <= len(df) / 51
+
+
+def test_streaming_eda_plots_are_incremental(tmp_path):
+    from src.eda_functions import pairplot_columns, streaming_eda
+
+    rng = np.random.default_rng(2)
+    df = pd.DataFrame({f"x{i}": rng.normal(0, i + 1, size=400) for i in range(8)})
+    df["gender"] = rng.choice(["F", "M"], size=400)
+    assert pairplot_columns(df, 3, "gender") == ["x5", "x6", "x7"]
+
+    df[["x0", "x7", "gender"]].to_csv(tmp_path / "data.csv", index=False)
+    out = tmp_path / "plots"
+    streaming_eda(tmp_path / "data.csv", chunksize=150, sample_size=100, strata_column="gender",
+                  output_dir=str(out), max_workers=1)
+    with open(out / "manifest.json") as f:
+        first = json.load(f)
+    assert sorted(entry["column"] for entry in first.values()) == ["x0", "x7"]
+    assert (out / "pairplot.png").exists()
+
+    streaming_eda(tmp_path / "data.csv", chunksize=150, sample_size=100, strata_column="gender",
+                  output_dir=str(out), max_workers=1)
+    with open(out / "manifest.json") as f:
+        assert json.load(f) == first
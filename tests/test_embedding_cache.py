@@ -0,0 +1,78 @@
+import threading
+
+import numpy as np
+
+from src.embedding_cache import CachedEmbeddings
+
+
+class CountingEmbeddings:
+    def __init__(self):
+        self.calls = []
+
+    def embed_documents(self, texts):
+        self.calls.append(list(texts))
+        return [[len(t), t.count("a"), 1.0] for t in texts]
+
+    def embed_query(self, text):
+        self.calls.append([text])
+        return [len(text), text.count("a"), 1.0]
+
+
+def test_batches_deduplicates_and_caches(tmp_path):
+    model = CountingEmbeddings()
+    cached = CachedEmbeddings(model, "stub", cache_dir=str(tmp_path), batch_size=2)
+    vectors = cached.embed_array(["aa", "b", "aa", "ccc"])
+
+    assert vectors.dtype == np.float32
+    assert vectors[:, 0].tolist() == [2, 1, 2, 3]
+    assert model.calls == [["aa", "b"], ["ccc"]]
+    assert cached.report()["duplicates"] == 1
+
+
+def test_reindexing_unchanged_corpus_skips_model(tmp_path):
+    corpus = [f"chunk {i} " + "a" * i for i in range(10)]
+    first = CachedEmbeddings(CountingEmbeddings(), "stub", cache_dir=str(tmp_path))
+    expected = first.embed_array(corpus)
+
+    model = CountingEmbeddings()
+    second = CachedEmbeddings(model, "stub", cache_dir=str(tmp_path))
+    np.testing.assert_array_equal(second.embed_array(corpus), expected)
+    assert model.calls == []
+    assert second.report()["hit_rate"] == 1.0
+
+
+def test_models_and_queries_are_keyed_separately(tmp_path):
+    model = CountingEmbeddings()
+    cached = CachedEmbeddings(model, "stub", cache_dir=str(tmp_path))
+    cached.embed_documents(["x"])
+    cached.embed_query("x")
+    CachedEmbeddings(model, "other", cache_dir=str(tmp_path)).embed_documents(["x"])
+    assert len(model.calls) == 3
+
+
+def test_concurrent_misses_on_the_same_text(tmp_path):
+    class BlockingEmbeddings(CountingEmbeddings):
+        def __init__(self):
+            super().__init__()
+            self.barrier = threading.Barrier(2)
+
+        def embed_query(self, text):
+            # Both threads are inside the model with the same miss
+            if text == "x":
+                self.barrier.wait(timeout=5)
+            return super().embed_query(text)
+
+    cached = CachedEmbeddings(BlockingEmbeddings(), "stub", cache_dir=str(tmp_path))
+    threads = [threading.Thread(target=cached.embed_query, args=("x",)) for _ in range(2)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert cached.embed_query("bbbbbbbbbbbbb") == [13.0, 0.0, 1.0]
+    assert cached.embed_query("x") == [1.0, 0.0, 1.0]
+    assert cached.report()["cached_vectors"] == 2
+
+    reloaded = CachedEmbeddings(CountingEmbeddings(), "stub", cache_dir=str(tmp_path))
+    assert reloaded.embed_query("x") == [1.0, 0.0, 1.0]
+    assert reloaded.embed_query("bbbbbbbbbbbbb") == [13.0, 0.0, 1.0]
@@ -0,0 +1,50 @@
+import numpy as np
+from rdkit import Chem, DataStructs
+from rdkit.Chem import rdFingerprintGenerator
+
+from src.fingerprint_index import FingerprintIndex
+
+DRUGS = {
+    "DB00945": ("Aspirin", "CC(=O)OC1=CC=CC=C1C(=O)O"),
+    "DB00936": ("Salicylic acid", "OC(=O)C1=CC=CC=C1O"),
+    "DB01050": ("Ibuprofen", "CC(C)CC1=CC=C(C=C1)C(C)C(=O)O"),
+    "DB00201": ("Caffeine", "CN1C=NC2=C1C(=O)N(C(=O)N2C)C"),
+    "DB00316": ("Acetaminophen", "CC(=O)NC1=CC=C(O)C=C1"),
+}
+
+
+def make_index():
+    index = FingerprintIndex()
+    ids = list(DRUGS)
+    added = index.add(ids + ["DB99999"], [DRUGS[i][1] for i in ids] + ["not a smiles"], [DRUGS[i][0] for i in ids] + ["Broken"])
+    assert added == len(DRUGS)
+    return index
+
+
+def test_tanimoto_matches_rdkit():
+    index = make_index()
+    generator = rdFingerprintGenerator.GetMorganGenerator(radius=2, fpSize=2048)
+    fps = [generator.GetFingerprint(Chem.MolFromSmiles(smiles)) for _, smiles in DRUGS.values()]
+    expected = DataStructs.BulkTanimotoSimilarity(fps[0], fps)
+    assert np.allclose(index.similarity(index.fingerprints[0]), expected)
+
+
+def test_search_and_persistence(tmp_path):
+    index = make_index()
+    top = index.similar_to("DB00945", k=2)
+    assert [drug_id for drug_id, _, _ in top] == ["DB00936", "DB00316"]
+    assert all(drug_id != "DB00945" for drug_id, _, _ in top)
+
+    index.save(tmp_path / "fingerprints.npz")
+    loaded = FingerprintIndex.load(tmp_path / "fingerprints.npz")
+    assert loaded.search(DRUGS["DB00201"][1], k=1) == [("DB00201", "Caffeine", 1.0)]
+    assert loaded.similar_to("DB00945", k=2) == top
+
+
+def test_popcount_fallback_matches_numpy():
+    from src.fingerprint_index import _table_bitwise_count
+
+    words = np.random.default_rng(0).integers(0, 2**63, size=(5, 32), dtype=np.uint64)
+    words[0, 0] = np.iinfo(np.uint64).max
+    assert np.array_equal(_table_bitwise_count(words), np.bitwise_count(words))
+    assert np.array_equal(_table_bitwise_count(words[1]), np.bitwise_count(words[1]))
@@ -0,0 +1,97 @@
+import threading
+
+import pytest
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+from model.llm_cache import ResponseCache
+from src.gpt2_model import GPT2Generator
+
+WORDS = "drug target binds blocks receptor enzyme pathway the a of to and lowers pressure".split()
+PROMPTS = ["the drug binds", "a receptor of the enzyme blocks the", "pathway"]
+
+
+def tiny_tokenizer():
+    vocab = {word: i for i, word in enumerate(["<eos>", "<unk>"] + WORDS)}
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.Whitespace()
+    return PreTrainedTokenizerFast(tokenizer_object=tokenizer, eos_token="<eos>", unk_token="<unk>")
+
+
+def tiny_model(vocab_size):
+    torch.manual_seed(0)
+    config = GPT2Config(vocab_size=vocab_size, n_positions=64, n_embd=32, n_layer=2, n_head=2)
+    return GPT2LMHeadModel(config)
+
+
+@pytest.fixture
+def generator():
+    tokenizer = tiny_tokenizer()
+    # No EOS in the vocabulary the model can stop on, so lengths are exact
+    params = {"eos_token_id": None}
+    return GPT2Generator(
+        model=tiny_model(len(tokenizer)), tokenizer=tokenizer, max_wait_ms=200, generation_params=params
+    )
+
+
+def test_batched_output_matches_single_prompts(generator):
+    single = [generator.generate_batch([prompt], 8)[0] for prompt in PROMPTS]
+    assert generator.generate_batch(PROMPTS, 8) == single
+
+
+def test_max_new_tokens_per_request(generator):
+    texts = generator.generate_batch(PROMPTS, [2, 5, 1])
+    assert [len(text.split()) for text in texts] == [2, 5, 1]
+    assert texts[0] == generator.generate_batch([PROMPTS[0]], 2)[0]
+
+
+def test_concurrent_requests_are_batched(generator):
+    expected = [generator.generate_batch([prompt], 4)[0] for prompt in PROMPTS]
+    results = [None] * len(PROMPTS)
+
+    def run(i):
+        results[i] = generator.generate(PROMPTS[i], 4)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(len(PROMPTS))]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert results == expected
+
+
+def test_cancelled_requests_do_not_stop_the_batch(generator):
+    first = generator.submit(PROMPTS[0], 3)
+    # Cancelled while the worker is still waiting for the batch to fill
+    cancelled = generator.submit(PROMPTS[1], 3)
+    last = generator.submit(PROMPTS[2], 2)
+    assert cancelled.cancel()
+
+    assert first.result(timeout=30) == generator.generate_batch([PROMPTS[0]], 3)[0]
+    assert last.result(timeout=30) == generator.generate_batch([PROMPTS[2]], 2)[0]
+    assert cancelled.cancelled()
+    assert generator.generate(PROMPTS[1], 1) == generator.generate_batch([PROMPTS[1]], 1)[0]
+
+
+
+def test_injected_models_are_cached_under_their_own_name(tmp_path):
+    tokenizer = tiny_tokenizer()
+    cache = ResponseCache(str(tmp_path))
+    with pytest.raises(ValueError):
+        GPT2Generator(model=tiny_model(len(tokenizer)), tokenizer=tokenizer, cache=cache)
+
+    params = {"eos_token_id": None}
+    base = GPT2Generator(
+        model=tiny_model(len(tokenizer)), tokenizer=tokenizer, cache=cache, cache_name="gpt2",
+        generation_params=params,
+    )
+    tuned = GPT2Generator(
+        model=tiny_model(len(tokenizer)), tokenizer=tokenizer, cache=cache, cache_name="gpt2-tuned",
+        generation_params=params,
+    )
+    base.generate(PROMPTS[0], 3)
+    tuned.generate(PROMPTS[0], 3)
+    assert cache.hits == 0
+    base.generate(PROMPTS[0], 3)
+    assert cache.hits == 1
@@ -0,0 +1,65 @@
+import copy
+
+import pytest
+import torch
+from tokenizers import Tokenizer, models, pre_tokenizers
+from transformers import GPT2Config, GPT2LMHeadModel, PreTrainedTokenizerFast
+
+from model.llm_cache import ResponseCache
+from src.gpt2_optimization import (
+    AGREEMENT_PROMPTS,
+    _GreedyExportedVariant,
+    build_variant,
+    load_optimized_generator,
+    token_agreement,
+)
+
+
+@pytest.fixture(scope="module")
+def tokenizer():
+    words = sorted({word for prompt in AGREEMENT_PROMPTS for word in prompt.split()})
+    vocab = {word: i for i, word in enumerate(["<eos>", "<unk>"] + words)}
+    tokenizer = Tokenizer(models.WordLevel(vocab, unk_token="<unk>"))
+    tokenizer.pre_tokenizer = pre_tokenizers.WhitespaceSplit()
+    tokenizer = PreTrainedTokenizerFast(tokenizer_object=tokenizer, eos_token="<eos>", unk_token="<unk>")
+    tokenizer.padding_side = "left"
+    tokenizer.pad_token = tokenizer.eos_token
+    return tokenizer
+
+
+@pytest.fixture(scope="module")
+def model(tokenizer):
+    torch.manual_seed(0)
+    config = GPT2Config(vocab_size=len(tokenizer), n_positions=64, n_embd=64, n_layer=2, n_head=2)
+    return GPT2LMHeadModel(config).eval()
+
+
+# int8 rounds the weights, so a rare flipped argmax is tolerated
+@pytest.mark.parametrize("name, minimum", [("fp32", 1.0), ("int8", 0.9), ("torchscript", 1.0)])
+def test_variants_agree_with_fp32(name, minimum, model, tokenizer):
+    reference = build_variant("fp32", model, tokenizer)
+    variant = build_variant(name, model, tokenizer)
+    assert token_agreement(reference, variant, tokenizer, max_new_tokens=10) >= minimum
+
+
+def test_exported_variants_must_define_logits():
+    with pytest.raises(TypeError):
+        _GreedyExportedVariant()
+
+
+def test_unknown_variant(model, tokenizer):
+    with pytest.raises(ValueError):
+        build_variant("fp16", model, tokenizer)
+
+
+def test_int8_responses_are_cached_apart_from_fp32(model, tokenizer, tmp_path):
+    cache = ResponseCache(str(tmp_path))
+    fp32 = load_optimized_generator("fp32", model=model, tokenizer=tokenizer, cache=cache, cache_name="gpt2")
+    # Quantization converts the layers in place
+    int8 = load_optimized_generator("int8", model=copy.deepcopy(model), tokenizer=tokenizer, cache=cache)
+    assert int8.cache_name == "gpt2:int8"
+
+    prompt = AGREEMENT_PROMPTS[0]
+    fp32.generate(prompt, 4)
+    assert int8.generate(prompt, 4) == int8.generate_batch([prompt], 4)[0]
+    assert cache.hits == 0
@@ -1 +1,34 @@
+import subprocess
+import sys
+from collections import Counter
 
+from benchmarks.synthetic import drugbank_xml
+from scripts.build_graph import parse_drugbank
+
+
+def test_parse_synthetic_drugbank(tmp_path):
+    xml_file = tmp_path / "drugbank.xml"
+    counts = drugbank_xml(xml_file, drugs=200, seed=3)
+    graph = parse_drugbank(str(xml_file))
+
+    types = Counter(data["type"] for _, data in graph.nodes(data=True))
+    assert types["drug"] == 200
+    assert 0 < types["target"] <= counts["targets"]
+    assert graph.number_of_edges() == counts["relationships"]
+    assert {data["relationship"] for _, _, data in graph.edges(data=True)} <= {
+        "targets", "interacts_with", "participates_in"
+    }
+    assert all(graph.nodes[f"DB{d:05d}"].get("smiles") for d in range(200))
+    # The generator is seeded
+    drugbank_xml(tmp_path / "again.xml", drugs=200, seed=3)
+    assert (tmp_path / "again.xml").read_bytes() == xml_file.read_bytes()
+
+
+def test_parsing_needs_no_optional_dependencies():
+    # A fresh interpreter, since other tests import these modules
+    code = (
+        "import sys, scripts.build_graph; "
+        "print([m for m in ('py2neo', 'rdkit', 'pyarrow') if m in sys.modules])"
+    )
+    result = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert result.stdout.strip() == "[]"
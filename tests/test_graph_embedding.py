@@ -0,0 +1,72 @@
+import networkx as nx
+import numpy as np
+
+from src.graph_embedding import Node2Vec, WalkGraph, random_walks, recall_at_k, split_links
+
+
+def community_graph(drugs=300, targets=60, communities=6, degree=3, seed=0):
+    rng = np.random.default_rng(seed)
+    graph = nx.DiGraph()
+    for t in range(targets):
+        graph.add_node(f"T{t}", type="target")
+    for d in range(drugs):
+        graph.add_node(f"D{d}", type="drug")
+        pool = [t for t in range(targets) if t % communities == d % communities]
+        for t in rng.choice(pool, degree, replace=False):
+            graph.add_edge(f"D{d}", f"T{t}", relationship="targets")
+    return graph
+
+
+def test_walk_graph_is_undirected_csr():
+    graph = nx.DiGraph()
+    graph.add_edge("DB01", "T1", relationship="targets")
+    graph.add_edge("DB01", "E1", relationship="interacts_with")
+    graph.add_edge("DB02", "T1", relationship="targets")
+    graph.add_node("T2", type="target")
+
+    walk_graph = WalkGraph.from_graph(graph, exclude=[("DB02", "T1")])
+    db01, t1, e1, db02 = walk_graph.index(["DB01", "T1", "E1", "DB02"])
+    assert list(walk_graph.has_edges([db01, t1, e1, db02], [t1, db01, db01, t1])) == [True, True, True, False]
+    assert walk_graph.degree[db02] == 0
+    assert list(walk_graph.nodes_of_type("target")) == list(walk_graph.index(["T2"]))
+
+
+def test_walks_follow_edges_and_are_reproducible():
+    walk_graph = WalkGraph.from_graph(community_graph())
+    walks = random_walks(walk_graph, num_walks=3, walk_length=8, p=0.5, q=2.0, seed=1)
+    assert walks.shape == (3 * len(walk_graph), 8)
+    assert walk_graph.has_edges(walks[:, :-1].ravel(), walks[:, 1:].ravel()).all()
+    parallel = random_walks(walk_graph, num_walks=3, walk_length=8, p=0.5, q=2.0, seed=1, workers=2)
+    assert np.array_equal(walks, parallel)
+
+
+def test_return_parameter_biases_backtracking():
+    walk_graph = WalkGraph.from_graph(nx.gnm_random_graph(200, 1000, seed=0))
+
+    def backtrack_rate(p):
+        walks = random_walks(walk_graph, num_walks=2, walk_length=20, p=p, seed=0)
+        return (walks[:, 2:] == walks[:, :-2]).mean()
+
+    # With p = 0.1 returning is 10x more likely than any other step; p = 10 makes it rare
+    assert backtrack_rate(0.1) > 0.3
+    assert backtrack_rate(10.0) < 0.02
+
+
+def test_node2vec_predicts_held_out_targets(tmp_path):
+    graph = community_graph()
+    held_out = split_links(graph, fraction=0.1)
+    assert len(held_out) == 90
+    walk_graph = WalkGraph.from_graph(graph, exclude=held_out)
+    assert (walk_graph.degree[walk_graph.index([node for edge in held_out for node in edge])] > 0).all()
+
+    model = Node2Vec(dimensions=16, num_walks=5, walk_length=20, window=4).fit(walk_graph)
+    evaluation = recall_at_k(model, walk_graph, held_out, k=5)
+    # Drugs only target their own community (10 of 60 targets); random ranking recalls ~5/57
+    assert evaluation["recall"] > 0.4
+
+    ranked = model.rank_links("D0", [f"T{t}" for t in range(60)], k=3, exclude=["T0"])
+    assert len(ranked) == 3 and all(target != "T0" for target, _ in ranked)
+
+    model.save(tmp_path / "embeddings.npz")
+    loaded = Node2Vec.load(tmp_path / "embeddings.npz")
+    assert np.allclose(loaded.score_links(["D0"], ["T6"]), model.score_links(["D0"], ["T6"]))
@@ -0,0 +1,41 @@
+from model.llm_cache import ResponseCache, is_deterministic
+
+
+def test_deterministic_calls_are_cached(tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    calls = []
+
+    def compute():
+        calls.append(1)
+        return "MATCH (n) RETURN n"
+
+    params = {"temperature": 0}
+    for prompt in ["list nodes", "  list nodes\n", [{"role": "user", "content": "list nodes"}]]:
+        assert cache.get_or_compute("gpt-3.5-turbo", prompt, params, compute) == "MATCH (n) RETURN n"
+
+    assert len(calls) == 1
+    assert cache.stats()["hits"] == 2
+    # A new cache instance on the same directory replays from disk
+    assert ResponseCache(cache_dir=str(tmp_path)).get_or_compute(
+        "gpt-3.5-turbo", "list nodes", params, compute
+    ) == "MATCH (n) RETURN n"
+    assert len(calls) == 1
+
+
+def test_sampled_calls_bypass_cache(tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path))
+    calls = []
+    for _ in range(2):
+        cache.get_or_compute("gpt2", "hi", {"do_sample": True}, lambda: calls.append(1) or "x")
+    assert len(calls) == 2
+    assert cache.stats()["skipped"] == 2
+    assert is_deterministic({"do_sample": False, "temperature": 0.2})
+    assert not is_deterministic({})
+
+
+def test_size_bound_evicts_old_entries(tmp_path):
+    cache = ResponseCache(cache_dir=str(tmp_path), max_size_bytes=2000)
+    for i in range(50):
+        cache.put(cache.make_key("m", f"prompt {i}", {}), "x" * 100)
+    assert cache.stats()["size_bytes"] <= 2000
+    assert cache.get(cache.make_key("m", "prompt 49", {})) == "x" * 100
@@ -0,0 +1,121 @@
+import json
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from model.llm_executor import HTTPChatTransport, LLMExecutor, RateLimiter
+
+
+class FakeCompletionServer:
+    """OpenAI-compatible server that echoes prompts and rate limits on demand."""
+
+    def __init__(self, fail_first=0):
+        self.fail_first = fail_first
+        self.requests = []
+        self.lock = threading.Lock()
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_POST(self):
+                body = json.loads(self.rfile.read(int(self.headers["Content-Length"])))
+                with server.lock:
+                    server.requests.append(body)
+                    n = len(server.requests)
+                if n <= server.fail_first:
+                    self.send_response(429)
+                    self.send_header("Retry-After", "0")
+                    self.end_headers()
+                    return
+                content = "echo: " + body["messages"][-1]["content"]
+                if body.get("stream"):
+                    self.send_response(200)
+                    self.send_header("Content-Type", "text/event-stream")
+                    self.end_headers()
+                    for word in content.split(" "):
+                        chunk = {"choices": [{"delta": {"content": word + " "}}]}
+                        self.wfile.write(f"data: {json.dumps(chunk)}\n\n".encode())
+                        self.wfile.flush()
+                    self.wfile.write(b"data: [DONE]\n\n")
+                    return
+                data = json.dumps({"choices": [{"message": {"content": content}}]})
+                self.send_response(200)
+                self.send_header("Content-Type", "application/json")
+                self.end_headers()
+                self.wfile.write(data.encode())
+
+            def log_message(self, *args):
+                pass
+
+        self.httpd = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+        self.url = f"http://127.0.0.1:{self.httpd.server_address[1]}/v1"
+
+    def __enter__(self):
+        threading.Thread(target=self.httpd.serve_forever, daemon=True).start()
+        return self
+
+    def __exit__(self, *args):
+        self.httpd.shutdown()
+
+
+def make_executor(server, **kwargs):
+    return LLMExecutor(
+        transport=HTTPChatTransport(base_url=server.url),
+        base_delay=0.01,
+        **kwargs,
+    )
+
+
+def test_batch_results_are_in_order():
+    with FakeCompletionServer() as server:
+        executor = make_executor(server, max_concurrency=4)
+        prompts = [f"prompt {i}" for i in range(50)]
+        results = executor.run_batch(prompts)
+    assert results == [f"echo: prompt {i}" for i in range(50)]
+
+
+def test_rate_limited_requests_are_retried():
+    with FakeCompletionServer(fail_first=3) as server:
+        executor = make_executor(server)
+        assert executor.complete_sync("hello") == "echo: hello"
+    assert executor.stats["retries"] == 3
+
+
+def test_exhausted_retries_are_returned_in_place():
+    with FakeCompletionServer(fail_first=100) as server:
+        executor = make_executor(server, max_retries=1, max_concurrency=1)
+        results = executor.run_batch(["a", "b"], return_exceptions=True)
+    assert all(isinstance(r, Exception) for r in results)
+
+
+def test_identical_inflight_requests_are_deduplicated():
+    with FakeCompletionServer() as server:
+        executor = make_executor(server)
+        results = executor.run_batch(["same"] * 10)
+    assert results == ["echo: same"] * 10
+    assert len(server.requests) < 10
+    assert executor.stats["deduplicated"] == 10 - len(server.requests)
+
+
+def test_stream_yields_tokens_in_order():
+    with FakeCompletionServer(fail_first=1) as server:
+        executor = make_executor(server)
+        tokens = list(executor.stream_sync("one two three"))
+    assert tokens == ["echo: ", "one ", "two ", "three "]
+    assert executor.stats["retries"] == 1
+
+
+def test_backoff_honors_retry_after():
+    executor = LLMExecutor(transport=lambda payload: None, base_delay=1.0)
+    assert executor.backoff_delay(0, retry_after=5.0) >= 5.0
+    assert 0 <= executor.backoff_delay(10, retry_after=None) <= executor.max_delay
+
+
+def test_rate_limiter_waits_for_tokens():
+    now = [0.0]
+    limiter = RateLimiter(requests_per_minute=60, clock=lambda: now[0])
+    limiter._requests = 0
+    assert limiter._wait_time(0) == pytest.approx(1.0)
+    now[0] = 1.0
+    limiter._refill()
+    assert limiter._wait_time(0) == 0
@@ -0,0 +1,104 @@
+import numpy as np
+
+from src.local_vectorstore_agent import VectorDatabaseAgentLocal
+
+
+class HashEmbeddings:
+    """Deterministic bag-of-words embeddings."""
+
+    dim = 64
+
+    def _embed(self, text):
+        vector = np.zeros(self.dim)
+        for word in text.lower().split():
+            vector[hash(word) % self.dim] += 1
+        return vector.tolist()
+
+    def embed_documents(self, texts):
+        return [self._embed(t) for t in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def make_store(tmp_path=None, **args):
+    if tmp_path is not None:
+        args["path"] = str(tmp_path)
+    store = VectorDatabaseAgentLocal(HashEmbeddings(), args)
+    store.connect()
+    return store
+
+
+def test_similarity_search_and_workspace_filter(tmp_path):
+    store = make_store(tmp_path)
+    a = store.add_texts(["losartan blocks angiotensin receptors", "amlodipine blocks calcium channels"])
+    b = store.add_texts(["metoprolol blocks beta receptors"])
+
+    top = store.similarity_search("angiotensin receptors", 1)
+    assert top[0].page_content == "losartan blocks angiotensin receptors"
+    assert top[0].metadata["doc_id"] == a
+
+    scoped = store.similarity_search("angiotensin receptors", 3, doc_ids=[b])
+    assert [d.page_content for d in scoped] == ["metoprolol blocks beta receptors"]
+
+
+def test_delete_and_persistence(tmp_path):
+    store = make_store(tmp_path)
+    a = store.add_texts(["losartan blocks angiotensin receptors"])
+    store.add_texts(["metoprolol blocks beta receptors"])
+    store.remove_document(a)
+    assert len(store) == 1
+
+    reopened = make_store(tmp_path)
+    assert len(reopened) == 1
+    results = reopened.similarity_search("angiotensin receptors", 5)
+    assert [d.page_content for d in results] == ["metoprolol blocks beta receptors"]
+
+    reopened.compact()
+    assert reopened.get_all_documents() == [reopened.similarity_search("beta", 1)[0].metadata["doc_id"]]
+
+
+def test_ivf_matches_exact_on_clustered_data():
+    rng = np.random.default_rng(0)
+    centers = rng.normal(size=(20, 32))
+    vectors = centers[rng.integers(20, size=2000)] + 0.05 * rng.normal(size=(2000, 32))
+    store = make_store(index="ivf", nprobe=4)
+    store.add_vectors(vectors, [str(i) for i in range(2000)])
+
+    queries = centers + 0.05 * rng.normal(size=centers.shape)
+    exact = [{row for row, _ in store.search_vector(q, 10)} for q in queries]
+    store.build_index(nlist=20)
+    approx = [{row for row, _ in store.search_vector(q, 10)} for q in queries]
+
+    recall = np.mean([len(e & a) / 10 for e, a in zip(exact, approx)])
+    assert recall >= 0.9
+
+
+def test_writes_are_logged_instead_of_rewriting_the_snapshot(tmp_path, monkeypatch):
+    snapshots = []
+    save = VectorDatabaseAgentLocal.save
+    monkeypatch.setattr(VectorDatabaseAgentLocal, "save", lambda self: snapshots.append(1) or save(self))
+    monkeypatch.setattr("src.local_vectorstore_agent.LOG_MIN_ROWS", 8)
+
+    store = make_store(tmp_path)
+    rng = np.random.default_rng(0)
+    ids = [store.add_vectors(rng.normal(size=(1, 16)), [f"row {i}"]) for i in range(200)]
+    store.remove_document(ids[3])
+    # The snapshot is rewritten each time the log outgrows it
+    assert len(snapshots) <= 6
+
+    reopened = make_store(tmp_path)
+    assert len(reopened) == 199
+    row, _ = reopened.search_vector(store._vectors[150], 1)[0]
+    assert reopened._texts[row] == "row 150"
+    assert ids[3] not in reopened.get_all_documents()
+
+
+def test_ivf_probing_every_cluster_matches_exact():
+    rng = np.random.default_rng(0)
+    store = make_store(index="ivf", nprobe=8)
+    vectors = rng.normal(size=(500, 8))
+    store.add_vectors(vectors, [str(i) for i in range(500)])
+    store.build_index(nlist=5)
+    for i in [0, 123, 499]:
+        assert store.search_vector(vectors[i], 1)[0][0] == i
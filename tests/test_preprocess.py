@@ -0,0 +1,58 @@
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+import spacy
+from spacy.language import Language
+
+TEXTS = [
+    "The drugs are binding to the receptors.",
+    "",
+    np.nan,
+    "Aspirin blocks enzymes, and lowers pressure!",
+    "It is what it is",
+]
+
+
+@Language.component("suffix_lemmatizer")
+def suffix_lemmatizer(doc):
+    for token in doc:
+        token.lemma_ = token.lower_.removesuffix("s")
+    return doc
+
+
+@pytest.fixture
+def preprocess(monkeypatch):
+    # A blank English model has the stop words and punctuation flags; the
+    # lemmatizer is replaced by a suffix-stripping stub
+    nlp = spacy.blank("en")
+    nlp.add_pipe("suffix_lemmatizer")
+    monkeypatch.setattr(spacy, "load", lambda name: nlp)
+    monkeypatch.delitem(sys.modules, "scripts.preprocess", raising=False)
+    import scripts.preprocess as preprocess
+
+    return preprocess
+
+
+def test_bulk_cleaning_matches_per_text(preprocess):
+    expected = [preprocess.clean_text(text) for text in TEXTS]
+    assert expected[0] == "drug binding receptor"
+    assert expected[1] == expected[2] == ""
+    assert list(preprocess.clean_texts(TEXTS, batch_size=2)) == expected
+
+    df = pd.DataFrame({"text": TEXTS})
+    bulk = preprocess.clean_chunk(df.copy(), bulk=True, batch_size=2)
+    single = preprocess.clean_chunk(df.copy(), bulk=False)
+    assert bulk["cleaned_text"].tolist() == single["cleaned_text"].tolist() == expected
+
+
+def test_cleaned_chunks_line_up_with_their_rows(preprocess):
+    texts = [f"The {word}s are binding" for word in ["drug", "target", "gene", "enzyme", "pathway"]]
+    chunks = [pd.DataFrame({"text": texts[:3]}), pd.DataFrame({"text": []}), pd.DataFrame({"text": texts[3:]})]
+
+    cleaned = list(preprocess.clean_chunks(iter(chunks), batch_size=2))
+    assert [len(chunk) for chunk in cleaned] == [3, 0, 2]
+    for chunk in cleaned:
+        assert chunk["cleaned_text"].tolist() == [preprocess.clean_text(text) for text in chunk["text"]]
+    assert cleaned[2]["cleaned_text"].tolist() == ["enzyme binding", "pathway binding"]
@@ -0,0 +1,72 @@
+import pytest
+
+from src.queries import query_drug_target_graph as queries
+
+
+class Result:
+    def __init__(self, rows):
+        self.rows = rows
+
+    def data(self):
+        return self.rows
+
+    def evaluate(self):
+        return next(iter(self.rows[0].values())) if self.rows else None
+
+
+class RecordingGraph:
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+        self.queries = []
+
+    def run(self, query, **parameters):
+        self.queries.append((query, parameters))
+        return Result(self.rows)
+
+
+@pytest.fixture
+def graph(monkeypatch):
+    graph = RecordingGraph([{"id": "DB00945", "name": "Aspirin", "type": "small molecule"}])
+    monkeypatch.setattr(queries, "graph_db", graph)
+    return graph
+
+
+def test_search_drugs_filters_and_pages_in_the_query(graph):
+    assert queries.search_drugs("aspi", "small molecule", skip=50, limit=25) == graph.rows
+    query, parameters = graph.queries[-1]
+    assert "CONTAINS toLower($text)" in query and "d.drug_type = $drug_type" in query
+    assert "SKIP $skip LIMIT $limit" in query
+    assert parameters == {"text": "aspi", "drug_type": "small molecule", "skip": 50, "limit": 25}
+
+    queries.search_drugs()
+    query, parameters = graph.queries[-1]
+    assert "WHERE" not in query
+    assert parameters == {"skip": 0, "limit": 50}
+
+
+def test_count_drugs_uses_the_search_filters(graph):
+    graph.rows = [{"count": 3}]
+    assert queries.count_drugs(drug_type="biotech") == 3
+    query, parameters = graph.queries[-1]
+    assert "count(d)" in query and parameters == {"drug_type": "biotech"}
+
+
+def test_neighborhood_is_filtered_and_paged_with_parameters(graph):
+    queries.get_drug_neighborhood("DB00945", relationship="targets", text="", skip=100, limit=51)
+    query, parameters = graph.queries[-1]
+    assert "SKIP $skip LIMIT $limit" in query
+    assert parameters == {
+        "drug_id": "DB00945",
+        "relationship": "targets",
+        "node_type": None,
+        "text": None,
+        "skip": 100,
+        "limit": 51,
+    }
+
+
+def test_shortest_path_ids_are_parameters(graph):
+    queries.find_shortest_path_between_drugs("DB00001", "x'}) DETACH DELETE d1 //")
+    query, parameters = graph.queries[-1]
+    assert "DELETE" not in query
+    assert parameters == {"drug_id_1": "DB00001", "drug_id_2": "x'}) DETACH DELETE d1 //"}
@@ -0,0 +1,210 @@
+import sys
+import threading
+import time
+import types
+
+
+class Document:
+    def __init__(self, page_content, metadata):
+        self.page_content = page_content
+        self.metadata = metadata
+
+
+class StubDatabaseAgent:
+    """Answers KG queries locally; questions containing "fail" raise."""
+
+    def __init__(self, model_name, connection_args, schema_config_or_info_dict, conversation_factory):
+        self.delay = connection_args.get("delay", 0.0)
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+
+    def connect(self):
+        pass
+
+    def get_query_results(self, question, n_results):
+        with self.lock:
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        try:
+            time.sleep(self.delay)
+            if "fail" in question:
+                raise RuntimeError("query failed")
+            return [Document(f"kg {question} {i}", {"rank": i}) for i in range(n_results)]
+        finally:
+            with self.lock:
+                self.active -= 1
+
+
+class StubVectorDatabaseAgentMilvus:
+    def __init__(self, embedding_func, connection_args):
+        self.delay = connection_args.get("delay", 0.0)
+
+    def connect(self):
+        pass
+
+    def similarity_search(self, question, n_results):
+        time.sleep(self.delay)
+        return [Document(f"vs {question} {i}", {"rank": i}) for i in range(n_results)]
+
+
+sys.modules.setdefault("src.database_agent", types.SimpleNamespace(DatabaseAgent=StubDatabaseAgent))
+sys.modules.setdefault(
+    "src.vectorstore_agent",
+    types.SimpleNamespace(VectorDatabaseAgentMilvus=StubVectorDatabaseAgentMilvus),
+)
+
+from src.rag_agent import RagAgent, RagAgentModeEnum  # noqa: E402
+from src.retrieval_cache import RetrievalCache  # noqa: E402
+
+
+def make_agent(mode=RagAgentModeEnum.KG, retrieval_cache=None, **connection_args):
+    return RagAgent(
+        mode=mode,
+        model_name="stub",
+        connection_args=connection_args,
+        n_results=2,
+        use_prompt=True,
+        schema_config_or_info_dict={"drug": {}},
+        embedding_func=object(),
+        retrieval_cache=retrieval_cache,
+    )
+
+
+def test_generate_responses():
+    agent = make_agent()
+    assert agent.generate_responses("aspirin") == [
+        ("kg aspirin 0", {"rank": 0}),
+        ("kg aspirin 1", {"rank": 1}),
+    ]
+
+
+def test_batch_keeps_order_and_isolates_failures():
+    agent = make_agent()
+    questions = [f"q{i}" for i in range(20)] + ["please fail"]
+    batch = agent.generate_responses_batch(questions, max_workers=4)
+
+    assert [r["question"] for r in batch] == questions
+    assert batch[3]["results"][0] == ("kg q3 0", {"rank": 0})
+    assert all(r["error"] is None for r in batch[:-1])
+    assert isinstance(batch[-1]["error"], RuntimeError)
+    assert batch[-1]["results"] == []
+    assert all(r["latency"] >= 0 for r in batch)
+
+
+def test_batch_concurrency_is_bounded():
+    agent = make_agent(delay=0.02)
+    start = time.perf_counter()
+    agent.generate_responses_batch([f"q{i}" for i in range(16)], max_workers=4)
+    assert agent.agent.max_active == 4
+    assert time.perf_counter() - start < 16 * 0.02
+
+
+def test_hybrid_mode_fuses_both_backends():
+    agent = make_agent(RagAgentModeEnum.Hybrid)
+    results = agent.generate_responses("aspirin")
+    assert len(results) == 2
+    assert {r[0] for r in results} == {"kg aspirin 0", "vs aspirin 0"}
+
+
+def test_hybrid_latency_is_max_not_sum():
+    agent = make_agent(RagAgentModeEnum.Hybrid, delay=0.1)
+    start = time.perf_counter()
+    agent.generate_responses("aspirin")
+    assert time.perf_counter() - start < 0.18
+
+
+def test_hybrid_timeout_drops_slow_backend():
+    agent = make_agent(RagAgentModeEnum.Hybrid)
+    agent.backend_timeout = 0.05
+    agent.backends["vectorstore"][0].delay = 0.5
+    start = time.perf_counter()
+    results = agent.generate_responses("aspirin")
+    assert time.perf_counter() - start < 0.3
+    assert [r[0] for r in results] == ["kg aspirin 0", "kg aspirin 1"]
+
+
+def test_partial_hybrid_results_are_not_cached():
+    cache = RetrievalCache()
+    agent = make_agent(RagAgentModeEnum.Hybrid, retrieval_cache=cache)
+    agent.backend_timeout = 0.05
+    vectorstore = agent.backends["vectorstore"][0]
+    vectorstore.delay = 0.5
+    assert [r[0] for r in agent.generate_responses("aspirin")] == ["kg aspirin 0", "kg aspirin 1"]
+    assert cache.stats()["entries"] == 0
+
+    vectorstore.delay = 0.0
+    results = agent.generate_responses("aspirin")
+    assert {r[0] for r in results} == {"kg aspirin 0", "vs aspirin 0"}
+    assert agent.generate_responses("aspirin") == results
+    assert cache.stats()["hits"] == 1
+
+
+def test_reciprocal_rank_fusion_prefers_shared_results():
+    from src.rag_agent import reciprocal_rank_fusion
+
+    fused = reciprocal_rank_fusion([
+        [("a", 1), ("b", 2), ("c", 3)],
+        [("c", 4), ("d", 5)],
+    ])
+    assert fused[0] == ("c", 3)
+    assert [r[0] for r in fused] == ["c", "a", "b", "d"]
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_retrieval_cache_hits_on_normalized_question():
+    cache = RetrievalCache()
+    agent = make_agent(retrieval_cache=cache)
+    first = agent.generate_responses("Aspirin  targets")
+    assert agent.generate_responses("aspirin targets") == first
+    assert cache.stats()["hits"] == 1
+    assert cache.stats()["misses"] == 1
+
+    agent.documentids_workspace = ["doc-1"]
+    agent.generate_responses("aspirin targets")
+    agent.n_results = 3
+    assert len(agent.generate_responses("aspirin targets")) == 3
+    assert agent.cache_stats()["misses"] == 3
+
+
+def test_retrieval_cache_lru_and_ttl():
+    clock = FakeClock()
+    cache = RetrievalCache(max_entries=2, ttl=10, clock=clock)
+    for q in ["a", "b", "a", "c"]:
+        cache.put(cache.make_key("kg", q, 2), [q])
+    assert cache.get(cache.make_key("kg", "b", 2)) is None
+    assert cache.get(cache.make_key("kg", "a", 2)) == ["a"]
+    clock.now = 11
+    assert cache.get(cache.make_key("kg", "a", 2)) is None
+    assert cache.stats()["evictions"] == 1
+    assert cache.stats()["expirations"] == 1
+
+
+def test_local_store_writes_invalidate_cache(tmp_path):
+    from tests.test_local_vectorstore import HashEmbeddings
+
+    cache = RetrievalCache()
+    agent = RagAgent(
+        mode=RagAgentModeEnum.VectorStore,
+        model_name="stub",
+        connection_args={"path": str(tmp_path)},
+        n_results=1,
+        use_prompt=True,
+        embedding_func=HashEmbeddings(),
+        vectorstore_backend="local",
+        retrieval_cache=cache,
+    )
+    agent.agent.add_texts(["metoprolol blocks beta receptors"])
+    assert agent.generate_responses("angiotensin receptors")[0][0].startswith("metoprolol")
+
+    agent.agent.add_texts(["losartan blocks angiotensin receptors"])
+    assert agent.generate_responses("angiotensin receptors")[0][0].startswith("losartan")
+    assert cache.stats()["hits"] == 0
+    assert cache.stats()["invalidations"] == 1
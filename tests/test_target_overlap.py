@@ -0,0 +1,107 @@
+import itertools
+
+import networkx as nx
+import numpy as np
+import pytest
+
+from src.target_overlap import DrugOverlap, write_similarities
+
+TARGETS = {
+    "DB01": {"T1", "T2", "T3"},
+    "DB02": {"T1", "T2"},
+    "DB03": {"T3", "T4"},
+    "DB04": {"T5"},
+    "DB05": {"T1", "T2", "T4"},
+}
+
+
+def make_overlap():
+    edges = [{"drug_id": d, "target_id": t} for d, targets in TARGETS.items() for t in sorted(targets)]
+    # Repeated relationships count once
+    return DrugOverlap.from_edges(edges + edges[:2])
+
+
+@pytest.mark.parametrize("metric", ["jaccard", "cosine"])
+def test_similar_drugs_match_set_overlap(metric):
+    overlap = make_overlap()
+    pairs = overlap.similar_drugs(k=2, metric=metric, block_size=2)
+
+    for drug, targets in TARGETS.items():
+        expected = []
+        for other, other_targets in TARGETS.items():
+            shared = len(targets & other_targets)
+            if other == drug or not shared:
+                continue
+            if metric == "jaccard":
+                score = shared / len(targets | other_targets)
+            else:
+                score = shared / np.sqrt(len(targets) * len(other_targets))
+            expected.append((-score, other, shared))
+        expected = sorted(expected)[:2]
+        rows = pairs[pairs["drug_id"] == drug]
+        assert list(rows["similar_drug_id"]) == [other for _, other, _ in expected]
+        assert np.allclose(rows["score"], [-score for score, _, _ in expected])
+        assert list(rows["shared"]) == [shared for _, _, shared in expected]
+    # A drug without overlaps has no similar drugs
+    assert "DB04" not in set(pairs["drug_id"])
+
+    with pytest.raises(ValueError):
+        overlap.similar_drugs(metric="dice")
+
+
+def test_feature_candidates_rank_unlinked_drugs():
+    overlap = make_overlap()
+    pairs = overlap.similar_drugs(k=4)
+    candidates = overlap.feature_candidates(pairs, k=3)
+
+    similarity = overlap.similarity_matrix(pairs).toarray()
+    for target, rows in candidates.groupby("feature_id"):
+        known = [overlap.drugs.index(d) for d, targets in TARGETS.items() if target in targets]
+        assert not set(rows["drug_id"]) & {overlap.drugs[i] for i in known}
+        for row in rows.itertuples():
+            assert np.isclose(row.score, similarity[overlap.drugs.index(row.drug_id), known].sum())
+        assert list(rows["rank"]) == list(range(1, len(rows) + 1))
+        assert list(rows["score"]) == sorted(rows["score"], reverse=True)
+
+    # DB03 shares T3 with DB01 and T4 with DB05, both of which target T1
+    t1 = overlap.feature_candidates(pairs, features=["T1", "T9"])
+    assert list(t1["drug_id"]) == ["DB03"]
+    assert set(t1["feature_id"]) == {"T1"}
+
+
+def test_from_graph_selects_feature_types():
+    graph = nx.DiGraph()
+    graph.add_node("DB01", type="drug")
+    graph.add_node("DB02", type="drug")
+    graph.add_node("T1", type="target")
+    graph.add_node("E1", type="enzyme")
+    graph.add_node("P1", type="pathway")
+    for drug, feature in itertools.product(["DB01", "DB02"], ["T1", "E1"]):
+        graph.add_edge(drug, feature)
+    graph.add_edge("DB01", "P1")
+    graph.add_edge("DB01", "DB02")
+
+    targets = DrugOverlap.from_graph(graph)
+    assert targets.features == ["T1"]
+    combined = DrugOverlap.from_graph(graph, feature_types=("target", "enzyme", "pathway"))
+    assert set(combined.features) == {"T1", "E1", "P1"}
+    assert list(combined.degree) == [3, 2]
+
+    with pytest.raises(ValueError):
+        DrugOverlap.from_graph(graph, feature_types=("gene",))
+
+
+def test_write_similarities_batches():
+    class RecordingGraph:
+        def __init__(self):
+            self.calls = []
+
+        def run(self, query, **parameters):
+            self.calls.append((query, parameters))
+
+    pairs = make_overlap().similar_drugs(k=2)
+    graph_db = RecordingGraph()
+    write_similarities(graph_db, pairs, batch_size=3)
+    assert len(graph_db.calls) == -(-len(pairs) // 3)
+    assert "SHARES_TARGETS_WITH" in graph_db.calls[0][0]
+    assert sum(len(parameters["rows"]) for _, parameters in graph_db.calls) == len(pairs)
@@ -0,0 +1,27 @@
+from model.token_counter import TokenCounter
+
+
+class WhitespaceTokenizer:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, texts, add_special_tokens=False):
+        self.calls += 1
+        return {"input_ids": [text.split() for text in texts]}
+
+
+def test_count_batch_memoizes_repeated_texts():
+    tokenizer = WhitespaceTokenizer()
+    counter = TokenCounter(tokenizer=tokenizer)
+
+    assert counter.count_batch(["a b c", "d e", "a b c"]) == [3, 2, 3]
+    assert tokenizer.calls == 1
+    assert counter.count("a b c") == 3
+    assert tokenizer.calls == 1
+    assert counter.cache_info()["hits"] == 1
+
+
+def test_cache_is_bounded():
+    counter = TokenCounter(tokenizer=WhitespaceTokenizer(), cache_size=2)
+    counter.count_batch(["a", "b", "c"])
+    assert counter.cache_info()["size"] == 2